@@ -57,6 +57,22 @@ EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "drqc hfti qfui xirs")
 _admins_raw = os.getenv("ADMIN_ALERT_EMAILS", "")
 ADMIN_ALERT_EMAILS = [e.strip() for e in _admins_raw.split(",") if e.strip()]
 
+# Email outbox (drained by `python manage.py process_outbox`)
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100") or 100)
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5") or 5)
+OUTBOX_RETRY_BASE_SECONDS = int(os.getenv("OUTBOX_RETRY_BASE_SECONDS", "30") or 30)
+OUTBOX_RETRY_MAX_SECONDS = int(os.getenv("OUTBOX_RETRY_MAX_SECONDS", "3600") or 3600)
+# Claimed rows stay with their worker this long; a worker that dies mid-batch
+# leaves mail that becomes due again once the lease runs out.
+OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", "300") or 300)
+
+# Notification digests: pending digest mail for a recipient is flushed once the
+# oldest event is DIGEST_WINDOW_SECONDS old or DIGEST_MAX_EVENTS have piled up.
+# Addresses without a user account (ADMIN_ALERT_EMAILS) use the default mode.
+NOTIFICATION_DEFAULT_MODE = os.getenv("NOTIFICATION_DEFAULT_MODE", "digest")
+DIGEST_WINDOW_SECONDS = int(os.getenv("DIGEST_WINDOW_SECONDS", "60") or 60)
+DIGEST_MAX_EVENTS = int(os.getenv("DIGEST_MAX_EVENTS", "50") or 50)
+
 # DRF
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
@@ -72,6 +88,38 @@ REST_FRAMEWORK = {
     "PAGE_SIZE": 10,
 }
 
+# Posts per page in the keyset-paginated feed
+POST_FEED_PAGE_SIZE = int(os.getenv("POST_FEED_PAGE_SIZE", "20") or 20)
+
+# All-tasks page: projects per page and tasks shown per project before "load more"
+ALL_TASKS_PROJECTS_PER_PAGE = int(os.getenv("ALL_TASKS_PROJECTS_PER_PAGE", "10") or 10)
+ALL_TASKS_PREVIEW = int(os.getenv("ALL_TASKS_PREVIEW", "10") or 10)
+
+# Projects and assignees per page on the manager reports
+REPORT_PAGE_SIZE = int(os.getenv("REPORT_PAGE_SIZE", "25") or 25)
+
+# Results per page on /search/
+SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", "20") or 20)
+
+# Largest payload accepted by the /api/tasks/bulk/ endpoints
+BULK_TASKS_MAX = int(os.getenv("BULK_TASKS_MAX", "5000") or 5000)
+
+# Background jobs (`manage.py runjobs`, see core.jobs): larger deletes and
+# uploads are queued instead of running in the request.
+PROJECT_DELETE_INLINE_MAX_TASKS = int(os.getenv("PROJECT_DELETE_INLINE_MAX_TASKS", "5000") or 5000)
+IMPORT_INLINE_MAX_BYTES = int(os.getenv("IMPORT_INLINE_MAX_BYTES", str(2 * 1024 * 1024)) or 2 * 1024 * 1024)
+JOB_PROGRESS_INTERVAL = float(os.getenv("JOB_PROGRESS_INTERVAL", "1") or 1)
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "600") or 600)
+# A running job's worker refreshes its heartbeat this often, independent of
+# progress reports; keep it well below JOB_STALE_SECONDS.
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "30") or 30)
+
+# Authenticated users are cached for this long between requests (see
+# core.usercache); role, password and activation changes invalidate them at
+# once. Only used when CACHE_SHARED: with locmem and several workers every
+# request reads the user from the database.
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv("AUTH_USER_CACHE_TIMEOUT", "300") or 300)
+
 ROOT_URLCONF = "InsightHub.urls"
 
 # Channels
@@ -79,12 +127,109 @@ ASGI_APPLICATION = "InsightHub.asgi.application"
 REDIS_HOST = os.getenv("REDIS_HOST", "127.0.0.1")
 REDIS_PORT = int(os.getenv("REDIS_PORT", "6379") or 6379)
 
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels_redis.core.RedisChannelLayer",
-        "CONFIG": {"hosts": [(REDIS_HOST, REDIS_PORT)]},
+# Channel layer: CHANNEL_LAYER=redis (default, shared across processes) or
+# memory (core.channel_layers, one process only: single-node servers and CI).
+CHANNEL_LAYER = os.getenv("CHANNEL_LAYER", "redis").lower()
+CHANNEL_CAPACITY = int(os.getenv("CHANNEL_CAPACITY", "100") or 100)
+CHANNEL_EXPIRY = int(os.getenv("CHANNEL_EXPIRY", "60") or 60)
+
+if CHANNEL_LAYER == "memory":
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "core.channel_layers.LocalChannelLayer",
+            "CONFIG": {"capacity": CHANNEL_CAPACITY, "expiry": CHANNEL_EXPIRY},
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {
+                "hosts": [(REDIS_HOST, REDIS_PORT)],
+                "capacity": CHANNEL_CAPACITY,
+                "expiry": CHANNEL_EXPIRY,
+            },
+        }
+    }
+
+# Notifications kept per user for replay on reconnect (see core.history);
+# only with CACHE_SHARED, as workers must agree on the sequence numbers.
+NOTIFICATION_HISTORY_SIZE = int(os.getenv("NOTIFICATION_HISTORY_SIZE", "50") or 50)
+NOTIFICATION_HISTORY_TIMEOUT = int(os.getenv("NOTIFICATION_HISTORY_TIMEOUT", "86400") or 86400)
+
+# Caches: CACHE_BACKEND=locmem (default, per process), file or redis.
+# "fragments" holds rendered cards (see core.fragments) apart from the default
+# cache so evicting one never flushes the other.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "locmem").lower()
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", f"redis://{REDIS_HOST}:{REDIS_PORT}/1")
+CACHE_FILE_DIR = Path(os.getenv("CACHE_FILE_DIR", BASE_DIR / ".cache"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000") or 10000)
+# Web worker processes (gunicorn and uvicorn read the same variable). locmem
+# is private to each of them, so caches that are invalidated on write
+# (rendered cards, request.user) are only used when every worker sees the
+# same store: a file/redis backend, or a single worker.
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1") or 1)
+CACHE_SHARED = CACHE_BACKEND != "locmem" or WEB_CONCURRENCY == 1
+
+
+def _cache(alias, backend=CACHE_BACKEND):
+    if backend == "redis":
+        return {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_REDIS_URL,
+            "KEY_PREFIX": alias,
+        }
+    if backend == "file":
+        return {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": str(CACHE_FILE_DIR / alias),
+            "OPTIONS": {"MAX_ENTRIES": CACHE_MAX_ENTRIES},
+        }
+    return {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": alias,
+        "OPTIONS": {"MAX_ENTRIES": CACHE_MAX_ENTRIES},
     }
+
+
+# Sessions: SESSION_BACKEND=db (default) | cached_db | cache | signed_cookies.
+# cached_db reads from the "sessions" cache and writes through to the table;
+# cache keeps sessions only in the cache (lost on eviction or restart);
+# signed_cookies keeps them in the browser. The "sessions" cache follows
+# CACHE_BACKEND unless SESSION_CACHE_BACKEND (locmem | file | redis) is set;
+# locmem is per process, so use file or redis with more than one worker.
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "db").lower()
+SESSION_CACHE_BACKEND = os.getenv("SESSION_CACHE_BACKEND", CACHE_BACKEND).lower()
+SESSION_ENGINES = {
+    "db": "django.contrib.sessions.backends.db",
+    "cached_db": "django.contrib.sessions.backends.cached_db",
+    "cache": "django.contrib.sessions.backends.cache",
+    "signed_cookies": "django.contrib.sessions.backends.signed_cookies",
+}
+SESSION_ENGINE = SESSION_ENGINES[SESSION_BACKEND]
+SESSION_CACHE_ALIAS = "sessions"
+
+# Flash messages: MESSAGE_BACKEND=fallback (default: cookie, session when too
+# large) | cookie (never touches the session) | session.
+MESSAGE_BACKEND = os.getenv("MESSAGE_BACKEND", "fallback").lower()
+MESSAGE_STORAGES = {
+    "fallback": "django.contrib.messages.storage.fallback.FallbackStorage",
+    "cookie": "django.contrib.messages.storage.cookie.CookieStorage",
+    "session": "django.contrib.messages.storage.session.SessionStorage",
 }
+MESSAGE_STORAGE = MESSAGE_STORAGES[MESSAGE_BACKEND]
+
+CACHES = {
+    "default": _cache("default"),
+    "fragments": _cache("fragments"),
+    "sessions": _cache("sessions", SESSION_CACHE_BACKEND),
+}
+
+# Seconds a rendered card may live in the fragments cache. Cards are
+# retired by writing a new version token to this cache, so they are not
+# cached at all unless CACHE_SHARED (locmem with WEB_CONCURRENCY > 1 would
+# keep serving stale cards on the workers that did not see the write).
+FRAGMENT_CACHE_TIMEOUT = int(os.getenv("FRAGMENT_CACHE_TIMEOUT", "3600") or 3600)
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
@@ -92,9 +237,10 @@ MIDDLEWARE = [
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.middleware.CachedAuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.middleware.NotificationBatchMiddleware",
 ]
 
 TEMPLATES = [
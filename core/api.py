@@ -0,0 +1,161 @@
+from django.conf import settings
+from django.db import transaction
+from rest_framework import mixins, permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from . import bulk, search
+from .filters import PostFilter, ProjectFilter, TaskFilter
+from .models import Post, Project, Tag, Task
+from .pagination import CreatedAtCursorPagination, IdCursorPagination
+from .permissions import IsManagerOrAdminOrReadOnly, IsOwnerOrReadOnly
+from .serializers import (
+    BulkTaskCreateSerializer,
+    BulkTaskDeleteSerializer,
+    BulkTaskUpdateSerializer,
+    PostSerializer,
+    ProjectSerializer,
+    SearchResultSerializer,
+    TagSerializer,
+    TaskSerializer,
+    requested_fields,
+)
+
+
+class FieldAwareQuerysetMixin:
+    """Join or prefetch relations only when a requested field needs them.
+
+    ``select_for_fields`` / ``prefetch_for_fields`` map serializer field
+    names to relation paths; ``deferrable_fields`` are large columns left
+    out of the SELECT unless asked for.
+    """
+
+    select_for_fields = {}
+    prefetch_for_fields = {}
+    deferrable_fields = ()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        wanted = requested_fields(self.request)
+
+        def needed(field):
+            return wanted is None or field in wanted
+
+        select = {path for field, path in self.select_for_fields.items() if needed(field)}
+        if select:
+            queryset = queryset.select_related(*select)
+        prefetch = {path for field, path in self.prefetch_for_fields.items() if needed(field)}
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        deferred = [field for field in self.deferrable_fields if not needed(field)]
+        if deferred:
+            queryset = queryset.defer(*deferred)
+        return queryset
+
+
+class ProjectViewSet(FieldAwareQuerysetMixin, viewsets.ModelViewSet):
+    queryset = Project.objects.all()
+    serializer_class = ProjectSerializer
+    permission_classes = [permissions.IsAuthenticated, IsManagerOrAdminOrReadOnly]
+    pagination_class = CreatedAtCursorPagination
+    filterset_class = ProjectFilter
+    search_fields = ['name']
+    ordering_fields = ['created_at']
+    select_for_fields = {'owner_username': 'owner'}
+
+    def perform_create(self, serializer):
+        serializer.save(owner=self.request.user)
+
+    def perform_destroy(self, instance):
+        bulk.delete_project(instance)
+
+
+class TaskViewSet(FieldAwareQuerysetMixin, viewsets.ModelViewSet):
+    queryset = Task.objects.all()
+    serializer_class = TaskSerializer
+    permission_classes = [permissions.IsAuthenticated, IsManagerOrAdminOrReadOnly]
+    pagination_class = CreatedAtCursorPagination
+    filterset_class = TaskFilter
+    search_fields = ['title']
+    ordering_fields = ['created_at']
+    select_for_fields = {'project_name': 'project', 'assignee_username': 'assignee'}
+    deferrable_fields = ('description',)
+
+    # post_save/post_delete queue the notification email; one transaction
+    # with the row so a failure leaves neither.
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            super().perform_create(serializer)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            super().perform_update(serializer)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            super().perform_destroy(instance)
+
+    def _bulk_rows(self, serializer_class):
+        limit = getattr(settings, 'BULK_TASKS_MAX', 5000)
+        if not isinstance(self.request.data, list):
+            raise ValidationError('Expected a list of tasks.')
+        if len(self.request.data) > limit:
+            raise ValidationError(f'At most {limit} tasks per request.')
+        serializer = serializer_class(data=self.request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request):
+        tasks = bulk.create_tasks(self._bulk_rows(BulkTaskCreateSerializer))
+        return Response({'created': len(tasks), 'ids': [t.id for t in tasks]}, status=status.HTTP_201_CREATED)
+
+    @bulk_create.mapping.patch
+    def bulk_update(self, request):
+        tasks = bulk.update_tasks(self._bulk_rows(BulkTaskUpdateSerializer))
+        return Response({'updated': len(tasks)})
+
+    @bulk_create.mapping.delete
+    def bulk_delete(self, request):
+        serializer = BulkTaskDeleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        tasks = bulk.delete_tasks(serializer.validated_data['ids'])
+        return Response({'deleted': len(tasks)})
+
+
+class PostViewSet(FieldAwareQuerysetMixin, viewsets.ModelViewSet):
+    queryset = Post.objects.all()
+    serializer_class = PostSerializer
+    permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
+    pagination_class = CreatedAtCursorPagination
+    filterset_class = PostFilter
+    search_fields = ['title']
+    ordering_fields = ['created_at']
+    select_for_fields = {'owner_username': 'owner'}
+    prefetch_for_fields = {'tags': 'tags'}
+    deferrable_fields = ('content',)
+
+    def perform_create(self, serializer):
+        serializer.save(owner=self.request.user)
+
+
+class TagViewSet(FieldAwareQuerysetMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Tag.objects.all()
+    serializer_class = TagSerializer
+    pagination_class = IdCursorPagination
+    search_fields = ['name']
+    ordering_fields = ['id']
+    filterset_fields = ['name']
+
+
+class SearchViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Ranked full-text search: ``?q=words&kind=post|task``."""
+
+    serializer_class = SearchResultSerializer
+    # The index does the filtering and ordering; the generic backends would not.
+    filter_backends = []
+
+    def get_queryset(self):
+        params = self.request.query_params
+        return search.search(params.get('q', ''), params.get('kind'))
@@ -0,0 +1,152 @@
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from . import likes, signals
+from .models import Project, Task, User
+
+BATCH_SIZE = 500
+
+
+def _missing(model, ids):
+    ids = {i for i in ids if i is not None}
+    found = set(model.objects.filter(id__in=ids).values_list('id', flat=True))
+    return sorted(ids - found)
+
+
+def _check_references(project_ids=(), assignee_ids=()):
+    errors = {}
+    missing = _missing(Project, project_ids)
+    if missing:
+        errors['project'] = [f"Unknown project id(s): {missing}"]
+    missing = _missing(User, assignee_ids)
+    if missing:
+        errors['assignee'] = [f"Unknown user id(s): {missing}"]
+    if errors:
+        raise ValidationError(errors)
+
+
+def _delete_tasks(ids):
+    """DELETE tasks by id in one statement, skipping the Collector.
+
+    QuerySet.delete() cannot fast-delete Task while per-row delete
+    receivers are connected, so it would select every row of the chunk
+    first. _raw_delete() is Django-private and runs no cascades or
+    signals; that is safe only because nothing references a task
+    (ProjectDeletionTests.test_nothing_references_tasks fails otherwise)
+    and callers send the aggregated notifications themselves.
+    """
+    queryset = Task.objects.filter(id__in=ids)
+    return queryset._raw_delete(queryset.db)
+
+
+def create_tasks(rows):
+    """Insert validated task dicts in one transaction and notify once."""
+    _check_references(
+        project_ids={row['project'] for row in rows},
+        assignee_ids={row.get('assignee') for row in rows},
+    )
+    now = timezone.now()
+    tasks = [
+        Task(
+            title=row['title'],
+            description=row.get('description', ''),
+            completed=row.get('completed', False),
+            completed_at=now if row.get('completed') else None,
+            project_id=row['project'],
+            assignee_id=row.get('assignee'),
+        )
+        for row in rows
+    ]
+    with transaction.atomic():
+        Task.objects.bulk_create(tasks, batch_size=BATCH_SIZE)
+        signals.tasks_bulk_changed('created', tasks)
+    return tasks
+
+
+def update_tasks(rows):
+    """Apply ``completed``/``assignee`` changes keyed by task id."""
+    changes = {row['id']: row for row in rows}
+    _check_references(assignee_ids={row.get('assignee') for row in rows if 'assignee' in row})
+    now = timezone.now()
+    with transaction.atomic():
+        tasks = list(
+            Task.objects.select_for_update()
+            .filter(id__in=changes)
+            .only('id', 'title', 'project_id', 'assignee_id', 'completed', 'completed_at', 'created_at')
+        )
+        missing = sorted(set(changes) - {task.id for task in tasks})
+        if missing:
+            raise ValidationError({'id': [f"Unknown task id(s): {missing}"]})
+        for task in tasks:
+            row = changes[task.id]
+            if 'completed' in row:
+                task.completed = row['completed']
+                if task.completed and not task.completed_at:
+                    task.completed_at = now
+                elif not task.completed:
+                    task.completed_at = None
+            if 'assignee' in row:
+                task.assignee_id = row['assignee']
+            # bulk_update() skips auto_now.
+            task.updated_at = now
+        Task.objects.bulk_update(tasks, ['completed', 'completed_at', 'assignee', 'updated_at'], batch_size=BATCH_SIZE)
+        signals.tasks_bulk_changed('updated', tasks)
+    return tasks
+
+
+def delete_tasks(ids):
+    """Delete tasks by id without the per-row delete receivers."""
+    with transaction.atomic():
+        tasks = list(Task.objects.filter(id__in=ids).only('id', 'title', 'project_id', 'assignee_id'))
+        _delete_tasks([task.id for task in tasks])
+        signals.tasks_bulk_changed('deleted', tasks)
+    return tasks
+
+
+def delete_project(project, chunk_size=2000, progress=None):
+    """Delete ``project`` and its tasks without per-task signals.
+
+    Tasks go in chunks of ``chunk_size``, each in its own transaction so a
+    huge project never holds one long lock; the project row goes last,
+    once no task references it. One aggregated notification is sent.
+    ``progress(deleted)`` is called after each chunk. Returns the number
+    of tasks deleted.
+    """
+    deleted, assignee_ids = 0, set()
+    while True:
+        with transaction.atomic():
+            rows = list(
+                Task.objects.filter(project_id=project.id).order_by('id').values_list('id', 'assignee_id')[:chunk_size]
+            )
+            if not rows:
+                # Locked so no task can be added between the check and the delete.
+                if Project.objects.select_for_update().filter(id=project.id).exists():
+                    with signals.muted():
+                        Project.objects.filter(id=project.id).delete()
+                    signals.project_deleted_with_tasks(project, deleted, assignee_ids)
+                return deleted
+            ids = [pk for pk, _ in rows]
+            _delete_tasks(ids)
+            signals.project_tasks_deleted(ids)
+        deleted += len(ids)
+        assignee_ids.update(assignee_id for _, assignee_id in rows if assignee_id)
+        if progress:
+            progress(deleted)
+
+
+def delete_user(user, progress=None):
+    """Delete ``user`` once each of their projects went through delete_project().
+
+    ``progress(deleted)`` counts tasks across all of their projects.
+    Returns the number of tasks deleted.
+    """
+    deleted = 0
+    for project in Project.objects.filter(owner=user).only('id', 'name', 'owner_id'):
+        report = (lambda done, before=deleted: progress(before + done)) if progress else None
+        deleted += delete_project(project, progress=report)
+    with transaction.atomic():
+        # The cascade drops their likes without touching like_count.
+        likes.take_back_likes(user.id)
+        user.delete()
+    return deleted
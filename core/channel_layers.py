@@ -0,0 +1,198 @@
+import asyncio
+import threading
+import time
+import uuid
+from collections import deque
+from copy import deepcopy
+
+from channels.exceptions import ChannelFull
+from channels.layers import BaseChannelLayer
+
+# Housekeeping of idle channels and stale group members runs at most this often.
+SWEEP_INTERVAL = 1.0
+
+
+class LocalChannelLayer(BaseChannelLayer):
+    """Process-local channel layer for single-node deployments and tests.
+
+    Unlike channels' InMemoryChannelLayer it may be written to from any
+    thread or event loop (fanout.flush() sends from request threads): state
+    lives behind one lock and a waiting receive() is woken through its own
+    loop. Each channel keeps at most ``capacity`` messages for ``expiry``
+    seconds; a full channel rejects the message and counts it in stats().
+
+    group_send() copies the message once and hands that copy to every
+    member, so consumers must treat received messages as read-only.
+    """
+
+    extensions = ["groups", "flush"]
+
+    def __init__(self, expiry=60, group_expiry=86400, capacity=100, channel_capacity=None, **kwargs):
+        super().__init__(expiry=expiry, capacity=capacity, channel_capacity=channel_capacity, **kwargs)
+        self.group_expiry = group_expiry
+        self._lock = threading.Lock()
+        self._channels = {}  # channel -> deque of (expires_at, message)
+        self._waiters = {}  # channel -> deque of (loop, future)
+        self._groups = {}  # group -> {channel: joined_at}
+        self._swept = time.monotonic()
+        self._stats = {"sent": 0, "received": 0, "expired": 0, "dropped": 0, "group_sends": 0, "max_depth": 0}
+
+    # --- metrics ---
+    def stats(self):
+        with self._lock:
+            values = dict(self._stats)
+            values["channels"] = len(self._channels)
+            values["queued"] = sum(len(queue) for queue in self._channels.values())
+            values["groups"] = len(self._groups)
+        return values
+
+    # --- channel API ---
+    async def send(self, channel, message):
+        assert isinstance(message, dict), "message is not a dict"
+        self.require_valid_channel_name(channel)
+        assert "__asgi_channel__" not in message
+        with self._lock:
+            self._deliver(channel, deepcopy(message), time.monotonic())
+
+    async def receive(self, channel):
+        self.require_valid_channel_name(channel)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            message = self._pop(channel, time.monotonic())
+            if message is not None:
+                return message
+            future = loop.create_future()
+            waiter = (loop, future)
+            self._waiters.setdefault(channel, deque()).append(waiter)
+        try:
+            return await future
+        finally:
+            if not future.done() or future.cancelled():
+                with self._lock:
+                    waiters = self._waiters.get(channel)
+                    if waiters and waiter in waiters:
+                        waiters.remove(waiter)
+                        if not waiters:
+                            del self._waiters[channel]
+
+    async def new_channel(self, prefix="specific."):
+        return f"{prefix.rstrip('.')}.inmemory!{uuid.uuid4().hex}"
+
+    # --- groups ---
+    async def group_add(self, group, channel):
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+        with self._lock:
+            self._groups.setdefault(group, {})[channel] = time.monotonic()
+
+    async def group_discard(self, group, channel):
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+        with self._lock:
+            members = self._groups.get(group)
+            if members:
+                members.pop(channel, None)
+                if not members:
+                    del self._groups[group]
+
+    async def group_send(self, group, message):
+        assert isinstance(message, dict), "message is not a dict"
+        self.require_valid_group_name(group)
+        message = deepcopy(message)
+        now = time.monotonic()
+        with self._lock:
+            self._stats["group_sends"] += 1
+            self._sweep(now)
+            for channel in list(self._groups.get(group, ())):
+                try:
+                    self._deliver(channel, message, now)
+                except ChannelFull:
+                    # Counted in stats(); one slow consumer must not fail the group.
+                    pass
+
+    # --- flush extension ---
+    async def flush(self):
+        with self._lock:
+            self._channels.clear()
+            self._groups.clear()
+
+    async def close(self):
+        pass
+
+    # --- internals (called with the lock held) ---
+    def _deliver(self, channel, message, now):
+        waiters = self._waiters.get(channel)
+        while waiters:
+            loop, future = waiters.popleft()
+            if not waiters:
+                del self._waiters[channel]
+            if future.done() or loop.is_closed():
+                continue
+            loop.call_soon_threadsafe(self._resolve, channel, future, message)
+            self._stats["sent"] += 1
+            return
+        queue = self._channels.get(channel)
+        if queue is None:
+            queue = self._channels[channel] = deque()
+        else:
+            self._expire(channel, queue, now)
+        if len(queue) >= self.get_capacity(channel):
+            self._stats["dropped"] += 1
+            raise ChannelFull(channel)
+        queue.append((now + self.expiry, message))
+        self._stats["sent"] += 1
+        self._stats["max_depth"] = max(self._stats["max_depth"], len(queue))
+
+    def _resolve(self, channel, future, message):
+        # Runs on the receiver's loop; a receive() cancelled meanwhile puts
+        # the message back rather than losing it.
+        if future.cancelled():
+            with self._lock:
+                self._channels.setdefault(channel, deque()).appendleft((time.monotonic() + self.expiry, message))
+            return
+        with self._lock:
+            self._stats["received"] += 1
+        future.set_result(message)
+
+    def _pop(self, channel, now):
+        queue = self._channels.get(channel)
+        if not queue:
+            return None
+        self._expire(channel, queue, now)
+        if not queue:
+            del self._channels[channel]
+            return None
+        _, message = queue.popleft()
+        if not queue:
+            del self._channels[channel]
+        self._stats["received"] += 1
+        return message
+
+    def _expire(self, channel, queue, now):
+        expired = 0
+        while queue and queue[0][0] < now:
+            queue.popleft()
+            expired += 1
+        if expired:
+            self._stats["expired"] += expired
+            # Nobody is reading this channel: stop fanning out to it.
+            for group, members in list(self._groups.items()):
+                members.pop(channel, None)
+                if not members:
+                    del self._groups[group]
+
+    def _sweep(self, now):
+        if now - self._swept < SWEEP_INTERVAL:
+            return
+        self._swept = now
+        for channel, queue in list(self._channels.items()):
+            self._expire(channel, queue, now)
+            if not queue:
+                del self._channels[channel]
+        stale = now - self.group_expiry
+        for group, members in list(self._groups.items()):
+            for channel, joined in list(members.items()):
+                if joined < stale:
+                    del members[channel]
+            if not members:
+                del self._groups[group]
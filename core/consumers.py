@@ -1,18 +1,49 @@
 import json
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 
+from . import history
+
+
 class NotificationsConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         if self.scope['user'].is_anonymous:
             await self.close()
             return
         self.group_name = f'user_{self.scope["user"].id}'
+        # Join before replaying: events sent meanwhile queue up behind the
+        # replay and the client drops any it already has by their seq.
         await self.channel_layer.group_add(self.group_name, self.channel_name)
         await self.accept()
+        if history.enabled():
+            await self.replay()
+
+    async def replay(self):
+        """Resume protocol: connect with ``?after=<last seq seen>``.
+
+        Missed events are sent in order; without ``after`` the client gets
+        {"kind": "hello", "seq": n} to start from, and when the gap can no
+        longer be filled {"kind": "resync", "seq": n} tells it to reload.
+        """
+        params = parse_qs(self.scope.get('query_string', b'').decode())
+        try:
+            after = int(params['after'][0])
+        except (KeyError, ValueError):
+            after = None
+        current, events = await sync_to_async(history.since)(self.scope['user'].id, after)
+        if after is None:
+            await self.send(text_data=json.dumps({'kind': 'hello', 'seq': current}))
+        elif events is None:
+            await self.send(text_data=json.dumps({'kind': 'resync', 'seq': current}))
+        else:
+            for payload in events:
+                await self.send(text_data=json.dumps(payload))
 
     async def disconnect(self, close_code):
         if hasattr(self, 'group_name'):
             await self.channel_layer.group_discard(self.group_name, self.channel_name)
 
     async def notify(self, event):
-        await self.send(text_data=json.dumps(event['payload']))
\ No newline at end of file
+        await self.send(text_data=json.dumps(event['payload']))
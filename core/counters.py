@@ -0,0 +1,75 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import Counter, Post, Project, Task, User
+
+COUNTED = {
+    "projects": Project,
+    "tasks": Task,
+    "posts": Post,
+    "users": User,
+}
+
+# The snapshot is cached next to a version. A committed bump writes a new
+# version, so a snapshot read before the bump but stored after it is never
+# served. Only other workers sharing the cache see that version, so without
+# settings.CACHE_SHARED the rows are read every time.
+CACHE_KEY = "core:counters"
+VERSION_KEY = "core:counters:v"
+CACHE_TIMEOUT = 5 * 60
+
+
+def _invalidate():
+    cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+def bump(name, delta=1):
+    """Adjust a counter in the current transaction; seeds it on first use."""
+    updated = Counter.objects.filter(name=name).update(value=F("value") + delta)
+    if not updated:
+        try:
+            with transaction.atomic():
+                # The changed row is already visible here, so a fresh count is exact.
+                Counter.objects.create(name=name, value=COUNTED[name].objects.count())
+        except IntegrityError:
+            Counter.objects.filter(name=name).update(value=F("value") + delta)
+    transaction.on_commit(_invalidate)
+
+
+def reconcile(names=None):
+    """Recount from the source tables and overwrite any drifted values."""
+    values = {}
+    for name in names or COUNTED:
+        values[name] = COUNTED[name].objects.count()
+        Counter.objects.update_or_create(name=name, defaults={"value": values[name]})
+    transaction.on_commit(_invalidate)
+    return values
+
+
+def _read():
+    values = dict(Counter.objects.filter(name__in=COUNTED).values_list("name", "value"))
+    missing = [name for name in COUNTED if name not in values]
+    if missing:
+        values.update(reconcile(missing))
+    return values
+
+
+def snapshot():
+    """All counters as a dict, served from the cache when possible."""
+    if not getattr(settings, "CACHE_SHARED", True):
+        return _read()
+    found = cache.get_many([CACHE_KEY, VERSION_KEY])
+    version, entry = found.get(VERSION_KEY), found.get(CACHE_KEY)
+    if entry is not None and version is not None and entry[0] == version:
+        return entry[1]
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(VERSION_KEY, version, None):
+            version = cache.get(VERSION_KEY, version)
+    values = _read()
+    cache.set(CACHE_KEY, (version, values), CACHE_TIMEOUT)
+    return values
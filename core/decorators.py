@@ -1,7 +1,41 @@
+from functools import wraps
+
 from django.contrib.auth.decorators import user_passes_test
+from django.contrib.messages import get_messages
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from . import versions
 
 def admin_required(view_func):
     return user_passes_test(lambda u: u.is_authenticated and u.role == 'Admin')(view_func)
 
 def manager_or_admin_required(view_func):
     return user_passes_test(lambda u: u.is_authenticated and u.role in ['Admin', 'Manager'])(view_func)
+
+def versioned(*resources):
+    """Answer conditional GETs with 304 while ``resources`` are unchanged.
+
+    ETag/Last-Modified come from core.versions stamps, so a current client
+    costs one small stamp query instead of a render. Place below the login decorators.
+    """
+    def stamps(request):
+        if not hasattr(request, '_version_stamps'):
+            # Pending flash messages are only shown by a full render.
+            pending = len(get_messages(request))
+            request._version_stamps = None if pending else versions.get(*resources)
+        return request._version_stamps
+
+    def etag_func(request, *args, **kwargs):
+        current = stamps(request)
+        return versions.etag(current, request) if current else None
+
+    def last_modified_func(request, *args, **kwargs):
+        current = stamps(request)
+        return versions.last_modified(current, request.user) if current else None
+
+    def decorator(view_func):
+        view = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view_func)
+        # Per-user pages: shared caches may store them only to revalidate.
+        return wraps(view_func)(cache_control(private=True, no_cache=True)(view))
+    return decorator
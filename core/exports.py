@@ -0,0 +1,176 @@
+import csv
+import json
+import zlib
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+from .filters import PostFilter, ProjectFilter, TaskFilter
+from .models import Post, Project, Task
+
+# Rows fetched per database round trip while streaming.
+CHUNK_SIZE = 2000
+
+# Output is handed to the server in blocks of about this many bytes.
+BLOCK_SIZE = 64 * 1024
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(header, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def json_array_lines(header, rows):
+    yield "["
+    for i, row in enumerate(rows):
+        yield ("," if i else "") + json.dumps(dict(zip(header, row)), cls=DjangoJSONEncoder)
+    yield "]"
+
+
+def ndjson_lines(header, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(header, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+FORMATS = {
+    "csv": (csv_lines, "text/csv"),
+    "json": (json_array_lines, "application/json"),
+    "ndjson": (ndjson_lines, "application/x-ndjson"),
+}
+
+
+def _blocks(lines):
+    """Join small lines into BLOCK_SIZE byte strings; the first goes out at once."""
+    buffer, size, first = [], 0, True
+    for line in lines:
+        data = line.encode()
+        buffer.append(data)
+        size += len(data)
+        if first or size >= BLOCK_SIZE:
+            yield b"".join(buffer)
+            buffer, size, first = [], 0, False
+    if buffer:
+        yield b"".join(buffer)
+
+
+def _gzipped(blocks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for block in blocks:
+        data = compressor.compress(block)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def render(fmt, header, rows, compress=False):
+    """Encode ``rows`` as ``fmt``, yielding bytes blocks (gzip if ``compress``)."""
+    lines, _ = FORMATS[fmt]
+    blocks = _blocks(lines(header, rows))
+    return _gzipped(blocks) if compress else blocks
+
+
+def streaming_export(fmt, filename, header, rows, compress=False):
+    """Stream ``rows`` (an iterable of tuples) as an attachment.
+
+    ``rows`` should be lazy (e.g. ``values_list(...).iterator()``) so memory
+    stays flat and the first bytes go out before the query finishes.
+    """
+    _, content_type = FORMATS[fmt]
+    filename = f"{filename}.{fmt}"
+    if compress:
+        content_type, filename = "application/gzip", filename + ".gz"
+    response = StreamingHttpResponse(render(fmt, header, rows, compress), content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+# --- datasets: name -> (model, filterset, [(column, lookup), ...]) ---
+DATASETS = {
+    "projects": (
+        Project,
+        ProjectFilter,
+        [
+            ("id", "id"),
+            ("name", "name"),
+            ("owner_id", "owner_id"),
+            ("owner", "owner__username"),
+            ("created_at", "created_at"),
+            ("updated_at", "updated_at"),
+        ],
+    ),
+    "tasks": (
+        Task,
+        TaskFilter,
+        [
+            ("id", "id"),
+            ("project_id", "project_id"),
+            ("project", "project__name"),
+            ("title", "title"),
+            ("description", "description"),
+            ("completed", "completed"),
+            ("assignee_id", "assignee_id"),
+            ("assignee", "assignee__username"),
+            ("created_at", "created_at"),
+            ("updated_at", "updated_at"),
+            ("completed_at", "completed_at"),
+        ],
+    ),
+    "posts": (
+        Post,
+        PostFilter,
+        [
+            ("id", "id"),
+            ("title", "title"),
+            ("content", "content"),
+            ("owner_id", "owner_id"),
+            ("owner", "owner__username"),
+            ("like_count", "like_count"),
+            ("created_at", "created_at"),
+            ("updated_at", "updated_at"),
+        ],
+    ),
+}
+
+
+def _with_tags(rows, chunk_size):
+    """Append a comma-separated tag column, one through-table query per chunk."""
+    PostTag = Post.tags.through
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        names = {}
+        links = PostTag.objects.filter(post_id__in=[row[0] for row in chunk]).order_by("tag__name")
+        for post_id, name in links.values_list("post_id", "tag__name"):
+            names.setdefault(post_id, []).append(name)
+        for row in chunk:
+            yield row + (",".join(names.get(row[0], ())),)
+
+
+def dataset_rows(name, params=None, chunk_size=CHUNK_SIZE):
+    """(header, lazy rows) for a dataset, filtered like the matching API list.
+
+    Raises ValidationError for filters the dataset's FilterSet rejects.
+    """
+    model, filterset_class, columns = DATASETS[name]
+    filterset = filterset_class(params or {}, queryset=model.objects.order_by("id"))
+    if not filterset.is_valid():
+        raise ValidationError(dict(filterset.errors))
+    header = [column for column, _ in columns]
+    rows = filterset.qs.values_list(*(lookup for _, lookup in columns)).iterator(chunk_size=chunk_size)
+    if model is Post:
+        header.append("tags")
+        rows = _with_tags(rows, chunk_size)
+    return header, rows
@@ -0,0 +1,126 @@
+import asyncio
+import hashlib
+import json
+import threading
+from contextlib import contextmanager
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+from . import history
+
+_local = threading.local()
+_stats_lock = threading.Lock()
+_stats = {"queued": 0, "delivered": 0, "failed": 0, "flushes": 0}
+
+
+def _bump(**deltas):
+    with _stats_lock:
+        for key, value in deltas.items():
+            _stats[key] += value
+
+
+def stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def layer_stats():
+    """Counters of the configured channel layer, when it keeps any (see core.channel_layers)."""
+    try:
+        layer = get_channel_layer()
+    except Exception:
+        return None
+    return layer.stats() if hasattr(layer, "stats") else None
+
+
+def _pending():
+    if not hasattr(_local, "pending"):
+        _local.pending = []
+        _local.seen = set()
+        _local.depth = 0
+    return _local.pending
+
+
+def push(user_id, payload):
+    """Queue a WebSocket notification for ``user_{user_id}``.
+
+    Nothing is sent until the surrounding transaction commits. Inside a
+    `batch()` scope (one per request, see NotificationBatchMiddleware) the
+    committed messages are held and published together when the scope ends.
+    """
+    if not user_id:
+        return
+    transaction.on_commit(lambda: _committed(user_id, payload))
+
+
+def _payload_key(payload):
+    serialized = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha1(serialized.encode("utf-8")).hexdigest()
+
+
+def _committed(user_id, payload):
+    pending = _pending()
+    # Equal payloads pushed twice to one user (owner == assignee) are sent once.
+    key = (user_id, _payload_key(payload))
+    if key not in _local.seen:
+        _local.seen.add(key)
+        pending.append((user_id, payload))
+        _bump(queued=1)
+    if not _local.depth:
+        flush()
+
+
+@contextmanager
+def batch():
+    _pending()
+    _local.depth += 1
+    try:
+        yield
+    finally:
+        _local.depth -= 1
+        if not _local.depth:
+            flush()
+
+
+def flush():
+    pending = _pending()
+    if not pending:
+        return
+    messages = list(pending)
+    pending.clear()
+    _local.seen.clear()
+    _bump(flushes=1)
+    try:
+        # Logged before sending so a client that is offline now can replay it.
+        messages = history.record(messages)
+    except Exception:
+        # A cache outage costs the replay, not the live notification.
+        pass
+    try:
+        layer = get_channel_layer()
+    except Exception:
+        layer = None
+    if not layer:
+        _bump(failed=len(messages))
+        return
+    try:
+        results = async_to_sync(_send_all)(layer, messages)
+    except Exception:
+        _bump(failed=len(messages))
+        return
+    failures = sum(1 for r in results if isinstance(r, BaseException))
+    _bump(delivered=len(messages) - failures, failed=failures)
+
+
+async def _send_all(layer, messages):
+    # One event loop hop for the whole batch; group sends run concurrently
+    # so channels_redis pipelines them over its connection pool.
+    return await asyncio.gather(
+        *(
+            layer.group_send(f"user_{user_id}", {"type": "notify", "payload": payload})
+            for user_id, payload in messages
+        ),
+        return_exceptions=True,
+    )
@@ -0,0 +1,33 @@
+import django_filters
+
+from .models import Post, Project, Task
+
+
+class ProjectFilter(django_filters.FilterSet):
+    name = django_filters.CharFilter(lookup_expr='icontains')
+    created_after = django_filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='gte')
+    created_before = django_filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='lt')
+
+    class Meta:
+        model = Project
+        fields = ['owner', 'name']
+
+
+class TaskFilter(django_filters.FilterSet):
+    unassigned = django_filters.BooleanFilter(field_name='assignee', lookup_expr='isnull')
+    created_after = django_filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='gte')
+    created_before = django_filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='lt')
+
+    class Meta:
+        model = Task
+        fields = ['project', 'completed', 'assignee']
+
+
+class PostFilter(django_filters.FilterSet):
+    tag = django_filters.CharFilter(field_name='tags__name')
+    created_after = django_filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='gte')
+    created_before = django_filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='lt')
+
+    class Meta:
+        model = Post
+        fields = ['owner', 'tag']
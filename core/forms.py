@@ -1,6 +1,7 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
-from .models import User, Project, Task, Post, Tag
+from . import imports, tags
+from .models import User, Project, Task, Post
 
 
 
@@ -82,21 +83,23 @@ class PostForm(forms.ModelForm):
 
     def save(self, commit=True):
         instance = super().save(commit=False)
-        tags_str = self.cleaned_data.get('tags', '')
-        tag_names = [t.strip() for t in tags_str.split(',') if t.strip()]
+        tag_names = tags.normalize(self.cleaned_data.get('tags', ''))
+
+        def save_tags():
+            tags.set_post_tags(instance, tag_names)
 
         if commit:
             instance.save()
-            instance.tags.clear()
-            for name in tag_names:
-                tag_obj, created = Tag.objects.get_or_create(name=name)
-                instance.tags.add(tag_obj)
+            save_tags()
+        else:
+            self.save_m2m = save_tags
         return instance
 
 class ProfileForm(forms.ModelForm):
     class Meta:
         model = User
-        fields = ["username", "email"]
+        fields = ["username", "email", "notification_mode"]
+        labels = {"notification_mode": "Email notifications"}
         widgets = {
             "username": forms.TextInput(
                 attrs={"class": "form-control", "placeholder": "Username"}
@@ -104,4 +107,32 @@ class ProfileForm(forms.ModelForm):
             "email": forms.EmailInput(
                 attrs={"class": "form-control", "placeholder": "Email"}
             ),
-        }
\ No newline at end of file
+            "notification_mode": forms.Select(attrs={"class": "form-select"}),
+        }
+
+# --- Import Form ---
+class ImportForm(forms.Form):
+    dataset = forms.ChoiceField(
+        choices=[("users", "Users"), ("projects", "Projects"), ("tasks", "Tasks")],
+        widget=forms.Select(attrs={"class": "form-select"}),
+    )
+    file = forms.FileField(widget=forms.ClearableFileInput(attrs={"class": "form-control"}))
+    format = forms.ChoiceField(
+        choices=[("", "From file name"), ("csv", "CSV"), ("json", "JSON"), ("ndjson", "NDJSON")],
+        required=False,
+        widget=forms.Select(attrs={"class": "form-select"}),
+    )
+    dry_run = forms.BooleanField(
+        required=False,
+        label="Validate only",
+        widget=forms.CheckboxInput(attrs={"class": "form-check-input"}),
+    )
+
+    def clean(self):
+        cleaned = super().clean()
+        upload = cleaned.get("file")
+        if upload and not cleaned.get("format"):
+            cleaned["format"] = imports.guess_format(upload.name)
+            if not cleaned["format"]:
+                self.add_error("format", "Cannot tell the format from the file name; pick one.")
+        return cleaned
@@ -0,0 +1,110 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+# Every card key embeds the object's version and its kind's generation:
+# invalidating writes a new token, so stale entries are simply never read
+# again and age out.
+VERSION_KEY = "frag:v:{}:{}"
+GENERATION_KEY = "frag:g:{}"
+FRAGMENT_KEY = "frag:{name}:{kind}:{pk}:{version}:{generation}:{variant}"
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "stores": 0, "invalidations": 0}
+
+
+def _bump(**deltas):
+    with _stats_lock:
+        for key, value in deltas.items():
+            _stats[key] += value
+
+
+def stats():
+    with _stats_lock:
+        values = dict(_stats)
+    lookups = values["hits"] + values["misses"]
+    values["hit_rate"] = round(values["hits"] / lookups, 3) if lookups else None
+    return values
+
+
+def _cache():
+    return caches["fragments"]
+
+
+def enabled():
+    """Cards are only cached where every worker sees the same invalidations."""
+    return getattr(settings, "CACHE_SHARED", True)
+
+
+def _timeout():
+    return getattr(settings, "FRAGMENT_CACHE_TIMEOUT", 3600)
+
+
+def _token():
+    return time.time_ns()
+
+
+def _replace(keys):
+    if keys:
+        _cache().set_many({key: _token() for key in keys}, None)
+        _bump(invalidations=len(keys))
+
+
+def invalidate(kind, *ids):
+    """Retire the cached cards of ``kind`` objects once the transaction commits."""
+    keys = [VERSION_KEY.format(kind, pk) for pk in ids if pk is not None]
+    transaction.on_commit(lambda: _replace(keys))
+
+
+def invalidate_kind(*kinds):
+    """Retire every cached card of ``kinds`` (e.g. after a username change)."""
+    keys = [GENERATION_KEY.format(kind) for kind in kinds]
+    transaction.on_commit(lambda: _replace(keys))
+
+
+def _tokens(keys):
+    cache = _cache()
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # First sighting (or evicted): start a fresh token, keeping one a
+            # concurrent request may have just written.
+            token = _token()
+            found[key] = token if cache.add(key, token, None) else cache.get(key, token)
+    return found
+
+
+def lookup(name, objects, variant):
+    """Return {pk: (key, html or None)} for ``objects`` in two cache round trips.
+
+    ``variant(obj)`` names the viewer-dependent flavour of a card.
+    """
+    objects = [obj for obj in objects if obj.pk is not None]
+    if not objects:
+        return {}
+    kind = objects[0]._meta.model_name
+    generation_key = GENERATION_KEY.format(kind)
+    tokens = _tokens([generation_key, *(VERSION_KEY.format(kind, obj.pk) for obj in objects)])
+    keys = {
+        obj.pk: FRAGMENT_KEY.format(
+            name=name,
+            kind=kind,
+            pk=obj.pk,
+            version=tokens[VERSION_KEY.format(kind, obj.pk)],
+            generation=tokens[generation_key],
+            variant=variant(obj),
+        )
+        for obj in objects
+    }
+    found = _cache().get_many(list(keys.values()))
+    hits = sum(1 for key in keys.values() if key in found)
+    _bump(hits=hits, misses=len(keys) - hits)
+    return {pk: (key, found.get(key)) for pk, key in keys.items()}
+
+
+def store(key, html):
+    _cache().set(key, html, _timeout())
+    _bump(stores=1)
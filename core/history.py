@@ -0,0 +1,80 @@
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Per user: a sequence counter and a ring of NOTIFICATION_HISTORY_SIZE slots.
+# Slot seq % size holds (seq, payload), so writers never read-modify-write a
+# shared list and an overwritten slot is detected by its stale seq. Workers
+# must agree on the counter, so without a shared cache (settings.CACHE_SHARED)
+# events go out unnumbered and nothing is replayed.
+SEQUENCE_KEY = "notify:seq:{}"
+SLOT_KEY = "notify:log:{}:{}"
+
+
+def enabled():
+    return getattr(settings, "CACHE_SHARED", True)
+
+
+def _size():
+    return getattr(settings, "NOTIFICATION_HISTORY_SIZE", 50)
+
+
+def _timeout():
+    return getattr(settings, "NOTIFICATION_HISTORY_TIMEOUT", 24 * 60 * 60)
+
+
+def _reserve(user_id, count):
+    """Claim ``count`` sequence numbers for ``user_id``; returns the last one."""
+    key = SEQUENCE_KEY.format(user_id)
+    try:
+        return cache.incr(key, count)
+    except ValueError:
+        cache.add(key, 0, None)
+        return cache.incr(key, count)
+
+
+def record(messages):
+    """Number and store [(user_id, payload)]; returns them with ``seq`` set.
+
+    Sequence numbers are reserved once per user per batch. Without a
+    shared cache the messages are returned as they are.
+    """
+    if not enabled():
+        return messages
+    counts = Counter(user_id for user_id, _ in messages)
+    next_seq = {user_id: _reserve(user_id, count) - count + 1 for user_id, count in counts.items()}
+    size = _size()
+    numbered, slots = [], {}
+    for user_id, payload in messages:
+        seq = next_seq[user_id]
+        next_seq[user_id] += 1
+        payload = {**payload, "seq": seq}
+        slots[SLOT_KEY.format(user_id, seq % size)] = (seq, payload)
+        numbered.append((user_id, payload))
+    cache.set_many(slots, _timeout())
+    return numbered
+
+
+def since(user_id, after=None):
+    """Return (current seq, payloads after ``after``).
+
+    The payload list is None when the gap can no longer be replayed (it is
+    larger than the ring, a slot expired or was overwritten, or the counter
+    was reset) and the client has to reload instead.
+    """
+    current = cache.get(SEQUENCE_KEY.format(user_id), 0)
+    if after is None or after == current:
+        return current, []
+    if after > current or current - after > _size():
+        return current, None
+    size = _size()
+    keys = [SLOT_KEY.format(user_id, seq % size) for seq in range(after + 1, current + 1)]
+    found = cache.get_many(keys)
+    entries = [found.get(key) for key in keys]
+    while entries and (entries[-1] is None or entries[-1][0] < after + len(entries)):
+        # Reserved by a writer that has not stored them yet; they arrive live.
+        entries.pop()
+    if any(entry is None or entry[0] != seq for seq, entry in zip(range(after + 1, current + 1), entries)):
+        return current, None
+    return current, [payload for _, payload in entries]
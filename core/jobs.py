@@ -0,0 +1,271 @@
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from . import bulk, fanout, imports, related, search, snapshots
+from .models import Job, Project, Task, User
+
+# kind -> callable(context, **params) returning a JSON-serialisable result.
+HANDLERS = {}
+
+
+class Cancelled(Exception):
+    """Raised inside a handler once its job was asked to stop."""
+
+
+def handler(kind):
+    def register(func):
+        HANDLERS[kind] = func
+        return func
+    return register
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def event(job):
+    return {
+        "kind": "job",
+        "event": job.status,
+        "job_id": job.id,
+        "job_kind": job.kind,
+        "progress": job.progress,
+        "total": job.total,
+        "message": job.message,
+    }
+
+
+def _publish(job):
+    if job.user_id:
+        fanout.push(job.user_id, event(job))
+
+
+def enqueue(kind, user=None, **params):
+    """Queue ``kind`` for `manage.py runjobs`; ``params`` must be JSON-serialisable.
+
+    Returns the already queued or running job for the same kind and
+    params instead of queueing it twice.
+    """
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind {kind!r}.")
+    pending = Job.objects.filter(kind=kind, params=params, status__in=(Job.STATUS_QUEUED, Job.STATUS_RUNNING))
+    existing = pending.order_by("id").first()
+    if existing is not None:
+        return existing
+    job = Job.objects.create(kind=kind, params=params, user=user)
+    _publish(job)
+    return job
+
+
+def cancel(job):
+    """Cancel a queued job now, or ask a running one to stop at its next progress report."""
+    now = timezone.now()
+    if Job.objects.filter(id=job.id, status=Job.STATUS_QUEUED).update(status=Job.STATUS_CANCELLED, finished_at=now):
+        job.refresh_from_db()
+        _publish(job)
+        return True
+    return bool(Job.objects.filter(id=job.id, status=Job.STATUS_RUNNING).update(cancel_requested=True))
+
+
+class Context:
+    """Handed to a handler: report progress and honour cancellation."""
+
+    def __init__(self, job):
+        self.job = job
+        self._reported = 0.0
+
+    def progress(self, done, total=None, message="", force=False):
+        """Record progress; raises Cancelled if the job was cancelled.
+
+        Writes (and pushes) at most every JOB_PROGRESS_INTERVAL seconds.
+        """
+        job = self.job
+        job.progress = done
+        if total is not None:
+            job.total = total
+        if message:
+            job.message = message[:255]
+        now = time.monotonic()
+        if not force and now - self._reported < _setting("JOB_PROGRESS_INTERVAL", 1.0):
+            return
+        self._reported = now
+        job.heartbeat_at = timezone.now()
+        Job.objects.filter(id=job.id).update(
+            progress=job.progress, total=job.total, message=job.message, heartbeat_at=job.heartbeat_at
+        )
+        self.check()
+        _publish(job)
+
+    def check(self):
+        if Job.objects.filter(id=self.job.id, cancel_requested=True).exists():
+            raise Cancelled()
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim(worker=None):
+    """Take the oldest queued job, or None.
+
+    A conditional UPDATE decides the race between workers, so this needs
+    no row locks and behaves the same on every database.
+    """
+    worker = worker or worker_name()
+    for job_id in Job.objects.filter(status=Job.STATUS_QUEUED).order_by("id").values_list("id", flat=True)[:10]:
+        now = timezone.now()
+        claimed = Job.objects.filter(id=job_id, status=Job.STATUS_QUEUED).update(
+            status=Job.STATUS_RUNNING, worker=worker, started_at=now, heartbeat_at=now
+        )
+        if claimed:
+            return Job.objects.get(id=job_id)
+    return None
+
+
+class Heartbeat(threading.Thread):
+    """Refresh ``heartbeat_at`` while a job runs, whether or not its handler reports progress."""
+
+    def __init__(self, job, interval=None):
+        super().__init__(name=f"job-{job.id}-heartbeat", daemon=True)
+        self.job = job
+        self.interval = interval or _setting("JOB_HEARTBEAT_INTERVAL", 30)
+        self.stopped = threading.Event()
+
+    def beat(self):
+        Job.objects.filter(id=self.job.id, status=Job.STATUS_RUNNING, worker=self.job.worker).update(
+            heartbeat_at=timezone.now()
+        )
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                self.beat()
+        finally:
+            # This thread's own connection.
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def _finish(job, status, **fields):
+    """Record the outcome unless the job stopped being ours (e.g. fail_stale() took it)."""
+    job.status = status
+    job.finished_at = timezone.now()
+    for name, value in fields.items():
+        setattr(job, name, value)
+    names = {"status", "finished_at", "progress", "total", "message", *fields}
+    finished = Job.objects.filter(id=job.id, status=Job.STATUS_RUNNING, worker=job.worker).update(
+        **{name: getattr(job, name) for name in names}
+    )
+    if not finished:
+        job.refresh_from_db()
+        return
+    _publish(job)
+
+
+def run(job):
+    """Run a claimed job to completion and record the outcome."""
+    context = Context(job)
+    _publish(job)
+    heartbeat = Heartbeat(job)
+    heartbeat.start()
+    try:
+        context.check()
+        result = HANDLERS[job.kind](context, **job.params)
+    except Cancelled:
+        _finish(job, Job.STATUS_CANCELLED, message="Cancelled")
+    except Exception as e:
+        _finish(job, Job.STATUS_FAILED, error=traceback.format_exc()[-4000:], message=str(e)[:255] or type(e).__name__)
+    else:
+        _finish(job, Job.STATUS_SUCCEEDED, result=result)
+    finally:
+        heartbeat.stop()
+    return job
+
+
+def fail_stale(timeout=None):
+    """Fail running jobs whose worker stopped its heartbeat (it crashed or was killed)."""
+    timeout = timeout or _setting("JOB_STALE_SECONDS", 600)
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    return Job.objects.filter(status=Job.STATUS_RUNNING, heartbeat_at__lt=cutoff).update(
+        status=Job.STATUS_FAILED, finished_at=timezone.now(), message="Worker stopped responding"
+    )
+
+
+def work(stop=lambda: False, interval=1.0, once=False):
+    """Claim and run jobs until ``stop()`` is true (or the queue is empty, with ``once``)."""
+    worker = worker_name()
+    while not stop():
+        close_old_connections()
+        job = claim(worker)
+        if job is None:
+            if once:
+                return
+            fail_stale()
+            time.sleep(interval)
+            continue
+        # No fanout.batch() here: progress events must go out as they happen.
+        with related.scope():
+            run(job)
+
+
+# --- handlers ---
+@handler("delete_project")
+def _delete_project(context, project_id):
+    project = Project.objects.filter(id=project_id).first()
+    if project is None:
+        return {"deleted": 0}
+    total = Task.objects.filter(project_id=project_id).count()
+    context.progress(0, total, f"Deleting {project.name}", force=True)
+    deleted = bulk.delete_project(project, progress=lambda done: context.progress(done, total))
+    return {"deleted": deleted}
+
+
+@handler("delete_user")
+def _delete_user(context, user_id):
+    target = User.objects.filter(id=user_id).first()
+    if target is None:
+        return {"deleted": 0}
+    total = Task.objects.filter(project__owner_id=user_id).count()
+    context.progress(0, total, f"Deleting {target.username}", force=True)
+    deleted = bulk.delete_user(target, progress=lambda done: context.progress(done, total))
+    return {"deleted": deleted}
+
+
+@handler("import")
+def _import(context, dataset, path, fmt, dry_run=False):
+    try:
+        with default_storage.open(path, "rb") as stream:
+            return imports.run(
+                dataset, stream, fmt, dry_run=dry_run, user=context.job.user,
+                progress=lambda rows: context.progress(rows, message=f"{rows} rows read"),
+            )
+    finally:
+        default_storage.delete(path)
+
+
+@handler("rebuild_search_index")
+def _rebuild_search_index(context, kinds=None):
+    kinds = kinds or search.KINDS
+    totals = {}
+    for done, kind in enumerate(kinds):
+        context.progress(done, len(kinds), f"Indexing {kind}s", force=True)
+        totals.update(search.rebuild([kind]))
+    context.progress(len(kinds), len(kinds), force=True)
+    return totals
+
+
+@handler("backfill_snapshots")
+def _backfill_snapshots(context, since=None):
+    return {"written": snapshots.backfill(since=date.fromisoformat(since) if since else None)}
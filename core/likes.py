@@ -0,0 +1,95 @@
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import fragments, snapshots, versions
+from .models import Post, PostLike as Like
+
+
+def _find(post_id, user_id):
+    return Like.objects.filter(post_id=post_id, user_id=user_id).values_list('pk', 'created_at').first()
+
+
+def toggle_like(post_id, user_id):
+    """Like or unlike a post without loading its liked_by set.
+
+    Returns ``(liked, like_count)`` after the toggle.
+    """
+    with transaction.atomic():
+        existing = _find(post_id, user_id)
+        changed = True
+        liked_on = None
+        if existing:
+            liked = False
+            deleted, _ = Like.objects.filter(pk=existing[0]).delete()
+            if deleted:
+                Post.objects.filter(pk=post_id).update(like_count=F('like_count') - 1)
+                liked_on = existing[1]
+            else:
+                # A concurrent request already removed this like.
+                changed = False
+        else:
+            liked = True
+            try:
+                with transaction.atomic():
+                    Like.objects.create(post_id=post_id, user_id=user_id)
+            except IntegrityError:
+                # A concurrent request already recorded this like.
+                changed = False
+            else:
+                Post.objects.filter(pk=post_id).update(like_count=F('like_count') + 1)
+        like_count, owner_id = Post.objects.filter(pk=post_id).values_list('like_count', 'owner_id').first() or (0, None)
+        if changed:
+            if liked:
+                snapshots.record_like(owner_id, 1)
+            elif liked_on is not None:
+                # Taken back from the day the like was counted on; likes
+                # from before PostLike kept a date are left as counted.
+                snapshots.record_like(owner_id, -1, day=timezone.localdate(liked_on))
+            versions.bump('posts')
+            fragments.invalidate('post', post_id)
+    return liked, like_count
+
+
+def take_back_likes(user_id):
+    """Undo ``user_id``'s likes ahead of deleting the account (and its likes by cascade).
+
+    Returns the ids of the posts whose like_count went down.
+    """
+    likes = list(
+        Like.objects.filter(user_id=user_id)
+        .exclude(post__owner_id=user_id)  # their own posts go with them
+        .values_list('post_id', 'post__owner_id', 'created_at')
+    )
+    if not likes:
+        return []
+    post_ids = sorted({post_id for post_id, _, _ in likes})
+    # One like per (post, user), so each post loses exactly one.
+    Post.objects.filter(pk__in=post_ids).update(like_count=F('like_count') - 1)
+    per_day = Counter(
+        (owner_id, timezone.localdate(created_at) if created_at else None) for _, owner_id, created_at in likes
+    )
+    for (owner_id, day), n in per_day.items():
+        if day is not None:
+            snapshots.record_like(owner_id, -n, day=day)
+    versions.bump('posts')
+    fragments.invalidate('post', *post_ids)
+    return post_ids
+
+
+def reconcile_like_counts():
+    """Rewrite like_count wherever it disagrees with liked_by. Returns rows fixed."""
+    actual = Coalesce(
+        Subquery(
+            Like.objects.filter(post_id=OuterRef('pk'))
+            .order_by()
+            .values('post_id')
+            .annotate(n=Count('*'))
+            .values('n')
+        ),
+        Value(0),
+    )
+    return Post.objects.annotate(actual=actual).exclude(like_count=F('actual')).update(like_count=actual)
@@ -0,0 +1,22 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import snapshots
+
+
+class Command(BaseCommand):
+    help = "Rebuild daily report snapshots from the Task and Post tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="Only rebuild days from this date (YYYY-MM-DD).")
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            try:
+                since = date.fromisoformat(options["since"])
+            except ValueError:
+                raise CommandError("--since must be a date in YYYY-MM-DD format.")
+        written = snapshots.backfill(since=since)
+        self.stdout.write(f"Wrote {written} snapshot row(s).")
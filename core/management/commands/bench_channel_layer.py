@@ -0,0 +1,99 @@
+import asyncio
+import time
+
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.channel_layers import LocalChannelLayer
+
+
+def _layers(names):
+    for name in names:
+        if name == "memory":
+            yield name, lambda: LocalChannelLayer(capacity=settings.CHANNEL_CAPACITY)
+        elif name == "redis":
+            try:
+                from channels_redis.core import RedisChannelLayer
+            except ImportError:
+                yield name, None
+                continue
+            hosts = [(settings.REDIS_HOST, settings.REDIS_PORT)]
+            yield name, lambda: RedisChannelLayer(hosts=hosts, capacity=settings.CHANNEL_CAPACITY)
+        else:
+            yield name, get_channel_layer
+
+
+async def _fanout(layer, groups, members, messages):
+    """Send ``messages`` group messages round-robin and drain every member.
+
+    Returns (send seconds, total seconds, deliveries).
+    """
+    channels = {}
+    for g in range(groups):
+        group = f"user_{g}"
+        channels[group] = [await layer.new_channel() for _ in range(members)]
+        for channel in channels[group]:
+            await layer.group_add(group, channel)
+    # Receivers are already waiting, as connected consumers would be.
+    per_group = {group: messages // groups + (1 if i < messages % groups else 0) for i, group in enumerate(channels)}
+
+    async def drain(channel, count):
+        for _ in range(count):
+            await layer.receive(channel)
+
+    receivers = [
+        asyncio.ensure_future(drain(channel, per_group[group]))
+        for group, members_of in channels.items()
+        for channel in members_of
+    ]
+    await asyncio.sleep(0)
+    payload = {"type": "notify", "payload": {"kind": "task", "event": "updated", "task_id": 1, "title": "x" * 40}}
+    started = time.perf_counter()
+    names = list(channels)
+    for i in range(messages):
+        await layer.group_send(names[i % groups], payload)
+        if i % groups == groups - 1:
+            # Let receivers run once per round so no channel hits its capacity.
+            await asyncio.sleep(0)
+    sent = time.perf_counter() - started
+    await asyncio.gather(*receivers)
+    total = time.perf_counter() - started
+    for group, members_of in channels.items():
+        for channel in members_of:
+            await layer.group_discard(group, channel)
+    return sent, total, messages * members
+
+
+class Command(BaseCommand):
+    help = "Measure group fan-out throughput of the in-memory and Redis channel layers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--layer", action="append", choices=("memory", "redis", "configured"),
+                            help="Repeatable; defaults to memory and redis.")
+        parser.add_argument("--groups", type=int, default=100, help="Groups (users) to fan out to.")
+        parser.add_argument("--members", type=int, default=2, help="Connections per group.")
+        parser.add_argument("--messages", type=int, default=5000, help="group_send() calls in total.")
+
+    def handle(self, *args, **options):
+        if options["groups"] < 1 or options["members"] < 1 or options["messages"] < 1:
+            raise CommandError("--groups, --members and --messages must be positive.")
+        for name, factory in _layers(options["layer"] or ["memory", "redis"]):
+            if factory is None:
+                self.stdout.write(f"{name}: skipped (channels_redis is not installed)")
+                continue
+            layer = factory()
+            try:
+                sent, total, deliveries = asyncio.run(
+                    _fanout(layer, options["groups"], options["members"], options["messages"])
+                )
+            except (OSError, ConnectionError) as e:
+                self.stdout.write(f"{name}: skipped ({e})")
+                continue
+            self.stdout.write(
+                f"{name}: {options['messages']} group sends in {sent:.3f}s "
+                f"({options['messages'] / sent:,.0f}/s), {deliveries} deliveries in {total:.3f}s "
+                f"({deliveries / total:,.0f}/s)"
+            )
+            if hasattr(layer, "stats"):
+                self.stdout.write(f"  {layer.stats()}")
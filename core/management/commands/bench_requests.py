@@ -0,0 +1,78 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from core.models import Project, User
+
+ENGINES = settings.SESSION_ENGINES
+STORAGES = settings.MESSAGE_STORAGES
+
+
+def _steps(target, project):
+    """(label, method, url) for a signed-in admin's typical clicks."""
+    return [
+        ("dashboard", "get", reverse("dashboard")),
+        ("projects", "get", reverse("project_list")),
+        ("tasks", "get", reverse("task_list", args=[project.id])),
+        ("posts", "get", reverse("post_list")),
+        ("toggle role", "post", reverse("toggle_user_role", args=[target.id])),
+        ("users (message)", "get", reverse("manage_users")),
+    ]
+
+
+def _measure(steps, rounds):
+    """{label: (queries, session queries, ms)} per request, averaged over ``rounds``."""
+    client = Client()
+    client.force_login(User.objects.get(username="bench-admin"))
+    totals = {label: [0, 0, 0.0] for label, _, _ in steps}
+    for _ in range(rounds):
+        for label, method, url in steps:
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = getattr(client, method)(url)
+                elapsed = time.perf_counter() - started
+            if response.status_code >= 400:
+                raise CommandError(f"{label}: {method.upper()} {url} returned {response.status_code}")
+            totals[label][0] += len(queries)
+            totals[label][1] += sum("django_session" in q["sql"] for q in queries.captured_queries)
+            totals[label][2] += elapsed * 1000
+    return {label: (q / rounds, s / rounds, ms / rounds) for label, (q, s, ms) in totals.items()}
+
+
+class Command(BaseCommand):
+    help = "Count database queries per request for each session engine and message storage."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--engine", action="append", choices=sorted(ENGINES),
+                            help="Repeatable; defaults to every engine.")
+        parser.add_argument("--messages", choices=sorted(STORAGES), default=None,
+                            help="Message storage to use (default: MESSAGE_STORAGE).")
+        parser.add_argument("--rounds", type=int, default=5, help="Times to repeat each request.")
+
+    def handle(self, *args, **options):
+        if options["rounds"] < 1:
+            raise CommandError("--rounds must be positive.")
+        storage = STORAGES[options["messages"]] if options["messages"] else settings.MESSAGE_STORAGE
+        self.stdout.write(f"sessions cache: {settings.SESSION_CACHE_BACKEND}, messages: {storage.rsplit('.', 1)[-1]}")
+        # Everything the benchmark writes is rolled back at the end.
+        with transaction.atomic():
+            admin = User.objects.create_user("bench-admin", "bench-admin@example.com", "x", role="Admin")
+            target = User.objects.create_user("bench-staff", "bench-staff@example.com", "x", role="Staff")
+            project = Project.objects.create(name="Benchmark", owner=admin)
+            steps = _steps(target, project)
+            for name in options["engine"] or list(ENGINES):
+                with override_settings(SESSION_ENGINE=ENGINES[name], MESSAGE_STORAGE=storage,
+                                       ALLOWED_HOSTS=["testserver"]):
+                    results = _measure(steps, options["rounds"])
+                self.stdout.write(f"{name}:")
+                for label, (queries, session, ms) in results.items():
+                    self.stdout.write(f"  {label:<16} {queries:5.1f} queries ({session:.1f} session) {ms:7.1f} ms")
+                total = sum(r[0] for r in results.values())
+                session = sum(r[1] for r in results.values())
+                self.stdout.write(f"  {'total':<16} {total:5.1f} queries ({session:.1f} session)")
+            transaction.set_rollback(True)
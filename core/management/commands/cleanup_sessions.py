@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+# Engines that keep sessions in the django_session table.
+DB_ENGINES = {
+    "django.contrib.sessions.backends.db",
+    "django.contrib.sessions.backends.cached_db",
+}
+
+
+class Command(BaseCommand):
+    help = "Delete expired rows from the django_session table in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rows deleted per statement.")
+        parser.add_argument("--all", action="store_true",
+                            help="Delete every row; only allowed when SESSION_ENGINE does not use the table.")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive.")
+        uses_table = settings.SESSION_ENGINE in DB_ENGINES
+        if options["all"] and uses_table:
+            raise CommandError(f"{settings.SESSION_ENGINE} stores sessions in the table; --all would log everyone out.")
+        # Cache and cookie sessions expire on their own; rows left from an
+        # earlier engine are cleaned up here all the same. Small batches keep
+        # each DELETE short on a large table.
+        rows = Session.objects.all() if options["all"] else Session.objects.filter(expire_date__lt=timezone.now())
+        deleted = 0
+        while True:
+            keys = list(rows.values_list("session_key", flat=True)[: options["batch_size"]])
+            if not keys:
+                break
+            deleted += Session.objects.filter(session_key__in=keys).delete()[0]
+        self.stdout.write(f"Deleted {deleted} session row(s).")
+        if not uses_table:
+            self.stdout.write(f"{settings.SESSION_ENGINE} does not use the table; its sessions expire by themselves.")
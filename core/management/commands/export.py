@@ -0,0 +1,51 @@
+import sys
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+
+from core import exports
+
+
+class Command(BaseCommand):
+    help = "Stream projects, tasks or posts to a file (or stdout) as CSV, JSON or NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=sorted(exports.DATASETS))
+        parser.add_argument("--format", default="csv", choices=sorted(exports.FORMATS))
+        parser.add_argument(
+            "--filter",
+            action="append",
+            default=[],
+            metavar="NAME=VALUE",
+            help="Same filters as the API list endpoint, e.g. completed=true or created_after=2025-01-01.",
+        )
+        parser.add_argument("--gzip", action="store_true", help="Compress the output.")
+        parser.add_argument("-o", "--output", default="-", help="Output path; '-' writes to stdout.")
+        parser.add_argument("--chunk-size", type=int, default=exports.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        params = QueryDict(mutable=True)
+        for item in options["filter"]:
+            name, sep, value = item.partition("=")
+            if not sep:
+                raise CommandError(f"--filter expects NAME=VALUE, got {item!r}.")
+            params.appendlist(name, value)
+        try:
+            header, rows = exports.dataset_rows(options["dataset"], params, options["chunk_size"])
+        except ValidationError as e:
+            raise CommandError(f"Invalid filter: {e.message_dict}")
+
+        blocks = exports.render(options["format"], header, rows, compress=options["gzip"])
+        if options["output"] == "-":
+            out = sys.stdout.buffer
+            for block in blocks:
+                out.write(block)
+            out.flush()
+            return
+        written = 0
+        with open(options["output"], "wb") as out:
+            for block in blocks:
+                out.write(block)
+                written += len(block)
+        self.stderr.write(f"Wrote {written} bytes to {options['output']}.")
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import imports
+
+
+class Command(BaseCommand):
+    help = "Bulk import users, projects or tasks from a CSV, JSON or NDJSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=sorted(imports.IMPORTERS))
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=imports.FORMATS, help="Defaults to the file extension.")
+        parser.add_argument("--dry-run", action="store_true", help="Validate only; write nothing.")
+        parser.add_argument("--chunk-size", type=int, default=imports.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        fmt = options["format"] or imports.guess_format(options["path"])
+        if not fmt:
+            raise CommandError("Cannot tell the format from the file name; pass --format.")
+        try:
+            with open(options["path"], "rb") as stream:
+                result = imports.run(
+                    options["dataset"], stream, fmt, dry_run=options["dry_run"], chunk_size=options["chunk_size"]
+                )
+        except OSError as e:
+            raise CommandError(str(e))
+        except ValueError as e:
+            raise CommandError(f"Could not read {options['path']}: {e}")
+
+        for line, message in result["errors"]:
+            self.stderr.write(f"line {line}: {message}")
+        verb = "Validated" if result["dry_run"] else "Imported"
+        rate = int(result["rows"] / result["seconds"]) if result["seconds"] else result["rows"]
+        self.stdout.write(
+            f"{verb} {result['dataset']}: {result['created']} created, {result['failed']} rejected, "
+            f"{result['rows']} row(s) in {result['seconds']}s ({rate} rows/s)."
+        )
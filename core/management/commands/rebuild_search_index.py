@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from core import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index for posts and tasks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--kind", choices=search.KINDS, action="append", help="Only rebuild this kind (repeatable).")
+
+    def handle(self, *args, **options):
+        totals = search.rebuild(options["kind"] or search.KINDS)
+        for kind, count in totals.items():
+            self.stdout.write(f"Indexed {count} {kind}(s).")
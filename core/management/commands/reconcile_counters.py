@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core import counters
+from core.models import Counter
+
+
+class Command(BaseCommand):
+    help = "Recompute dashboard counters from the source tables to correct drift."
+
+    def handle(self, *args, **options):
+        # The stored rows, not the cached snapshot: drift lives in the table.
+        before = dict(Counter.objects.filter(name__in=counters.COUNTED).values_list("name", "value"))
+        after = counters.reconcile()
+        for name, value in after.items():
+            drift = value - before.get(name, 0)
+            self.stdout.write(f"{name}: {value}" + (f" (corrected by {drift:+d})" if drift else ""))
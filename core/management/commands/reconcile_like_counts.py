@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.likes import reconcile_like_counts
+
+
+class Command(BaseCommand):
+    help = "Recompute Post.like_count from the liked_by table."
+
+    def handle(self, *args, **options):
+        fixed = reconcile_like_counts()
+        self.stdout.write(f"Corrected like_count on {fixed} post(s).")
@@ -0,0 +1,68 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core import jobs
+
+
+def _child(interval):
+    # Under the "spawn" start method the child starts without Django set up.
+    import django
+
+    django.setup()
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *args: stopping.append(True))
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    jobs.work(stop=lambda: bool(stopping), interval=interval)
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (project deletion, imports, index and report rebuilds)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=1, help="Worker processes; each runs one job at a time.")
+        parser.add_argument("--interval", type=float, default=1.0, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument("--once", action="store_true", help="Run what is queued, then exit (single process).")
+
+    def handle(self, *args, **options):
+        if options["workers"] < 1:
+            raise CommandError("--workers must be at least 1.")
+        if options["once"]:
+            jobs.work(interval=options["interval"], once=True)
+            return
+        if options["workers"] == 1:
+            stopping = []
+            signal.signal(signal.SIGTERM, lambda *args: stopping.append(True))
+            self.stdout.write("Running jobs (Ctrl+C to stop).")
+            try:
+                jobs.work(stop=lambda: bool(stopping), interval=options["interval"])
+            except KeyboardInterrupt:
+                pass
+            return
+
+        # Children must not share the parent's database connection.
+        connections.close_all()
+        pool = [
+            multiprocessing.Process(target=_child, args=(options["interval"],), name=f"runjobs-{n}")
+            for n in range(options["workers"])
+        ]
+        for process in pool:
+            process.start()
+        self.stdout.write(f"Running jobs in {len(pool)} processes (Ctrl+C to stop).")
+
+        def stop(*args):
+            # Each child finishes its current job before exiting.
+            for process in pool:
+                if process.is_alive():
+                    process.terminate()
+
+        signal.signal(signal.SIGTERM, stop)
+        try:
+            for process in pool:
+                process.join()
+        except KeyboardInterrupt:
+            stop()
+            for process in pool:
+                process.join()
@@ -0,0 +1,27 @@
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.utils.functional import SimpleLazyObject
+
+from . import fanout, related, usercache
+
+
+class NotificationBatchMiddleware:
+    """Publish all WebSocket notifications produced by a request in one batch.
+
+    Receivers also share their related-row lookups for the request (see
+    core.related).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with fanout.batch(), related.scope():
+            return self.get_response(request)
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware whose request.user comes from core.usercache."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: usercache.get_user(request))
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:58
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_like_count(apps, schema_editor):
+    Post = apps.get_model('core', 'Post')
+    Like = Post.liked_by.through
+    counts = (
+        Like.objects.filter(post_id=OuterRef('pk'))
+        .order_by()
+        .values('post_id')
+        .annotate(n=Count('*'))
+        .values('n')
+    )
+    Post.objects.update(like_count=Coalesce(Subquery(counts), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_like_count, migrations.RunPython.noop),
+    ]
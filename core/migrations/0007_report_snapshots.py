@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_post_feed_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='ReportSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('project', 'Project'), ('user', 'User')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('day', models.DateField()),
+                ('tasks_created', models.IntegerField(default=0)),
+                ('tasks_completed', models.IntegerField(default=0)),
+                ('posts_created', models.IntegerField(default=0)),
+                ('likes', models.IntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['scope', 'day'], name='snapshot_scope_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('scope', 'object_id', 'day'), name='unique_snapshot_per_day')],
+            },
+        ),
+    ]
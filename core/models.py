@@ -1,11 +1,16 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
 
 
 # -------------------------------
 # Custom User Model
 # -------------------------------
 class User(AbstractUser):
+    NOTIFY_IMMEDIATE = 'immediate'
+    NOTIFY_DIGEST = 'digest'
+    NOTIFY_OFF = 'off'
+
     email = models.EmailField(unique=True)
     role = models.CharField(
         max_length=20,
@@ -16,6 +21,15 @@ class User(AbstractUser):
         ],
         default='Staff'
     )
+    notification_mode = models.CharField(
+        max_length=10,
+        choices=[
+            (NOTIFY_IMMEDIATE, 'Immediately'),
+            (NOTIFY_DIGEST, 'Periodic digest'),
+            (NOTIFY_OFF, 'Off'),
+        ],
+        default=NOTIFY_IMMEDIATE
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
@@ -49,6 +63,14 @@ class Project(models.Model):
     name = models.CharField(max_length=255)
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='projects')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['name', 'id'], name='project_name_idx'),
+            models.Index(fields=['owner', '-created_at'], name='project_owner_created_idx'),
+            models.Index(fields=['-created_at', '-id'], name='project_created_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -65,6 +87,31 @@ class Task(models.Model):
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='tasks')
     assignee = models.ForeignKey('User', null=True, blank=True, on_delete=models.SET_NULL, related_name='assigned_tasks')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['project', 'completed'], name='task_project_completed_idx'),
+            models.Index(fields=['project', '-id'], name='task_project_recent_idx'),
+            models.Index(fields=['assignee', 'completed'], name='task_assignee_completed_idx'),
+            models.Index(fields=['-created_at', '-id'], name='task_created_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored state so signal receivers can spot transitions.
+        instance._loaded_completed = instance.__dict__.get('completed')
+        instance._loaded_completed_at = instance.__dict__.get('completed_at')
+        return instance
+
+    def save(self, *args, **kwargs):
+        if self.completed and not self.completed_at:
+            self.completed_at = timezone.now()
+        elif not self.completed:
+            self.completed_at = None
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.title
@@ -89,7 +136,209 @@ class Post(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posts')
     tags = models.ManyToManyField(Tag, related_name='posts', blank=True)
-    liked_by = models.ManyToManyField(User, related_name='liked_posts', blank=True)
+    liked_by = models.ManyToManyField(User, through='PostLike', related_name='liked_posts', blank=True)
+    # Denormalized len(liked_by); kept in step by core.likes.toggle_like.
+    like_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='post_feed_idx'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+
+class PostLike(models.Model):
+    # Same table as the implicit liked_by through model it replaced.
+    post = models.ForeignKey(Post, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Null for likes recorded before the date was kept.
+    created_at = models.DateTimeField(default=timezone.now, null=True, blank=True)
+
+    class Meta:
+        db_table = 'core_post_liked_by'
+        unique_together = [('post', 'user')]
+
+
+# -------------------------------
+# Outbound Email (outbox)
+# -------------------------------
+class OutboundEmail(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+
+    recipient = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    dedupe_key = models.CharField(max_length=40)
+    is_digest = models.BooleanField(default=False)
+    status = models.CharField(
+        max_length=10,
+        choices=[
+            (STATUS_PENDING, 'Pending'),
+            (STATUS_SENDING, 'Sending'),
+            (STATUS_SENT, 'Sent'),
+            (STATUS_FAILED, 'Failed'),
+        ],
+        default=STATUS_PENDING
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_pending_idx'),
+            models.Index(fields=['status', 'is_digest', 'recipient'], name='outbox_digest_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.recipient}: {self.subject}"
+
+
+# -------------------------------
+# Counter (denormalized row counts)
+# -------------------------------
+class Counter(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}={self.value}"
+
+
+# -------------------------------
+# Report Snapshot (daily rollups)
+# -------------------------------
+class ReportSnapshot(models.Model):
+    SCOPE_PROJECT = 'project'
+    SCOPE_USER = 'user'
+
+    scope = models.CharField(
+        max_length=10,
+        choices=[
+            (SCOPE_PROJECT, 'Project'),
+            (SCOPE_USER, 'User'),
+        ]
+    )
+    # Plain id rather than a FK so history survives deleting the project/user.
+    object_id = models.BigIntegerField()
+    day = models.DateField()
+    tasks_created = models.IntegerField(default=0)
+    tasks_completed = models.IntegerField(default=0)
+    posts_created = models.IntegerField(default=0)
+    likes = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'object_id', 'day'], name='unique_snapshot_per_day'),
+        ]
+        indexes = [
+            models.Index(fields=['scope', 'day'], name='snapshot_scope_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.object_id} {self.day}"
+
+
+# -------------------------------
+# Search index (see core.search)
+# -------------------------------
+class SearchDocument(models.Model):
+    KIND_POST = 'post'
+    KIND_TASK = 'task'
+
+    kind = models.CharField(
+        max_length=10,
+        choices=[
+            (KIND_POST, 'Post'),
+            (KIND_TASK, 'Task'),
+        ]
+    )
+    object_id = models.BigIntegerField()
+    # Project of a task, for linking results without another query.
+    parent_id = models.BigIntegerField(null=True, blank=True)
+    title = models.CharField(max_length=255)
+    tags = models.TextField(blank=True)
+    body = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # On PostgreSQL the table also has a generated `search_vector` tsvector
+    # column with a GIN index (added in migration 0010, not modelled here).
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_search_document'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id} {self.title}"
+
+
+class SearchTerm(models.Model):
+    """Inverted index rows used where PostgreSQL full-text search is unavailable."""
+    document = models.ForeignKey(SearchDocument, on_delete=models.CASCADE, related_name='terms')
+    term = models.CharField(max_length=64)
+    weight = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['document', 'term'], name='unique_search_term'),
+        ]
+        indexes = [
+            models.Index(fields=['term', 'document'], name='search_term_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} -> {self.document_id}"
+
+
+# -------------------------------
+# Background jobs (see core.jobs)
+# -------------------------------
+class Job(models.Model):
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CANCELLED = 'cancelled'
+    FINISHED = (STATUS_SUCCEEDED, STATUS_FAILED, STATUS_CANCELLED)
+
+    kind = models.CharField(max_length=50)
+    params = models.JSONField(default=dict, blank=True)
+    user = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name='jobs')
+    status = models.CharField(
+        max_length=10,
+        choices=[
+            (STATUS_QUEUED, 'Queued'),
+            (STATUS_RUNNING, 'Running'),
+            (STATUS_SUCCEEDED, 'Succeeded'),
+            (STATUS_FAILED, 'Failed'),
+            (STATUS_CANCELLED, 'Cancelled'),
+        ],
+        default=STATUS_QUEUED
+    )
+    cancel_requested = models.BooleanField(default=False)
+    progress = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)
+    message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='job_queue_idx'),
+            models.Index(fields=['user', '-created_at'], name='job_user_idx'),
+        ]
 
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return f"{self.kind} #{self.pk} ({self.status})"
@@ -0,0 +1,209 @@
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.db.models import Count, Min, Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import OutboundEmail, User
+
+# Upper bound on events folded into a single digest mail.
+DIGEST_MAX_ROWS = 1000
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def make_dedupe_key(subject, body):
+    return hashlib.sha1(f"{subject}\0{body}".encode("utf-8")).hexdigest()
+
+
+def recipient_modes(emails):
+    """Map lower-cased address -> notification mode.
+
+    Addresses that do not belong to a user (e.g. ADMIN_ALERT_EMAILS) get
+    NOTIFICATION_DEFAULT_MODE.
+    """
+    default = _setting("NOTIFICATION_DEFAULT_MODE", User.NOTIFY_DIGEST)
+    modes = {e.lower(): default for e in emails}
+    rows = User.objects.filter(email__in=list(emails)).values_list("email", "notification_mode")
+    for email, mode in rows:
+        modes[email.lower()] = mode
+    return modes
+
+
+def enqueue(recipients, subject, body):
+    """Queue one email per distinct recipient, honouring their preference.
+
+    Rows are written in the caller's transaction: they only share the fate
+    of the change that triggered them when the caller runs inside
+    transaction.atomic() (in autocommit, post_save fires after the save
+    has already committed). Delivery happens in `manage.py process_outbox`.
+    """
+    seen = set()
+    unique = []
+    for r in recipients:
+        if r and r.lower() not in seen:
+            seen.add(r.lower())
+            unique.append(r)
+    if not unique:
+        return []
+
+    modes = recipient_modes(unique)
+    subject = subject[:255]
+    key = make_dedupe_key(subject, body)
+    rows = [
+        OutboundEmail(
+            recipient=r,
+            subject=subject,
+            body=body,
+            dedupe_key=key,
+            is_digest=modes[r.lower()] == User.NOTIFY_DIGEST,
+        )
+        for r in unique
+        if modes[r.lower()] != User.NOTIFY_OFF
+    ]
+    return OutboundEmail.objects.bulk_create(rows)
+
+
+def retry_delay(attempts):
+    base = _setting("OUTBOX_RETRY_BASE_SECONDS", 30)
+    cap = _setting("OUTBOX_RETRY_MAX_SECONDS", 3600)
+    return timedelta(seconds=min(cap, base * (2 ** max(attempts - 1, 0))))
+
+
+def _lock(qs):
+    if connection.features.has_select_for_update_skip_locked:
+        qs = qs.select_for_update(skip_locked=True)
+    return qs
+
+
+def _due(now):
+    # A "sending" row whose lease ran out belongs to a worker that died.
+    return OutboundEmail.objects.filter(
+        status__in=[OutboundEmail.STATUS_PENDING, OutboundEmail.STATUS_SENDING],
+        next_attempt_at__lte=now,
+    )
+
+
+def _immediate_batches(batch_size, now):
+    rows = list(_lock(_due(now).filter(is_digest=False).order_by("next_attempt_at", "id"))[:batch_size])
+    groups = {}
+    for row in rows:
+        groups.setdefault((row.recipient.lower(), row.dedupe_key), []).append(row)
+    for group in groups.values():
+        first = group[0]
+        yield group, first.recipient, first.subject, first.body
+
+
+def _digest_batches(batch_size, now):
+    window = timedelta(seconds=_setting("DIGEST_WINDOW_SECONDS", 60))
+    max_events = _setting("DIGEST_MAX_EVENTS", 50)
+    due = (
+        _due(now).filter(is_digest=True)
+        .values("recipient")
+        .annotate(n=Count("id"), oldest=Min("created_at"))
+        .filter(Q(oldest__lte=now - window) | Q(n__gte=max_events))
+        .order_by("oldest")
+    )
+    for entry in due[:batch_size]:
+        qs = _due(now).filter(is_digest=True, recipient=entry["recipient"]).order_by("id")
+        rows = list(_lock(qs)[:DIGEST_MAX_ROWS])
+        if not rows:
+            continue
+        items = []
+        seen = set()
+        for row in rows:
+            if row.dedupe_key not in seen:
+                seen.add(row.dedupe_key)
+                items.append(row)
+        subject = f"[InsightHub] {len(items)} update{'s' if len(items) != 1 else ''}"
+        body = render_to_string("core/email/digest.txt", {"items": items, "count": len(items)})
+        yield rows, rows[0].recipient, subject, body
+
+
+def _claim(batch_size, now):
+    """Lease one batch of due rows to this worker and return its messages.
+
+    Claimed rows move to "sending" with next_attempt_at pushed out by
+    OUTBOX_LEASE_SECONDS, and the transaction commits before any mail goes
+    out, so no row lock is held while the mail server is slow.
+    """
+    lease_until = now + timedelta(seconds=_setting("OUTBOX_LEASE_SECONDS", 300))
+    with transaction.atomic():
+        batches = list(_immediate_batches(batch_size, now))
+        batches.extend(_digest_batches(batch_size, now))
+        ids = [row.pk for batch in batches for row in batch[0]]
+        if ids:
+            OutboundEmail.objects.filter(pk__in=ids).update(
+                status=OutboundEmail.STATUS_SENDING, next_attempt_at=lease_until
+            )
+    return batches
+
+
+def _record_attempt(rows, error, now, max_attempts):
+    for row in rows:
+        row.attempts += 1
+        if error is None:
+            row.status = OutboundEmail.STATUS_SENT
+            row.sent_at = now
+            row.last_error = ""
+        else:
+            row.last_error = str(error)[:1000]
+            if row.attempts >= max_attempts:
+                row.status = OutboundEmail.STATUS_FAILED
+            else:
+                row.status = OutboundEmail.STATUS_PENDING
+                row.next_attempt_at = now + retry_delay(row.attempts)
+    OutboundEmail.objects.bulk_update(
+        rows, ["status", "attempts", "next_attempt_at", "last_error", "sent_at"]
+    )
+
+
+def drain(batch_size=None, now=None):
+    """Send one batch of due emails over a single backend connection.
+
+    Immediate rows with the same recipient and content are collapsed into
+    one message; digest rows are folded into one summary per recipient
+    once their window has elapsed. Rows are claimed in one short
+    transaction and each message's outcome is saved right after it is
+    handed to the backend. Returns ``(sent, failed)`` message counts.
+    """
+    batch_size = batch_size or _setting("OUTBOX_BATCH_SIZE", 100)
+    max_attempts = _setting("OUTBOX_MAX_ATTEMPTS", 5)
+    now = now or timezone.now()
+    sent = failed = 0
+
+    batches = _claim(batch_size, now)
+    if not batches:
+        return sent, failed
+
+    conn = get_connection(fail_silently=False)
+    open_error = None
+    try:
+        conn.open()
+    except Exception as exc:
+        open_error = exc
+    try:
+        for rows, recipient, subject, body in batches:
+            error = open_error
+            if error is None:
+                message = EmailMessage(
+                    subject, body, settings.DEFAULT_FROM_EMAIL, [recipient], connection=conn
+                )
+                try:
+                    conn.send_messages([message])
+                except Exception as exc:
+                    error = exc
+            _record_attempt(rows, error, now, max_attempts)
+            if error is None:
+                sent += 1
+            else:
+                failed += 1
+    finally:
+        conn.close()
+    return sent, failed
@@ -0,0 +1,141 @@
+import base64
+from datetime import datetime
+
+from django.core.exceptions import BadRequest, ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import CursorPagination
+
+INVALID_CURSOR = "Invalid cursor."
+
+
+def encode_cursor(value, pk):
+    if hasattr(value, "isoformat"):
+        value = value.isoformat()
+    raw = f"{value}|{pk}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor, parse=datetime.fromisoformat):
+    """Return ``(value, pk)`` for a cursor, or None if it is missing.
+
+    ``parse`` turns the stored text back into the key's type. Raises
+    BadRequest (a 400 response) for a cursor we did not issue.
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        value, pk = raw.rsplit("|", 1)
+        position = parse(value), int(pk)
+    except (ValueError, UnicodeError):
+        raise BadRequest(INVALID_CURSOR)
+    # b64decode skips stray characters; only accept the exact encoding.
+    if encode_cursor(*position) != cursor:
+        raise BadRequest(INVALID_CURSOR)
+    return position
+
+
+def keyset_page(queryset, cursor, size, field="created_at", descending=True, parse=datetime.fromisoformat):
+    """Page of ``queryset`` keyed on ``(field, id)``, newest first by default.
+
+    Unlike OFFSET pagination the cost does not grow with the page number:
+    each page is an index range scan starting right after the cursor.
+    Returns ``(items, next_cursor)``; next_cursor is None on the last page.
+    """
+    prefix, op = ("-", "lt") if descending else ("", "gt")
+    if field == "id":
+        qs = queryset.order_by(f"{prefix}id")
+    else:
+        qs = queryset.order_by(f"{prefix}{field}", f"{prefix}id")
+    position = decode_cursor(cursor, parse)
+    if position:
+        value, pk = position
+        if field == "id":
+            qs = qs.filter(**{f"id__{op}": pk})
+        else:
+            qs = qs.filter(Q(**{f"{field}__{op}": value}) | Q(**{field: value, f"id__{op}": pk}))
+    items = list(qs[: size + 1])
+    next_cursor = None
+    if len(items) > size:
+        items = items[:size]
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, field), last.pk)
+    return items, next_cursor
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """Keyset pagination for the API, newest first.
+
+    DRF positions a cursor on the first ordering field only and steps over
+    ties with an offset, which skips or repeats rows when paging back
+    across equal timestamps. Here the position is ``value|id`` and pages
+    are filtered on ``(field, id)`` like keyset_page() above.
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+    def get_ordering(self, request, queryset, view):
+        ordering = tuple(super().get_ordering(request, queryset, view))
+        if ordering[0].lstrip("-") == "id":
+            return ordering[:1]
+        # The id tiebreak runs in the same direction as the sort field.
+        return (ordering[0], "-id" if ordering[0].startswith("-") else "id")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.model = queryset.model
+        self.ordering = ordering = self.get_ordering(request, queryset, view)
+        cursor = self._decode(request)
+        position = cursor.position if cursor else None
+        if position is not None:
+            queryset = queryset.filter(self._after(ordering, cursor))
+        # DRF then sees a cursor without a position; only its page links
+        # need to learn where this page started.
+        page = super().paginate_queryset(queryset, request, view)
+        if position is not None:
+            if cursor.reverse:
+                self.has_next, self.next_position = True, position
+            else:
+                self.has_previous, self.previous_position = True, position
+        return page
+
+    def decode_cursor(self, request):
+        cursor = self._decode(request)
+        return cursor._replace(position=None) if cursor else None
+
+    def _decode(self, request):
+        # A garbled or hand-edited cursor is a client error, not DRF's 404
+        # (or a 500 from filtering a date column on junk).
+        try:
+            cursor = super().decode_cursor(request)
+        except NotFound:
+            raise ValidationError({"cursor": INVALID_CURSOR})
+        if cursor and cursor.position is not None:
+            self._split(cursor.position)
+        return cursor
+
+    def _split(self, position):
+        field = self.model._meta.get_field(self.ordering[0].lstrip("-"))
+        try:
+            value, pk = position.rsplit("|", 1)
+            return field.to_python(value), int(pk)
+        except (ValueError, DjangoValidationError):
+            raise ValidationError({"cursor": INVALID_CURSOR})
+
+    def _after(self, ordering, cursor):
+        order = ordering[0]
+        field = order.lstrip("-")
+        value, pk = self._split(cursor.position)
+        op = "lt" if cursor.reverse != order.startswith("-") else "gt"
+        return Q(**{f"{field}__{op}": value}) | Q(**{field: value, f"id__{op}": pk})
+
+    def _get_position_from_instance(self, instance, ordering):
+        value = super()._get_position_from_instance(instance, ordering)
+        pk = instance["id"] if isinstance(instance, dict) else instance.pk
+        return f"{value}|{pk}"
+
+
+class IdCursorPagination(CreatedAtCursorPagination):
+    ordering = ("-id",)
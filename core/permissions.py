@@ -0,0 +1,17 @@
+from rest_framework.permissions import SAFE_METHODS, BasePermission
+
+
+class IsManagerOrAdminOrReadOnly(BasePermission):
+    """Mirrors @manager_or_admin_required for unsafe methods."""
+
+    def has_permission(self, request, view):
+        if request.method in SAFE_METHODS:
+            return True
+        return request.user.is_authenticated and request.user.role in ['Admin', 'Manager']
+
+
+class IsOwnerOrReadOnly(BasePermission):
+    def has_object_permission(self, request, view, obj):
+        if request.method in SAFE_METHODS:
+            return True
+        return obj.owner_id == request.user.id
@@ -0,0 +1,100 @@
+import threading
+from contextlib import contextmanager
+
+from .models import Project, User
+
+_local = threading.local()
+
+PROJECT_FIELDS = ("id", "name", "owner_id", "owner__username", "owner__email")
+USER_FIELDS = ("id", "username", "email")
+
+
+@contextmanager
+def scope():
+    """Share lookups between receivers until the scope ends.
+
+    One per request (see NotificationBatchMiddleware); outside a scope each
+    call still resolves its whole batch in one query per model.
+    """
+    outer = getattr(_local, "store", None)
+    if outer is None:
+        _local.store = {"projects": {}, "users": {}}
+    try:
+        yield
+    finally:
+        if outer is None:
+            _local.store = None
+
+
+def _store():
+    return getattr(_local, "store", None) or {"projects": {}, "users": {}}
+
+
+def forget(model, pk):
+    """Drop a cached row after it changed (called from the save/delete receivers)."""
+    store = getattr(_local, "store", None)
+    if not store:
+        return
+    if model is User:
+        store["users"].pop(pk, None)
+        # Project rows carry their owner's name and email as well.
+        store["projects"] = {k: v for k, v in store["projects"].items() if not v or v["owner_id"] != pk}
+    elif model is Project:
+        store["projects"].pop(pk, None)
+
+
+def _users(store, ids):
+    known = store["users"]
+    missing = {pk for pk in ids if pk and pk not in known}
+    if missing:
+        rows = {row["id"]: row for row in User.objects.filter(id__in=missing).values(*USER_FIELDS)}
+        for pk in missing:
+            known[pk] = rows.get(pk)
+    return known
+
+
+def _projects(store, ids):
+    known = store["projects"]
+    missing = {pk for pk in ids if pk and pk not in known}
+    if missing:
+        rows = {row["id"]: row for row in Project.objects.filter(id__in=missing).values(*PROJECT_FIELDS)}
+        for pk in missing:
+            row = rows.get(pk)
+            if row and row["owner_id"]:
+                store["users"].setdefault(
+                    row["owner_id"], {"id": row["owner_id"], "username": row["owner__username"], "email": row["owner__email"]}
+                )
+            known[pk] = row
+    return known
+
+
+def users(ids):
+    """{id: {"id", "username", "email"} or None} for ``ids``."""
+    known = _users(_store(), ids)
+    return {pk: known.get(pk) for pk in ids if pk}
+
+
+def projects(ids):
+    """{id: {"id", "name", "owner_id", "owner__username", "owner__email"} or None}."""
+    known = _projects(_store(), ids)
+    return {pk: known.get(pk) for pk in ids if pk}
+
+
+def for_tasks(tasks):
+    """{task.pk: {"project", "owner", "assignee"}} for a batch of tasks.
+
+    Works for deleted tasks too (only project_id/assignee_id are read). A
+    missing row gives None; at most one query each for projects and users.
+    """
+    store = _store()
+    known_projects = _projects(store, {task.project_id for task in tasks})
+    known_users = _users(store, {task.assignee_id for task in tasks})
+    context = {}
+    for task in tasks:
+        project = known_projects.get(task.project_id)
+        context[task.pk] = {
+            "project": project,
+            "owner": known_users.get(project["owner_id"]) if project else None,
+            "assignee": known_users.get(task.assignee_id) if task.assignee_id else None,
+        }
+    return context
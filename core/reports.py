@@ -0,0 +1,142 @@
+from django.conf import settings
+from django.db.models import Count, Exists, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Project, Task, User
+from .pagination import encode_cursor, keyset_page
+
+
+def project_summary():
+    """Per-project task totals, aggregated in one query."""
+    return (
+        Project.objects.select_related('owner')
+        .annotate(
+            total=Count('tasks'),
+            done=Count('tasks', filter=Q(tasks__completed=True)),
+            pending=Count('tasks', filter=Q(tasks__completed=False)),
+        )
+        .order_by('name', 'id')
+    )
+
+
+def assignee_workload():
+    """Task totals per assignee (assignee None = unassigned)."""
+    return (
+        Task.objects.values('assignee_id', 'assignee__username')
+        .annotate(
+            total=Count('id'),
+            done=Count('id', filter=Q(completed=True)),
+            pending=Count('id', filter=Q(completed=False)),
+        )
+        .order_by('-total', 'assignee__username')
+    )
+
+
+def _page_size():
+    return getattr(settings, 'REPORT_PAGE_SIZE', 25)
+
+
+def _task_totals(field):
+    """total/done/pending per outer row as correlated subqueries on Task.
+
+    Unlike a join + GROUP BY, these are only evaluated for the rows a
+    keyset page actually returns.
+    """
+    tasks = Task.objects.filter(**{field: OuterRef('pk')}).order_by().values(field)
+
+    def count(**filters):
+        return Coalesce(Subquery(tasks.filter(**filters).annotate(n=Count('*')).values('n')), Value(0))
+
+    return {'total': count(), 'done': count(completed=True), 'pending': count(completed=False)}
+
+
+def project_summary_page(cursor=None):
+    """One page of per-project totals in name order."""
+    projects = Project.objects.select_related('owner').annotate(**_task_totals('project'))
+    return keyset_page(projects, cursor, _page_size(), field='name', descending=False, parse=str)
+
+
+def assignee_workload_page(cursor=None):
+    """One page of per-assignee totals in username order.
+
+    Counted per user from the assignee index, so a page costs the same
+    however many tasks and people there are.
+    """
+    users = (
+        User.objects.filter(Exists(Task.objects.filter(assignee=OuterRef('pk'))))
+        .annotate(**_task_totals('assignee'))
+        .only('id', 'username')
+    )
+    return keyset_page(users, cursor, _page_size(), field='username', descending=False, parse=str)
+
+
+def unassigned_workload():
+    return Task.objects.filter(assignee__isnull=True).aggregate(
+        total=Count('id'),
+        done=Count('id', filter=Q(completed=True)),
+        pending=Count('id', filter=Q(completed=False)),
+    )
+
+
+def report_tasks():
+    return Task.objects.select_related('project', 'assignee').order_by('-id')
+
+
+def report_tasks_page(after=None, before=None):
+    """One page of tasks, newest first, keyed on id.
+
+    ``after`` continues past a page's last row, ``before`` goes back from
+    a page's first row. Returns ``(tasks, next_cursor, previous_cursor)``;
+    a cursor is None at that end of the table.
+    """
+    size = _page_size()
+    if before:
+        # Walk back up in id order, then show the page newest first.
+        tasks, previous_cursor = keyset_page(report_tasks(), before, size, field='id', descending=False, parse=int)
+        tasks.reverse()
+        next_cursor = encode_cursor(tasks[-1].id, tasks[-1].id) if tasks else None
+        return tasks, next_cursor, previous_cursor
+    tasks, next_cursor = keyset_page(report_tasks(), after, size, field='id', parse=int)
+    previous_cursor = encode_cursor(tasks[0].id, tasks[0].id) if after and tasks else None
+    return tasks, next_cursor, previous_cursor
+
+
+def completion_ratio(completed, total):
+    return round(completed / total, 4) if total else 0.0
+
+
+# Export definitions: report name -> (header, row iterator factory)
+def _project_rows(chunk_size):
+    rows = project_summary().values_list('id', 'name', 'owner__username', 'total', 'done', 'pending')
+    for p in rows.iterator(chunk_size=chunk_size):
+        yield p + (completion_ratio(p[4], p[3]),)
+
+
+def _workload_rows(chunk_size):
+    rows = assignee_workload().values_list('assignee_id', 'assignee__username', 'total', 'done', 'pending')
+    for w in rows.iterator(chunk_size=chunk_size):
+        yield w + (completion_ratio(w[3], w[2]),)
+
+
+def _task_rows(chunk_size):
+    return (
+        Task.objects.order_by('id')
+        .values_list('id', 'project_id', 'project__name', 'title', 'completed', 'assignee__username', 'created_at')
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+EXPORTS = {
+    'projects': (
+        ['id', 'name', 'owner', 'total', 'completed', 'pending', 'completion_ratio'],
+        _project_rows,
+    ),
+    'workload': (
+        ['assignee_id', 'assignee', 'total', 'completed', 'pending', 'completion_ratio'],
+        _workload_rows,
+    ),
+    'tasks': (
+        ['id', 'project_id', 'project', 'title', 'completed', 'assignee', 'created_at'],
+        _task_rows,
+    ),
+}
@@ -0,0 +1,152 @@
+import re
+import threading
+from collections import Counter as TermCounts, defaultdict
+
+from django.db import connection, transaction
+from django.db.models import BooleanField, Count, FloatField, Sum
+from django.db.models.expressions import RawSQL
+
+from .models import Post, SearchDocument, SearchTerm, Task
+
+POST = SearchDocument.KIND_POST
+TASK = SearchDocument.KIND_TASK
+KINDS = (POST, TASK)
+
+BATCH_SIZE = 500
+
+# Inverted index weights per field (PostgreSQL uses setweight A/B/C instead).
+WEIGHTS = {'title': 4, 'tags': 2, 'body': 1}
+TERM_MAX_LENGTH = SearchTerm._meta.get_field('term').max_length
+STOP_WORDS = frozenset(
+    'a an and are as at be by for from has in is it its of on or that the this to was were will with'.split()
+)
+_word = re.compile(r'\w+')
+
+_local = threading.local()
+
+
+def tokenize(text):
+    """Lower-cased words of ``text`` without stop words or single letters."""
+    return [
+        word[:TERM_MAX_LENGTH]
+        for word in _word.findall((text or '').lower())
+        if len(word) > 1 and word not in STOP_WORDS
+    ]
+
+
+def uses_postgres():
+    return connection.vendor == 'postgresql'
+
+
+# --- indexing ---
+def _post_documents(ids):
+    posts = Post.objects.filter(id__in=ids).only('id', 'title', 'content').prefetch_related('tags')
+    return [
+        SearchDocument(
+            kind=POST,
+            object_id=post.id,
+            title=post.title,
+            tags=' '.join(tag.name for tag in post.tags.all()),
+            body=post.content,
+        )
+        for post in posts
+    ]
+
+
+def _task_documents(ids):
+    tasks = Task.objects.filter(id__in=ids).values_list('id', 'project_id', 'title', 'description')
+    return [
+        SearchDocument(kind=TASK, object_id=pk, parent_id=project_id, title=title, body=description)
+        for pk, project_id, title, description in tasks
+    ]
+
+
+SOURCES = {POST: _post_documents, TASK: _task_documents}
+
+
+def _terms(document):
+    counts = TermCounts()
+    for field, weight in WEIGHTS.items():
+        for term in tokenize(getattr(document, field)):
+            counts[term] += weight
+    return [SearchTerm(document=document, term=term, weight=weight) for term, weight in counts.items()]
+
+
+def reindex(kind, ids):
+    """Rebuild the documents for ``ids``; ids that no longer exist are dropped."""
+    ids = sorted(set(ids))
+    for start in range(0, len(ids), BATCH_SIZE):
+        chunk = ids[start:start + BATCH_SIZE]
+        documents = SOURCES[kind](chunk)
+        with transaction.atomic():
+            SearchDocument.objects.filter(kind=kind, object_id__in=chunk).delete()
+            SearchDocument.objects.bulk_create(documents, batch_size=BATCH_SIZE)
+            if not uses_postgres():
+                terms = [term for document in documents for term in _terms(document)]
+                SearchTerm.objects.bulk_create(terms, batch_size=BATCH_SIZE)
+
+
+def remove(kind, ids):
+    SearchDocument.objects.filter(kind=kind, object_id__in=list(ids)).delete()
+
+
+def _pending():
+    if not hasattr(_local, 'pending'):
+        _local.pending = defaultdict(set)
+    return _local.pending
+
+
+def schedule(kind, *ids):
+    """Reindex ``ids`` after commit; repeated calls in one transaction coalesce."""
+    _pending()[kind].update(pk for pk in ids if pk is not None)
+    transaction.on_commit(flush)
+
+
+def flush():
+    pending = _pending()
+    while pending:
+        kind, ids = pending.popitem()
+        reindex(kind, ids)
+
+
+def rebuild(kinds=KINDS):
+    """Drop and rebuild the whole index for ``kinds``. Returns {kind: documents}."""
+    totals = {}
+    for kind in kinds:
+        SearchDocument.objects.filter(kind=kind).delete()
+        model = Post if kind == POST else Task
+        ids = list(model.objects.order_by('id').values_list('id', flat=True))
+        reindex(kind, ids)
+        totals[kind] = len(ids)
+    return totals
+
+
+# --- querying ---
+def search(query, kind=None):
+    """Documents matching every word of ``query``, best match first.
+
+    Each row carries a ``rank`` annotation. Returns an empty queryset for a
+    query without searchable words.
+    """
+    documents = SearchDocument.objects.all()
+    if kind in KINDS:
+        documents = documents.filter(kind=kind)
+    terms = tokenize(query)
+    if not terms:
+        return documents.none()
+    if uses_postgres():
+        tsquery = "plainto_tsquery('english', %s)"
+        return (
+            documents.alias(hit=RawSQL(f"search_vector @@ {tsquery}", [query], output_field=BooleanField()))
+            .filter(hit=True)
+            .annotate(rank=RawSQL(f"ts_rank(search_vector, {tsquery})", [query], output_field=FloatField()))
+            .order_by('-rank', '-id')
+        )
+    terms = set(terms)
+    # Filtering before annotating keeps the aggregates to the matched terms.
+    return (
+        documents.filter(terms__term__in=terms)
+        .annotate(matched=Count('terms'), rank=Sum('terms__weight'))
+        .filter(matched=len(terms))
+        .order_by('-rank', '-id')
+    )
@@ -0,0 +1,133 @@
+from rest_framework import permissions, serializers
+
+from . import tags
+from .models import Post, Project, SearchDocument, Tag, Task, User
+
+
+def requested_fields(request):
+    """The ``?fields=a,b`` sparse fieldset, or None for all fields.
+
+    Only reads are trimmed: a write must still validate and save every
+    field it was sent.
+    """
+    if request is None or request.method not in permissions.SAFE_METHODS:
+        return None
+    raw = request.query_params.get('fields')
+    if not raw:
+        return None
+    return {name.strip() for name in raw.split(',') if name.strip()}
+
+
+class SparseFieldsMixin:
+    """Drop serializer fields that were not asked for via ``?fields=``."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        wanted = requested_fields(self.context.get('request'))
+        if wanted:
+            for name in set(self.fields) - wanted - {'id'}:
+                self.fields.pop(name)
+
+
+class TagNamesField(serializers.Field):
+    """Tags as a list of names; accepts a list or a comma-separated string."""
+
+    def to_representation(self, value):
+        return [tag.name for tag in value.all()]
+
+    def to_internal_value(self, data):
+        if not isinstance(data, (list, str)):
+            raise serializers.ValidationError('Expected a list of tag names.')
+        return tags.normalize(data)
+
+
+class TagSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Tag
+        fields = ['id', 'name']
+
+
+class ProjectSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    owner_username = serializers.CharField(source='owner.username', read_only=True)
+
+    class Meta:
+        model = Project
+        fields = ['id', 'name', 'owner', 'owner_username', 'created_at', 'updated_at']
+        read_only_fields = ['owner', 'created_at', 'updated_at']
+
+
+class TaskSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    project_name = serializers.CharField(source='project.name', read_only=True)
+    assignee = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), required=False, allow_null=True)
+    assignee_username = serializers.CharField(source='assignee.username', read_only=True, default=None)
+
+    class Meta:
+        model = Task
+        fields = [
+            'id', 'title', 'description', 'completed', 'attachment',
+            'project', 'project_name', 'assignee', 'assignee_username',
+            'created_at', 'updated_at', 'completed_at',
+        ]
+        read_only_fields = ['created_at', 'updated_at', 'completed_at']
+
+
+class PostSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    owner_username = serializers.CharField(source='owner.username', read_only=True)
+    tags = TagNamesField(required=False)
+
+    class Meta:
+        model = Post
+        fields = [
+            'id', 'title', 'content', 'owner', 'owner_username', 'tags',
+            'like_count', 'created_at', 'updated_at',
+        ]
+        read_only_fields = ['owner', 'like_count', 'created_at', 'updated_at']
+
+    def create(self, validated_data):
+        tag_names = validated_data.pop('tags', None)
+        post = super().create(validated_data)
+        if tag_names is not None:
+            tags.set_post_tags(post, tag_names)
+        return post
+
+    def update(self, instance, validated_data):
+        tag_names = validated_data.pop('tags', None)
+        post = super().update(instance, validated_data)
+        if tag_names is not None:
+            tags.set_post_tags(post, tag_names)
+            # Drop the stale prefetch so the response reflects the new tags.
+            getattr(post, '_prefetched_objects_cache', {}).pop('tags', None)
+        return post
+
+
+class SearchResultSerializer(serializers.ModelSerializer):
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = SearchDocument
+        fields = ['kind', 'object_id', 'parent_id', 'title', 'tags', 'body', 'rank']
+
+
+# Bulk task payloads: plain ids so validation does not query per row
+# (references are checked in one query per model by core.bulk).
+class BulkTaskCreateSerializer(serializers.Serializer):
+    title = serializers.CharField(max_length=255)
+    description = serializers.CharField(required=False, allow_blank=True, default='')
+    completed = serializers.BooleanField(required=False, default=False)
+    project = serializers.IntegerField()
+    assignee = serializers.IntegerField(required=False, allow_null=True, default=None)
+
+
+class BulkTaskUpdateSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    completed = serializers.BooleanField(required=False)
+    assignee = serializers.IntegerField(required=False, allow_null=True)
+
+    def validate(self, attrs):
+        if 'completed' not in attrs and 'assignee' not in attrs:
+            raise serializers.ValidationError('Nothing to update: send completed and/or assignee.')
+        return attrs
+
+
+class BulkTaskDeleteSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
@@ -1,56 +1,87 @@
-from django.db.models.signals import post_save, post_delete
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
-from django.core.mail import send_mail
 from django.conf import settings
-from .models import Project, Task, Post
+from . import counters, fanout, fragments, outbox, related, search, snapshots, tags, usercache, versions
+from .models import Project, Task, Post, Tag, User
+
+
+_state = threading.local()
+
 
+@contextmanager
+def muted():
+    """Skip the per-row receivers below; bulk code paths notify in aggregate."""
+    previous = getattr(_state, "muted", False)
+    _state.muted = True
+    try:
+        yield
+    finally:
+        _state.muted = previous
+
+def is_muted():
+    return getattr(_state, "muted", False)
+
+def email_users(recipients, subject: str, message: str) -> None:
+    # Queued in the current transaction; `manage.py process_outbox` delivers.
+    outbox.enqueue(recipients, subject, message)
 
 def email_user(recipient_email: str, subject: str, message: str) -> None:
     if not recipient_email:
         return
-    try:
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [recipient_email],
-            fail_silently=True,
-        )
-    except Exception:
-        pass
+    email_users([recipient_email], subject, message)
 
 def push_to_user(user_id, payload):
-    try:
-        layer = get_channel_layer()
-        if not layer:
-            return
-        async_to_sync(layer.group_send)(f"user_{user_id}", {"type": "notify", "payload": payload})
-    except Exception:
-        pass
+    # Sent after commit, batched per request (see core.fanout).
+    fanout.push(user_id, payload)
 
-def notify_admin_by_email(subject, message):
+def admin_recipients():
     recipients = getattr(settings, "ADMIN_ALERT_EMAILS", None) or [getattr(settings, "DEFAULT_FROM_EMAIL", None)]
-    recipients = [r for r in recipients if r]
-    if recipients:
-        try:
-            send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, recipients, fail_silently=True)
-        except Exception:
-            pass
+    return [r for r in recipients if r]
+
+def notify_admin_by_email(subject, message):
+    email_users(admin_recipients(), subject, message)
+
+def _field(row, name, default="—"):
+    return row[name] if row else default
+
+# User
+@receiver(post_save, sender=User)
+def user_created(sender, instance, created, **kwargs):
+    if is_muted():
+        return
+    if created:
+        counters.bump("users", 1)
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    if is_muted():
+        return
+    counters.bump("users", -1)
 
 # Project
 @receiver(post_save, sender=Project)
 def project_created_or_updated(sender, instance, created, **kwargs):
+    if is_muted():
+        return
+    if created:
+        counters.bump("projects", 1)
     payload = {"kind": "project", "event": "created" if created else "updated", "project_id": instance.id, "name": instance.name}
     push_to_user(instance.owner_id, payload)
+    owner = related.users([instance.owner_id]).get(instance.owner_id)
     notify_admin_by_email(
         f"[InsightHub] Project {'created' if created else 'updated'}: {instance.name}",
-        f"Project: {instance.name}\nOwner: {instance.owner.username} ({instance.owner.email})\n",
+        f"Project: {instance.name}\nOwner: {_field(owner, 'username')} ({_field(owner, 'email')})\n",
     )
 
 @receiver(post_delete, sender=Project)
 def project_deleted(sender, instance, **kwargs):
+    if is_muted():
+        return
+    counters.bump("projects", -1)
     if instance.owner_id:
         push_to_user(instance.owner_id, {"kind": "project", "event": "deleted", "project_id": instance.id, "name": instance.name})
     notify_admin_by_email(f"[InsightHub] Project deleted: {instance.name}", f"Project: {instance.name}\n")
@@ -58,6 +89,13 @@ def project_deleted(sender, instance, **kwargs):
 # Task
 @receiver(post_save, sender=Task)
 def task_created_or_updated(sender, instance, created, **kwargs):
+    if is_muted():
+        return
+    if created:
+        counters.bump("tasks", 1)
+    snapshots.record_task(instance, created)
+    context = related.for_tasks([instance])[instance.pk]
+    project, owner, assignee = context["project"], context["owner"], context["assignee"]
     payload = {
         "kind": "task",
         "event": "created" if created else "updated",
@@ -65,48 +103,45 @@ def task_created_or_updated(sender, instance, created, **kwargs):
         "title": instance.title,
         "completed": instance.completed,
         "project_id": instance.project_id,
-        "project_name": instance.project.name,
+        "project_name": _field(project, "name", None),
     }
 
     # WebSocket notifications
-    push_to_user(instance.project.owner_id, payload)
-    if getattr(instance, "assignee_id", None):
+    push_to_user(_field(project, "owner_id", None), payload)
+    if instance.assignee_id:
         push_to_user(instance.assignee_id, payload)
 
     # Email subject and message (shared)
     subject = f"[InsightHub] Task {'created' if created else 'updated'}: {instance.title}"
     message = (
-        f"Project: {instance.project.name}\n"
+        f"Project: {_field(project, 'name')}\n"
         f"Task: {instance.title}\n"
         f"Completed: {instance.completed}\n"
-        f"Owner: {instance.project.owner.username} ({instance.project.owner.email})\n"
-        f"Assignee: {getattr(instance.assignee, 'username', '—')} "
-        f"({getattr(instance.assignee, 'email', '—')})\n"
+        f"Owner: {_field(owner, 'username')} ({_field(owner, 'email')})\n"
+        f"Assignee: {_field(assignee, 'username')} ({_field(assignee, 'email')})\n"
     )
-
-    notify_admin_by_email(subject, message)
-
-    owner_email = getattr(instance.project.owner, "email", None)
-    email_user(owner_email, subject, message)
-
-    assignee_email = getattr(instance.assignee, "email", None)
-    email_user(assignee_email, subject, message)
+    email_users(admin_recipients() + [_field(owner, "email", None), _field(assignee, "email", None)], subject, message)
 
 @receiver(post_delete, sender=Task)
 def task_deleted(sender, instance, **kwargs):
-    owner_id = getattr(instance.project, "owner_id", None) if getattr(instance, "project", None) else None
-    if owner_id:
+    if is_muted():
+        return
+    counters.bump("tasks", -1)
+    # Read from the ids only: the project may be going away in the same delete.
+    context = related.for_tasks([instance])[instance.pk]
+    owner, assignee = context["owner"], context["assignee"]
+    if owner:
         push_to_user(
-            owner_id,
+            owner["id"],
             {
                 "kind": "task",
                 "event": "deleted",
                 "task_id": instance.id,
                 "title": instance.title,
-                "project_id": getattr(instance, "project_id", None),
+                "project_id": instance.project_id,
             },
         )
-    if getattr(instance, "assignee_id", None):
+    if instance.assignee_id:
         push_to_user(
             instance.assignee_id,
             {
@@ -119,27 +154,192 @@ def task_deleted(sender, instance, **kwargs):
     subject = f"[InsightHub] Task deleted: {instance.title}"
     message = (
         f"Task: {instance.title}\n"
-        f"Project ID: {getattr(instance, 'project_id', None)}\n"
+        f"Project ID: {instance.project_id}\n"
     )
-
-    notify_admin_by_email(subject, message)
-
-    owner_email = getattr(getattr(instance, "project", None), "owner", None)
-    owner_email = getattr(owner_email, "email", None)
-    email_user(owner_email, subject, message)
-
-    assignee_email = getattr(instance, "assignee", None)
-    assignee_email = getattr(assignee_email, "email", None)
-    email_user(assignee_email, subject, message)
+    email_users(admin_recipients() + [_field(owner, "email", None), _field(assignee, "email", None)], subject, message)
 
 # Post
 @receiver(post_save, sender=Post)
 def post_created_or_updated(sender, instance, created, **kwargs):
+    if is_muted():
+        return
+    if created:
+        counters.bump("posts", 1)
+        snapshots.record_post_created(instance)
     push_to_user(instance.owner_id, {"kind": "post", "event": "created" if created else "updated", "post_id": instance.id, "title": instance.title})
-    notify_admin_by_email(f"[InsightHub] Post {'created' if created else 'updated'}: {instance.title}", f"Author: {instance.owner.username}\nTitle: {instance.title}\n")
+    author = related.users([instance.owner_id]).get(instance.owner_id)
+    notify_admin_by_email(f"[InsightHub] Post {'created' if created else 'updated'}: {instance.title}", f"Author: {_field(author, 'username')}\nTitle: {instance.title}\n")
 
 @receiver(post_delete, sender=Post)
 def post_deleted(sender, instance, **kwargs):
+    if is_muted():
+        return
+    counters.bump("posts", -1)
     if instance.owner_id:
         push_to_user(instance.owner_id, {"kind": "post", "event": "deleted", "post_id": instance.id, "title": instance.title})
-    notify_admin_by_email(f"[InsightHub] Post deleted: {instance.title}", f"Title: {instance.title}\n")
\ No newline at end of file
+    notify_admin_by_email(f"[InsightHub] Post deleted: {instance.title}", f"Title: {instance.title}\n")
+
+# Version stamps for conditional GET (see core.decorators.versioned) and
+# cached cards (see core.fragments)
+VERSIONED = {
+    Project: ("projects",),
+    Task: ("tasks",),
+    Post: ("posts",),
+    Tag: ("posts",),
+    User: ("users",),
+}
+# Models with a search document (see core.search)
+SEARCHED = {
+    Post: search.POST,
+    Task: search.TASK,
+}
+# Models shown inside other models' cards: a change retires all of those.
+SHOWN_IN_CARDS = {
+    Tag: ("post",),
+    User: ("task", "post"),
+}
+
+# Connected per sender: a sender-less post_delete receiver would disable
+# fast deletes for every model.
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=User)
+def resource_changed(sender, instance, **kwargs):
+    if sender in (User, Project):
+        related.forget(sender, instance.pk)
+    if sender is User:
+        # Role, password and profile changes must reach request.user at once.
+        usercache.invalidate(instance.pk)
+    if is_muted():
+        return
+    # Logging in only touches last_login, which no page renders.
+    if set(kwargs.get("update_fields") or ()) == {"last_login"}:
+        return
+    versions.bump(*VERSIONED[sender])
+    if sender in SHOWN_IN_CARDS:
+        fragments.invalidate_kind(*SHOWN_IN_CARDS[sender])
+    else:
+        fragments.invalidate(sender._meta.model_name, instance.pk)
+    if sender in SEARCHED:
+        search.schedule(SEARCHED[sender], instance.pk)
+
+# Tag
+def _reindex_tagged_posts(tag):
+    search.schedule(search.POST, *tags.PostTag.objects.filter(tag_id=tag.id).values_list("post_id", flat=True))
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def tag_changed(sender, instance, **kwargs):
+    tags.forget(instance.id)
+    if kwargs.get("created") is False:
+        # Renamed: the posts carrying it are indexed under the old name.
+        _reindex_tagged_posts(instance)
+
+@receiver(pre_delete, sender=Tag)
+def tag_deleting(sender, instance, **kwargs):
+    # Read before the cascade drops the links; the reindex runs on commit.
+    _reindex_tagged_posts(instance)
+
+# Bulk operations
+def tasks_bulk_changed(event, tasks):
+    """Aggregate side effects for a bulk create/update/delete of tasks.
+
+    Replaces the per-row post_save/post_delete work: one counter update,
+    one rollup upsert per affected row, one push per affected user and one
+    summary email per recipient.
+    """
+    if not tasks:
+        return
+    count = len(tasks)
+    if event == "created":
+        counters.bump("tasks", count)
+    elif event == "deleted":
+        counters.bump("tasks", -count)
+    if event != "deleted":
+        snapshots.record_tasks(tasks, created=event == "created")
+    versions.bump("tasks")
+    fragments.invalidate("task", *(task.id for task in tasks))
+    if event == "deleted":
+        search.remove(search.TASK, (task.id for task in tasks))
+    else:
+        search.schedule(search.TASK, *(task.id for task in tasks))
+
+    projects = {pk: p for pk, p in related.projects({t.project_id for t in tasks}).items() if p}
+    assignees = {pk: u["email"] for pk, u in related.users({t.assignee_id for t in tasks}).items() if u}
+
+    per_user = defaultdict(list)
+    for task in tasks:
+        owner_id = projects.get(task.project_id, {}).get("owner_id")
+        for user_id in {owner_id, task.assignee_id}:
+            if user_id:
+                per_user[user_id].append(task.id)
+    for user_id, task_ids in per_user.items():
+        push_to_user(user_id, {"kind": "task", "event": f"bulk_{event}", "count": len(task_ids), "task_ids": task_ids})
+
+    shown = 50
+    lines = [
+        f"- {task.title} (project: {projects.get(task.project_id, {}).get('name', task.project_id)})"
+        for task in tasks[:shown]
+    ]
+    if count > shown:
+        lines.append(f"...and {count - shown} more")
+    subject = f"[InsightHub] {count} task{'s' if count != 1 else ''} {event}"
+    message = f"{count} task{'s' if count != 1 else ''} {event}:\n" + "\n".join(lines) + "\n"
+    owner_emails = [p["owner__email"] for p in projects.values()]
+    email_users(admin_recipients() + owner_emails + list(assignees.values()), subject, message)
+
+
+# Project deletion (see core.bulk.delete_project)
+def project_tasks_deleted(task_ids):
+    """Derived state for one chunk of a project's tasks deleted under muted()."""
+    counters.bump("tasks", -len(task_ids))
+    versions.bump("tasks")
+    # No card invalidation: cards of deleted tasks are never looked up again.
+    search.remove(search.TASK, task_ids)
+
+def project_deleted_with_tasks(project, task_count, assignee_ids):
+    """One push per affected user and one email for a project and its tasks."""
+    counters.bump("projects", -1)
+    versions.bump("projects")
+    fragments.invalidate("project", project.id)
+    payload = {"kind": "project", "event": "deleted", "project_id": project.id, "name": project.name, "tasks_deleted": task_count}
+    for user_id in {project.owner_id, *assignee_ids}:
+        push_to_user(user_id, payload)
+    people = related.users({project.owner_id, *assignee_ids})
+    owner = people.get(project.owner_id)
+    subject = f"[InsightHub] Project deleted: {project.name} ({task_count} task{'s' if task_count != 1 else ''})"
+    message = (
+        f"Project: {project.name}\n"
+        f"Owner: {_field(owner, 'username')} ({_field(owner, 'email')})\n"
+        f"Tasks deleted: {task_count}\n"
+    )
+    email_users(admin_recipients() + [u["email"] for u in people.values() if u], subject, message)
+
+
+# Imports (see core.imports)
+def rows_imported(dataset, objects):
+    """Derived state for one bulk-created import chunk; no per-row notifications."""
+    counters.bump(dataset, len(objects))
+    versions.bump(dataset)
+    if dataset == "tasks":
+        snapshots.record_tasks(objects, created=True)
+        search.schedule(search.TASK, *(task.id for task in objects))
+
+def import_finished(result, user=None):
+    """One summary push and email for a whole import run."""
+    summary = (
+        f"Import of {result['dataset']}: {result['created']} created, "
+        f"{result['failed']} rejected out of {result['rows']} row(s) in {result['seconds']}s.\n"
+    )
+    if result["errors"]:
+        summary += "\nFirst errors:\n" + "\n".join(f"- line {line}: {message}" for line, message in result["errors"][:20]) + "\n"
+    if user is not None:
+        push_to_user(user.id, {"kind": "import", "event": "finished", **{k: result[k] for k in ("dataset", "rows", "created", "failed")}})
+    email_users(admin_recipients() + [getattr(user, "email", None)], f"[InsightHub] Import finished: {result['dataset']}", summary)
@@ -0,0 +1,220 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import Post, ReportSnapshot, Task
+
+PROJECT = ReportSnapshot.SCOPE_PROJECT
+USER = ReportSnapshot.SCOPE_USER
+
+# Fields that can be rebuilt from source rows (older likes have no date).
+BACKFILLED = ('tasks_created', 'tasks_completed', 'posts_created')
+
+
+def bump(scope, object_id, day=None, **deltas):
+    """Add ``deltas`` to the rollup row for (scope, object_id, day)."""
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not object_id or not deltas:
+        return
+    day = day or timezone.localdate()
+    rows = ReportSnapshot.objects.filter(scope=scope, object_id=object_id, day=day)
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    if rows.update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            ReportSnapshot.objects.create(scope=scope, object_id=object_id, day=day, **deltas)
+    except IntegrityError:
+        rows.update(**updates)
+
+
+def _task_deltas(task, created):
+    """{day: {field: delta}} for a saved task.
+
+    Creating and completing count today. Reopening takes the completion
+    back from the day it was counted on (completed_at, or created_at as
+    backfill() assumes when that is unknown), not from today.
+    """
+    today = timezone.localdate()
+    was_completed = None if created else getattr(task, '_loaded_completed', None)
+    deltas = defaultdict(lambda: defaultdict(int))
+    if created:
+        deltas[today]['tasks_created'] += 1
+    if task.completed and (created or was_completed is False):
+        deltas[today]['tasks_completed'] += 1
+    elif not task.completed and was_completed:
+        done_at = getattr(task, '_loaded_completed_at', None) or task.created_at
+        deltas[timezone.localdate(done_at) if done_at else today]['tasks_completed'] -= 1
+    task._loaded_completed = task.completed
+    task._loaded_completed_at = task.completed_at
+    return deltas
+
+
+def record_task(task, created):
+    for day, deltas in _task_deltas(task, created).items():
+        bump(PROJECT, task.project_id, day, **deltas)
+        bump(USER, task.assignee_id, day, **deltas)
+
+
+def bump_many(totals, day=None):
+    """Apply {(scope, object_id): {field: delta}} in a constant number of queries."""
+    totals = {
+        key: {field: delta for field, delta in deltas.items() if delta}
+        for key, deltas in totals.items()
+        if key[1]
+    }
+    totals = {key: deltas for key, deltas in totals.items() if deltas}
+    if not totals:
+        return
+    day = day or timezone.localdate()
+    fields = sorted({field for deltas in totals.values() for field in deltas})
+    with transaction.atomic():
+        existing = {
+            (row.scope, row.object_id): row
+            for scope in (PROJECT, USER)
+            for row in ReportSnapshot.objects.select_for_update().filter(
+                scope=scope, day=day, object_id__in=[pk for s, pk in totals if s == scope]
+            )
+        }
+        for key, row in existing.items():
+            for field, delta in totals[key].items():
+                setattr(row, field, getattr(row, field) + delta)
+        if existing:
+            # An upsert that always hits the conflict branch: a multi-row UPDATE
+            # without bulk_update()'s per-row CASE expressions.
+            ReportSnapshot.objects.bulk_create(
+                list(existing.values()),
+                update_conflicts=True,
+                unique_fields=['scope', 'object_id', 'day'],
+                update_fields=fields,
+            )
+        missing = [key for key in totals if key not in existing]
+        try:
+            with transaction.atomic():
+                ReportSnapshot.objects.bulk_create(
+                    [ReportSnapshot(scope=s, object_id=pk, day=day, **totals[(s, pk)]) for s, pk in missing]
+                )
+        except IntegrityError:
+            # Someone created a row meanwhile; fall back to one upsert each.
+            for scope, object_id in missing:
+                bump(scope, object_id, day, **totals[(scope, object_id)])
+
+
+def record_tasks(tasks, created):
+    """Bulk variant of record_task: rollup rows are updated in bulk, per day."""
+    totals = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
+    for task in tasks:
+        for day, deltas in _task_deltas(task, created).items():
+            for field, delta in deltas.items():
+                totals[day][(PROJECT, task.project_id)][field] += delta
+                totals[day][(USER, task.assignee_id)][field] += delta
+    for day, day_totals in totals.items():
+        bump_many(day_totals, day)
+
+
+def record_post_created(post):
+    bump(USER, post.owner_id, posts_created=1)
+
+
+def record_like(owner_id, delta, day=None):
+    bump(USER, owner_id, day, likes=delta)
+
+
+def history(scope, days=14, object_id=None):
+    """Daily totals for the last ``days`` days, oldest first, zero-filled."""
+    today = timezone.localdate()
+    start = today - timedelta(days=days - 1)
+    qs = ReportSnapshot.objects.filter(scope=scope, day__gte=start)
+    if object_id is not None:
+        qs = qs.filter(object_id=object_id)
+    totals = {
+        row['day']: row
+        for row in qs.values('day').annotate(
+            tasks_created=Sum('tasks_created'),
+            tasks_completed=Sum('tasks_completed'),
+            posts_created=Sum('posts_created'),
+            likes=Sum('likes'),
+        ).order_by()
+    }
+    series = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        row = totals.get(day, {})
+        series.append({'day': day, **{f: row.get(f) or 0 for f in BACKFILLED + ('likes',)}})
+    return series
+
+
+def site_trend(days=14):
+    """Site-wide daily activity: task figures from project rollups, post and
+    like figures from user rollups (each event is counted once per scope)."""
+    tasks = history(PROJECT, days)
+    people = history(USER, days)
+    return [
+        {
+            'day': t['day'],
+            'tasks_created': t['tasks_created'],
+            'tasks_completed': t['tasks_completed'],
+            'posts_created': p['posts_created'],
+            'likes': p['likes'],
+        }
+        for t, p in zip(tasks, people)
+    ]
+
+
+def _collect(values, scope, key, day_field, field, qs):
+    rows = (
+        qs.annotate(day=TruncDate(day_field))
+        .values(key, 'day')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    for row in rows.iterator():
+        if row[key]:
+            values[(scope, row[key], row['day'])][field] += row['n']
+
+
+def backfill(since=None, batch_size=1000):
+    """Rebuild the timestamped rollup fields from Task and Post rows.
+
+    Rows from ``since`` (a date) onwards are recomputed; likes are kept as
+    recorded since older likes carry no date. Returns the rows written.
+    """
+    tasks = Task.objects.all()
+    completed = Task.objects.filter(completed=True)
+    posts = Post.objects.all()
+    snapshots = ReportSnapshot.objects.all()
+    if since:
+        tasks = tasks.filter(created_at__date__gte=since)
+        completed = completed.annotate(done_at=Coalesce('completed_at', 'created_at')).filter(done_at__date__gte=since)
+        posts = posts.filter(created_at__date__gte=since)
+        snapshots = snapshots.filter(day__gte=since)
+
+    values = defaultdict(lambda: dict.fromkeys(BACKFILLED, 0))
+    for scope, key in ((PROJECT, 'project_id'), (USER, 'assignee_id')):
+        _collect(values, scope, key, 'created_at', 'tasks_created', tasks)
+        _collect(values, scope, key, Coalesce('completed_at', 'created_at'), 'tasks_completed', completed)
+    _collect(values, USER, 'owner_id', 'created_at', 'posts_created', posts)
+
+    with transaction.atomic():
+        snapshots.update(**dict.fromkeys(BACKFILLED, 0))
+        existing = {
+            (s.scope, s.object_id, s.day): s
+            for s in snapshots.iterator()
+        }
+        to_update, to_create = [], []
+        for key, fields in values.items():
+            snapshot = existing.get(key)
+            if snapshot is None:
+                scope, object_id, day = key
+                to_create.append(ReportSnapshot(scope=scope, object_id=object_id, day=day, **fields))
+            else:
+                for field, value in fields.items():
+                    setattr(snapshot, field, value)
+                to_update.append(snapshot)
+        ReportSnapshot.objects.bulk_update(to_update, BACKFILLED, batch_size=batch_size)
+        ReportSnapshot.objects.bulk_create(to_create, batch_size=batch_size)
+    return len(to_update) + len(to_create)
@@ -0,0 +1,118 @@
+import threading
+from collections import OrderedDict
+
+from django.db.models import Exists, OuterRef, Q
+
+from . import search
+from .models import Post, Tag
+
+PostTag = Post.tags.through
+
+NAME_MAX_LENGTH = Tag._meta.get_field('name').max_length
+
+# Small per-process LRU of tag name -> id for hot tags. forget() only
+# reaches this process, so ids read from it are re-checked before use.
+CACHE_SIZE = 1024
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def normalize(value):
+    """Clean a comma-separated string (or iterable) of tag names.
+
+    Strips whitespace and leading '#', collapses inner whitespace, trims to
+    the column length and drops case-insensitive duplicates (first wins).
+    """
+    if isinstance(value, str):
+        value = value.split(',')
+    names, seen = [], set()
+    for raw in value or ():
+        name = ' '.join(str(raw).split()).lstrip('#').strip()[:NAME_MAX_LENGTH]
+        if name and name.lower() not in seen:
+            seen.add(name.lower())
+            names.append(name)
+    return names
+
+
+def _cached(names):
+    hits = {}
+    with _lock:
+        for name in names:
+            if name in _cache:
+                _cache.move_to_end(name)
+                hits[name] = _cache[name]
+    return hits
+
+
+def _remember(pairs):
+    with _lock:
+        for name, tag_id in pairs.items():
+            _cache[name] = tag_id
+            _cache.move_to_end(name)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def forget(tag_id=None):
+    """Drop cached ids (all of them, or those pointing at ``tag_id``)."""
+    with _lock:
+        if tag_id is None:
+            _cache.clear()
+        else:
+            for name in [n for n, i in _cache.items() if i == tag_id]:
+                del _cache[name]
+
+
+def resolve(names):
+    """Return {name: id} for ``names``, creating missing tags in bulk."""
+    ids = _cached(names)
+    missing = [n for n in names if n not in ids]
+    if missing:
+        found = dict(Tag.objects.filter(name__in=missing).values_list('name', 'id'))
+        absent = [n for n in missing if n not in found]
+        if absent:
+            Tag.objects.bulk_create([Tag(name=n) for n in absent], ignore_conflicts=True)
+            found.update(Tag.objects.filter(name__in=absent).values_list('name', 'id'))
+        _remember(found)
+        ids.update(found)
+    return ids
+
+
+def _existing_and_linked(post, tag_ids):
+    """Which of ``tag_ids`` still exist, and ``post``'s current tag ids, in one query."""
+    linked = Exists(PostTag.objects.filter(post_id=post.pk, tag_id=OuterRef('pk')))
+    rows = (
+        Tag.objects.annotate(linked=linked)
+        .filter(Q(id__in=tag_ids) | Q(linked=True))
+        .values_list('id', 'linked')
+    )
+    existing, current = set(), set()
+    for tag_id, is_linked in rows:
+        existing.add(tag_id)
+        if is_linked:
+            current.add(tag_id)
+    return existing, current
+
+
+def set_post_tags(post, names):
+    """Make ``post.tags`` exactly ``names`` with set-based through-table writes."""
+    ids = resolve(names)
+    existing, current = _existing_and_linked(post, set(ids.values()))
+    gone = [name for name, tag_id in ids.items() if tag_id not in existing]
+    if gone:
+        # Deleted by another process since we cached them.
+        for name in gone:
+            forget(ids.pop(name))
+        ids.update(resolve(gone))
+    wanted = set(ids.values())
+    stale = current - wanted
+    if stale:
+        PostTag.objects.filter(post_id=post.pk, tag_id__in=stale).delete()
+    added = wanted - current
+    if added:
+        PostTag.objects.bulk_create(
+            [PostTag(post_id=post.pk, tag_id=tag_id) for tag_id in added],
+            ignore_conflicts=True,
+        )
+    if stale or added:
+        search.schedule(search.POST, post.pk)
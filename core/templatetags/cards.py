@@ -0,0 +1,76 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from .. import fragments
+
+register = template.Library()
+
+# Rendered in place of the request's CSRF token while a card is cached, and
+# swapped back on every read, so cards can be shared between sessions.
+CSRF_PLACEHOLDER = "__cardcache_csrf__"
+
+
+def variant_for(user):
+    """Cards differ by role (manager buttons) and by ownership (edit links)."""
+    role = getattr(user, 'role', '')
+
+    def variant(obj):
+        owner_id = getattr(obj, 'owner_id', None)
+        return f"{role}:{int(owner_id is not None and owner_id == user.pk)}"
+    return variant
+
+
+class CardCacheNode(template.Node):
+    def __init__(self, nodelist, name, obj, siblings):
+        self.nodelist = nodelist
+        self.name = name
+        self.obj = obj
+        self.siblings = siblings
+
+    def render(self, context):
+        obj = self.obj.resolve(context)
+        request = context.get('request')
+        if request is None or getattr(obj, 'pk', None) is None or not fragments.enabled():
+            return self.nodelist.render(context)
+        name = self.name.resolve(context)
+        slot = (name, obj._meta.model_name, obj.pk)
+        primed = request.__dict__.setdefault('_cardcache', {})
+        if slot not in primed:
+            # Look the whole loop up at once the first time one of it is drawn.
+            batch = list(self.siblings.resolve(context) or ()) if self.siblings else []
+            if obj not in batch:
+                batch.append(obj)
+            variant = variant_for(context.get('user') or request.user)
+            for pk, entry in fragments.lookup(name, batch, variant).items():
+                primed[(name, obj._meta.model_name, pk)] = entry
+        key, html = primed[slot]
+        if html is None:
+            with context.push(csrf_token=CSRF_PLACEHOLDER):
+                html = self.nodelist.render(context)
+            fragments.store(key, html)
+            primed[slot] = (key, html)
+        if CSRF_PLACEHOLDER in html:
+            html = html.replace(CSRF_PLACEHOLDER, str(context.get('csrf_token', '')))
+        return mark_safe(html)
+
+
+@register.tag
+def cardcache(parser, token):
+    """Cache one card per object, version and viewer variant.
+
+    Usage::
+
+        {% for post in posts %}
+          {% cardcache "post" post posts %}...{% endcardcache %}
+        {% endfor %}
+
+    The optional third argument is the list being looped over; it lets the
+    first card fetch every card of the loop in one cache round trip.
+    """
+    bits = token.split_contents()
+    if len(bits) not in (3, 4):
+        raise template.TemplateSyntaxError(f"'{bits[0]}' takes a name, an object and optionally its siblings.")
+    nodelist = parser.parse(('endcardcache',))
+    parser.delete_first_token()
+    siblings = parser.compile_filter(bits[3]) if len(bits) == 4 else None
+    return CardCacheNode(nodelist, parser.compile_filter(bits[1]), parser.compile_filter(bits[2]), siblings)
@@ -1,3 +1,1515 @@
-from django.test import TestCase
+import asyncio
+import base64
+import csv
+import gzip
+import io
+import json
+import re
+import threading
+import time
 
-# Create your tests here.
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.sessions.models import Session
+from django.core.management import CommandError, call_command
+from django.core import mail
+from django.core.cache import cache, caches
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.models.signals import post_delete
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import bulk, counters, fanout, fragments, history, jobs, likes, outbox, related, reports, search, snapshots, tags, usercache, versions
+from .channel_layers import LocalChannelLayer
+from .forms import PostForm
+from .pagination import encode_cursor, keyset_page
+from .models import Counter, Job, OutboundEmail, Post, PostLike, Project, ReportSnapshot, Tag, Task, User
+from .reports import assignee_workload, project_summary
+
+
+def make_fixture(owner, projects=3, tasks_per_project=4, posts=5):
+    tags = [Tag.objects.get_or_create(name=f"tag{i}")[0] for i in range(3)]
+    for p in range(projects):
+        project = Project.objects.create(name=f"Project {p}", owner=owner)
+        for t in range(tasks_per_project):
+            Task.objects.create(
+                title=f"Task {p}.{t}",
+                description="Something to do",
+                project=project,
+                assignee=owner if t % 2 else None,
+                completed=t % 3 == 0,
+            )
+    for i in range(posts):
+        post = Post.objects.create(title=f"Post {i}", content="Hello", owner=owner)
+        post.tags.set(tags)
+
+
+class QueryBudgetTests(TestCase):
+    """Every view in core/urls.py must render within a fixed query budget.
+
+    Budgets are checked against two data sizes so a view that gains a
+    per-row query (an N+1) fails even when the small fixture still fits.
+    """
+
+    # (url name, kwargs factory, method, budget)
+    VIEWS = [
+        ('dashboard', None, 'get', 1),
+        ('project_list', None, 'get', 3),
+        ('project_create', None, 'get', 1),
+        ('project_update', lambda t: {'project_id': t.project.id}, 'get', 2),
+        ('project_delete', lambda t: {'project_id': t.project.id}, 'get', 2),
+        ('manager_reports', None, 'get', 7),
+        ('manage_users', None, 'get', 2),
+        ('import_data', None, 'get', 1),
+        ('job_list', None, 'get', 2),
+        ('metrics', None, 'get', 1),
+        ('task_list', lambda t: {'project_id': t.project.id}, 'get', 4),
+        ('task_create', lambda t: {'project_id': t.project.id}, 'get', 3),
+        ('all_tasks', None, 'get', 6),
+        ('project_tasks_more', lambda t: {'project_id': t.project.id}, 'get', 2),
+        ('task_update', lambda t: {'project_id': t.project.id, 'task_id': t.task.id}, 'get', 4),
+        ('post_list', None, 'get', 4),
+        ('post_feed', None, 'get', 3),
+        ('post_create', None, 'get', 1),
+        ('post_update', lambda t: {'post_id': t.post.id}, 'get', 4),
+        ('post_delete', lambda t: {'post_id': t.post.id}, 'get', 2),
+        ('profile', None, 'get', 1),
+        ('signup', None, 'get', 1),
+        ('login', None, 'get', 1),
+        ('password_reset', None, 'get', 1),
+        ('password_reset_done', None, 'get', 1),
+        ('password_reset_complete', None, 'get', 1),
+        ('api-root', None, 'get', 1),
+        ('project-list', None, 'get', 2),
+        ('task-list', None, 'get', 2),
+        ('post-list', None, 'get', 3),
+        ('tag-list', None, 'get', 2),
+        ('post-detail', lambda t: {'pk': t.post.id}, 'get', 3),
+        ('search', None, 'get', 1),
+        ('search-list', None, 'get', 1),
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='pw', role='Admin'
+        )
+        make_fixture(self.admin)
+        self.project = Project.objects.first()
+        self.task = self.project.tasks.first()
+        self.post = Post.objects.first()
+        self.client.force_login(self.admin)
+
+    def assertViewBudgets(self):
+        for name, kwargs, method, budget in self.VIEWS:
+            url = reverse(name, kwargs=kwargs(self) if kwargs else None)
+            with self.subTest(view=name):
+                # Warm per-process caches (counters, content types) first.
+                getattr(self.client, method)(url)
+                with self.assertNumQueries(budget):
+                    response = getattr(self.client, method)(url)
+                self.assertLess(response.status_code, 400)
+
+    def test_view_budgets(self):
+        self.assertViewBudgets()
+
+    def test_view_budgets_do_not_grow_with_data(self):
+        make_fixture(self.admin, projects=6, tasks_per_project=8, posts=12)
+        for i in range(8):
+            Task.objects.create(title=f"Extra {i}", description="", project=self.project, assignee=self.admin)
+        self.assertViewBudgets()
+
+    def test_like_toggle_budget(self):
+        url = reverse('like_post', kwargs={'post_id': self.post.id})
+        with self.assertNumQueries(12):
+            self.client.post(url, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+
+class QueryPlanTests(TestCase):
+    """The filters our views rely on must be served by an index."""
+
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Plan assertions are written against SQLite EXPLAIN QUERY PLAN output.')
+        owner = User.objects.create_user(username='o', email='o@example.com', password='pw')
+        make_fixture(owner, projects=2, tasks_per_project=2, posts=2)
+        self.owner = owner
+
+    def assertIndexed(self, queryset, table):
+        plan = queryset.explain()
+        # "SCAN core_task" without "USING ... INDEX" is a full table scan.
+        self.assertNotRegex(plan, rf'SCAN {table}(?! USING)\b', plan)
+
+    def test_task_filters(self):
+        project = Project.objects.first()
+        self.assertIndexed(Task.objects.filter(project=project, completed=False), 'core_task')
+        self.assertIndexed(Task.objects.filter(assignee=self.owner, completed=True), 'core_task')
+        self.assertIndexed(Task.objects.filter(project=project).order_by('-id')[:10], 'core_task')
+
+    def test_post_feed(self):
+        self.assertIndexed(Post.objects.order_by('-created_at', '-id')[:20], 'core_post')
+
+    def test_project_owner(self):
+        self.assertIndexed(Project.objects.filter(owner=self.owner).order_by('-created_at'), 'core_project')
+
+    def test_report_aggregates_run(self):
+        # The aggregations themselves scan by design; just make sure they stay single queries.
+        with self.assertNumQueries(1):
+            list(project_summary())
+        with self.assertNumQueries(1):
+            list(assignee_workload())
+
+    def plans(self, url):
+        """EXPLAIN QUERY PLAN of every app query a request to ``url`` runs."""
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        for query in ctx.captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT') or 'django_session' in sql:
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                yield sql, [row[-1] for row in cursor.fetchall()]
+
+    def test_hot_views_use_indexes(self):
+        project = Project.objects.first()
+        self.owner.role = 'Manager'
+        self.owner.save()
+        self.client.force_login(self.owner)
+        _, cursor = keyset_page(Post.objects.all(), None, 1)
+        urls = [
+            reverse('task_list', kwargs={'project_id': project.id}),
+            reverse('all_tasks'),
+            reverse('all_tasks') + f'?completed=0&assignee={self.owner.id}',
+            reverse('project_tasks_more', kwargs={'project_id': project.id}) + '?completed=1&after=1000',
+            reverse('post_list'),
+            reverse('post_feed') + f'?cursor={cursor}',
+            reverse('manager_reports'),
+            reverse('task-list'),
+            reverse('post-list'),
+            reverse('project-list'),
+        ]
+        for url in urls:
+            for sql, plan in self.plans(url):
+                with self.subTest(url=url, sql=sql[:120]):
+                    for step in plan:
+                        table = re.match(r'SCAN (core_\w+)$', step)
+                        if table:
+                            # A bare scan is only fine as a LIMITed walk in primary key order.
+                            self.assertRegex(sql, rf'ORDER BY "{table.group(1)}"\."id" (ASC|DESC) LIMIT', plan)
+                    if 'USE TEMP B-TREE FOR ORDER BY' in plan:
+                        # Allowed only to re-sort the bounded rows of a sliced prefetch.
+                        self.assertIn('SCAN qualify', plan, plan)
+
+
+class TagServiceTests(TestCase):
+    def setUp(self):
+        tags.forget()
+        self.owner = User.objects.create_user(username='o', email='o@example.com', password='pw')
+        self.post = Post.objects.create(title='t', content='c', owner=self.owner)
+
+    def test_normalize(self):
+        self.assertEqual(tags.normalize(' #django,  Web   Dev , django, ,web dev'), ['django', 'Web Dev'])
+
+    def test_twenty_tags_cost_constant_queries(self):
+        names = [f"tag{i}" for i in range(20)]
+        Tag.objects.bulk_create([Tag(name=n) for n in names[:10]])
+        # lookup, bulk insert, re-read new ids, current links, link insert
+        with self.assertNumQueries(5):
+            tags.set_post_tags(self.post, names)
+        self.assertEqual(self.post.tags.count(), 20)
+        # Ids now come from the LRU: current links and one unlink.
+        with self.assertNumQueries(2):
+            tags.set_post_tags(self.post, names[5:])
+        self.assertEqual(
+            sorted(self.post.tags.values_list('name', flat=True)),
+            sorted(names[5:]),
+        )
+
+    def test_stale_cached_id_is_not_linked(self):
+        tags.set_post_tags(self.post, ['django'])
+        stale_id = Tag.objects.get(name='django').id
+        Tag.objects.filter(id=stale_id).delete()
+        # As if deleted by another worker: this process never heard about it.
+        tags._remember({'django': stale_id})
+        tags.set_post_tags(self.post, ['django', 'web'])
+        self.assertEqual(sorted(self.post.tags.values_list('name', flat=True)), ['django', 'web'])
+        self.assertNotEqual(Tag.objects.get(name='django').id, stale_id)
+        self.assertNotEqual(tags._cached(['django'])['django'], stale_id)
+
+    def test_post_form_sets_tags_once(self):
+        form = PostForm(data={'title': 'x', 'content': 'y', 'tags': 'a, b, a'})
+        self.assertTrue(form.is_valid())
+        post = form.save(commit=False)
+        post.owner = self.owner
+        post.save()
+        form.save_m2m()
+        self.assertEqual(sorted(post.tags.values_list('name', flat=True)), ['a', 'b'])
+
+
+class SparseFieldsTests(TestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user(
+            username='m', email='m@example.com', password='pw', role='Manager'
+        )
+        self.project = Project.objects.create(name='P', owner=self.manager)
+        self.client.force_login(self.manager)
+
+    def test_reads_are_trimmed(self):
+        Task.objects.create(title='t', description='long', project=self.project)
+        row = self.client.get(reverse('task-list'), {'fields': 'title'}).json()['results'][0]
+        self.assertEqual(set(row), {'id', 'title'})
+
+    def test_writes_keep_every_field(self):
+        url = reverse('task-list') + '?fields=title'
+        response = self.client.post(
+            url, {'title': 't', 'description': 'kept', 'project': self.project.id}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        task = Task.objects.get()
+        self.assertEqual((task.description, task.project_id), ('kept', self.project.id))
+        self.assertEqual(response.json()['description'], 'kept')
+
+
+class BulkTaskApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.manager = User.objects.create_user(
+            username='m', email='m@example.com', password='pw', role='Manager'
+        )
+        self.project = Project.objects.create(name='P', owner=self.manager)
+        self.client.force_login(self.manager)
+        self.url = reverse('task-bulk-create')
+
+    def create(self, n):
+        rows = [{'title': f't{i}', 'project': self.project.id, 'assignee': self.manager.id} for i in range(n)]
+        return self.client.post(self.url, rows, content_type='application/json')
+
+    def test_create_cost_is_independent_of_batch_size(self):
+        self.create(1)  # seed counters and today's snapshot rows
+        with CaptureQueriesContext(connection) as small:
+            self.create(5)
+        with CaptureQueriesContext(connection) as large:
+            response = self.create(100)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(counters.snapshot()['tasks'], 106)
+
+    def test_one_notification_batch_per_request(self):
+        ids = self.create(20).json()['ids']
+        OutboundEmail.objects.all().delete()
+        response = self.client.patch(
+            self.url, [{'id': i, 'completed': True} for i in ids], content_type='application/json'
+        )
+        self.assertEqual(response.json(), {'updated': 20})
+        self.assertEqual(Task.objects.filter(completed=True, completed_at__isnull=False).count(), 20)
+        # Owner and assignee are the same person: one summary mail, not 20.
+        self.assertEqual(OutboundEmail.objects.filter(recipient='m@example.com').count(), 1)
+
+        response = self.client.delete(self.url, {'ids': ids}, content_type='application/json')
+        self.assertEqual(response.json(), {'deleted': 20})
+        self.assertFalse(Task.objects.exists())
+        self.assertEqual(counters.snapshot()['tasks'], 0)
+
+    def test_unknown_references_are_rejected(self):
+        response = self.client.post(self.url, [{'title': 'x', 'project': 0}], content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Task.objects.exists())
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.manager = User.objects.create_user(
+            username='m', email='m@example.com', password='pw', role='Manager'
+        )
+        self.other = User.objects.create_user(username='o', email='o@example.com', password='pw')
+        with self.captureOnCommitCallbacks(execute=True):
+            make_fixture(self.manager, projects=2, tasks_per_project=2, posts=2)
+        self.client.force_login(self.manager)
+
+    def revalidate(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_unchanged_pages_answer_304_without_rendering(self):
+        project = Project.objects.first()
+        for url in [
+            reverse('project_list'),
+            reverse('task_list', kwargs={'project_id': project.id}),
+            reverse('all_tasks') + '?completed=0',
+            reverse('post_list'),
+        ]:
+            with self.subTest(url=url):
+                first = self.client.get(url)
+                self.assertEqual(first.status_code, 200)
+                self.assertIn('Last-Modified', first)
+                # The session lookup and the version stamps; the user is cached.
+                with self.assertNumQueries(2):
+                    self.assertEqual(self.revalidate(url, first).status_code, 304)
+
+    def test_writes_change_the_etag(self):
+        url = reverse('task_list', kwargs={'project_id': Project.objects.first().id})
+        first = self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.filter(project__isnull=False).first().save()
+        self.assertEqual(self.revalidate(url, first).status_code, 200)
+
+        url = reverse('post_list')
+        first = self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('like_post', kwargs={'post_id': Post.objects.first().id}))
+        self.assertEqual(self.revalidate(url, first).status_code, 200)
+
+    def test_stamps_are_shared_through_the_database(self):
+        url = reverse('post_list')
+        first = self.client.get(url)
+        # Another worker's cache is empty: the stamps still match.
+        cache.clear()
+        self.assertEqual(self.revalidate(url, first).status_code, 304)
+        # And a write committed by another worker is seen here at once.
+        versions._stamp(['posts'])
+        self.assertEqual(self.revalidate(url, first).status_code, 200)
+
+    def test_renaming_the_viewer_changes_the_etag(self):
+        url = reverse('project_list')
+        first = self.client.get(url)
+        User.objects.filter(pk=self.manager.pk).update(username='boss')
+        cache.clear()  # as the rename's invalidation would
+        response = self.revalidate(url, first)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'boss')
+
+    def test_etag_is_per_user_and_query(self):
+        url = reverse('all_tasks')
+        first = self.client.get(url)
+        self.assertEqual(self.client.get(url + '?page=2', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 200)
+        self.client.force_login(self.other)
+        self.assertEqual(self.revalidate(url, first).status_code, 200)
+
+
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches['fragments'].clear()
+        self.owner = User.objects.create_user(username='o', email='o@example.com', password='pw')
+        self.reader = User.objects.create_user(username='r', email='r@example.com', password='pw')
+        with self.captureOnCommitCallbacks(execute=True):
+            make_fixture(self.owner, projects=1, tasks_per_project=1, posts=10)
+        self.client.force_login(self.owner)
+        self.url = reverse('post_list')
+
+    def misses(self, url):
+        before = fragments.stats()
+        response = self.client.get(url)
+        after = fragments.stats()
+        return response, after['misses'] - before['misses'], after['hits'] - before['hits']
+
+    def test_second_render_reads_cards_from_cache(self):
+        first, misses, hits = self.misses(self.url)
+        self.assertEqual((misses, hits), (10, 0))
+        second, misses, hits = self.misses(self.url)
+        self.assertEqual((misses, hits), (0, 10))
+        self.assertEqual(first.content.count(b'Edit</a>'), 10)
+        # Cached cards carry the current request's CSRF token, not a placeholder.
+        self.assertNotIn(b'__cardcache_csrf__', second.content)
+        self.assertIn(second.context['csrf_token'].encode(), second.content)
+
+    def test_writes_and_viewers_get_their_own_cards(self):
+        self.misses(self.url)
+        post = Post.objects.first()
+        with self.captureOnCommitCallbacks(execute=True):
+            post.title = 'Renamed'
+            post.save()
+        response, misses, hits = self.misses(self.url)
+        self.assertEqual((misses, hits), (1, 9))
+        self.assertContains(response, 'Renamed')
+
+        self.client.force_login(self.reader)
+        response, misses, hits = self.misses(self.url)
+        self.assertEqual(misses, 10)
+        self.assertNotContains(response, 'Edit</a>')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.owner.username = 'owner2'
+            self.owner.save()
+        response, misses, hits = self.misses(self.url)
+        self.assertEqual(misses, 10)
+        self.assertContains(response, 'by owner2')
+
+    @override_settings(CACHE_SHARED=False)
+    def test_not_cached_without_a_shared_cache(self):
+        response, misses, hits = self.misses(self.url)
+        self.assertEqual((misses, hits), (0, 0))
+        self.assertEqual(response.content.count(b'Edit</a>'), 10)
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='o', email='o@example.com', password='pw', role='Manager')
+        self.client.force_login(self.owner)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project = Project.objects.create(name='P', owner=self.owner)
+            self.in_title = Post.objects.create(title='Release checklist', content='Steps before shipping', owner=self.owner)
+            self.in_body = Post.objects.create(title='Notes', content='The release went fine', owner=self.owner)
+            self.task = Task.objects.create(title='Write release notes', description='checklist too', project=self.project)
+
+    def ids(self, query, kind=None):
+        return [(doc.kind, doc.object_id) for doc in search.search(query, kind)]
+
+    def test_ranked_and_incremental(self):
+        self.assertEqual(
+            self.ids('release'),
+            [('task', self.task.id), ('post', self.in_title.id), ('post', self.in_body.id)],
+        )
+        self.assertEqual(self.ids('release checklist'), [('post', self.in_title.id), ('task', self.task.id)])
+        self.assertEqual(self.ids('release', kind='task'), [('task', self.task.id)])
+        self.assertEqual(self.ids('the'), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.in_body.delete()
+            self.task.title = 'Write notes'
+            self.task.save()
+        self.assertEqual(self.ids('release'), [('post', self.in_title.id)])
+
+    def test_tags_are_indexed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            tags.set_post_tags(self.in_body, ['deploy'])
+        self.assertEqual(self.ids('deploy'), [('post', self.in_body.id)])
+        with self.captureOnCommitCallbacks(execute=True):
+            tag = Tag.objects.get(name='deploy')
+            tag.name = 'rollout'
+            tag.save()
+        self.assertEqual(self.ids('deploy'), [])
+        self.assertEqual(self.ids('rollout'), [('post', self.in_body.id)])
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.get(name='rollout').delete()
+        self.assertEqual(self.ids('rollout'), [])
+
+    def test_views(self):
+        response = self.client.get(reverse('search'), {'q': 'checklist'})
+        self.assertContains(response, 'Release checklist')
+        response = self.client.get(reverse('search-list'), {'q': 'checklist', 'kind': 'post'})
+        self.assertEqual([r['object_id'] for r in response.json()['results']], [self.in_title.id])
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='pw', role='Admin'
+        )
+        make_fixture(self.admin, projects=2, tasks_per_project=3, posts=2)
+        self.client.force_login(self.admin)
+
+    def body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_filtered_csv_stream(self):
+        url = reverse('export_data', kwargs={'dataset': 'tasks', 'fmt': 'csv'})
+        response = self.client.get(url, {'completed': 'true'})
+        self.assertTrue(response.streaming)
+        lines = self.body(response).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:4], ['id', 'project_id', 'project', 'title'])
+        self.assertEqual(len(lines) - 1, Task.objects.filter(completed=True).count())
+
+    def test_gzipped_ndjson_with_tags(self):
+        url = reverse('export_data', kwargs={'dataset': 'posts', 'fmt': 'ndjson'})
+        response = self.client.get(url, {'gzip': '1'})
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        rows = [json.loads(line) for line in gzip.decompress(self.body(response)).splitlines()]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['tags'], 'tag0,tag1,tag2')
+
+    def test_bad_filter_and_access(self):
+        url = reverse('export_data', kwargs={'dataset': 'tasks', 'fmt': 'csv'})
+        self.assertEqual(self.client.get(url, {'created_after': 'soon'}).status_code, 400)
+        self.client.force_login(User.objects.create_user(username='s', email='s@example.com', password='pw'))
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+
+class ImportTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='pw', role='Admin'
+        )
+        self.client.force_login(self.admin)
+
+    def upload(self, dataset, name, content, **extra):
+        upload = SimpleUploadedFile(name, content.encode())
+        return self.client.post(reverse('import_data'), {'dataset': dataset, 'file': upload, **extra})
+
+    def test_users_csv_reports_bad_rows(self):
+        content = (
+            'email,username,role\n'
+            'ann@example.com,ann,Manager\n'
+            'admin@example.com,other,Staff\n'
+            'not-an-email,bob,Staff\n'
+            'cy@example.com,,Boss\n'
+            'dee@example.com,,\n'
+        )
+        response = self.upload('users', 'users.csv', content)
+        result = response.context['result']
+        self.assertEqual((result['rows'], result['created'], result['failed']), (5, 2, 3))
+        self.assertEqual([line for line, _ in result['errors']], [3, 4, 5])
+        self.assertEqual(User.objects.get(username='ann').role, 'Manager')
+        self.assertFalse(User.objects.get(username='dee').has_usable_password())
+
+    def test_usernames_with_at_signs_and_bad_characters_are_row_errors(self):
+        User.objects.create_user(username='ann@work', email='ann@example.com', password='pw')
+        content = (
+            'email,username\n'
+            'ann2@example.com,ann@work\n'
+            'bob@example.com,bob smith\n'
+            'cy@example.com,cy@home\n'
+        )
+        result = self.upload('users', 'users.csv', content).context['result']
+        self.assertEqual((result['created'], result['failed']), (1, 2))
+        self.assertEqual([line for line, _ in result['errors']], [2, 3])
+        self.assertIn('already exists', result['errors'][0][1])
+        self.assertTrue(User.objects.filter(username='cy@home').exists())
+
+    def test_malformed_csv_is_an_import_error(self):
+        response = self.upload('projects', 'p.csv', 'name,owner\n' + 'x' * 200000 + ',admin\n')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context['result'])
+        self.assertIn('Malformed CSV at line', response.context['form'].errors['file'][0])
+
+    def test_tasks_json_resolves_names_with_one_summary(self):
+        project = Project.objects.create(name='Launch', owner=self.admin)
+        rows = [
+            {'title': f'Task {i}', 'project': 'Launch', 'assignee': 'admin@example.com', 'completed': i % 2 == 0}
+            for i in range(5)
+        ] + [{'title': 'Orphan', 'project': 'Nope'}]
+        OutboundEmail.objects.all().delete()
+        before = counters.snapshot()['tasks']
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.upload('tasks', 'tasks.json', json.dumps(rows), format='')
+        result = response.context['result']
+        self.assertEqual((result['created'], result['failed']), (5, 1))
+        self.assertEqual(project.tasks.filter(assignee=self.admin, completed=True).count(), 3)
+        self.assertEqual(counters.snapshot()['tasks'], before + 5)
+        self.assertEqual(OutboundEmail.objects.filter(recipient='admin@example.com').count(), 1)
+        self.assertEqual(search.search('task', 'task').count(), 5)
+
+    def test_dry_run_writes_nothing(self):
+        response = self.upload('projects', 'p.ndjson', '{"name": "X", "owner": "admin"}\n', dry_run='on')
+        self.assertEqual(response.context['result']['failed'], 0)
+        self.assertFalse(Project.objects.exists())
+
+
+class LocalChannelLayerTests(TestCase):
+    def test_group_send_reaches_waiting_receivers_from_another_thread(self):
+        layer = LocalChannelLayer()
+
+        async def scenario():
+            a, b = await layer.new_channel(), await layer.new_channel()
+            self.assertRegex(a, r'^specific\.inmemory![0-9a-f]+$')
+            await layer.group_add('user_1', a)
+            await layer.group_add('user_1', b)
+            waiting = asyncio.gather(layer.receive(a), layer.receive(b))
+            await asyncio.sleep(0)
+            # fanout.flush() sends from a request thread with its own loop.
+            sender = threading.Thread(target=async_to_sync(layer.group_send), args=('user_1', {'type': 'notify', 'n': 1}))
+            sender.start()
+            received = await asyncio.wait_for(waiting, 2)
+            sender.join()
+            return received
+
+        self.assertEqual(async_to_sync(scenario)(), [{'type': 'notify', 'n': 1}] * 2)
+        self.assertEqual(layer.stats()['received'], 2)
+
+    def test_capacity_and_expiry(self):
+        layer = LocalChannelLayer(capacity=2)
+
+        async def fill():
+            channel = await layer.new_channel()
+            await layer.group_add('user_1', channel)
+            for n in range(3):
+                await layer.group_send('user_1', {'type': 'notify', 'n': n})
+            return await layer.receive(channel)
+
+        self.assertEqual(async_to_sync(fill)(), {'type': 'notify', 'n': 0})
+        self.assertEqual(layer.stats()['dropped'], 1)
+
+        layer = LocalChannelLayer(expiry=-1)
+
+        async def expire():
+            channel = await layer.new_channel()
+            await layer.group_add('user_1', channel)
+            await layer.group_send('user_1', {'type': 'notify'})
+            await layer.group_send('user_1', {'type': 'notify'})
+
+        async_to_sync(expire)()
+        # A member that never reads is dropped from its groups.
+        self.assertEqual((layer.stats()['expired'], layer.stats()['groups']), (1, 0))
+
+
+class NotificationHistoryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_flush_numbers_and_logs_each_users_events(self):
+        with fanout.batch():
+            fanout._committed(1, {'kind': 'task', 'n': 1})
+            fanout._committed(2, {'kind': 'task', 'n': 2})
+            fanout._committed(1, {'kind': 'task', 'n': 3})
+        current, events = history.since(1, 0)
+        self.assertEqual(current, 2)
+        self.assertEqual([(e['seq'], e['n']) for e in events], [(1, 1), (2, 3)])
+        self.assertEqual(history.since(1, 1)[1], [events[1]])
+        self.assertEqual(history.since(2, None), (1, []))
+
+    def test_gap_beyond_the_ring_asks_for_resync(self):
+        with self.settings(NOTIFICATION_HISTORY_SIZE=3):
+            history.record([(1, {'n': n}) for n in range(5)])
+            self.assertEqual([e['n'] for e in history.since(1, 2)[1]], [2, 3, 4])
+            self.assertEqual(history.since(1, 1), (5, None))
+            # A counter reset (e.g. cache restart) is a gap as well.
+            self.assertEqual(history.since(1, 9), (5, None))
+
+    @override_settings(CACHE_SHARED=False)
+    def test_no_numbering_without_a_shared_cache(self):
+        self.assertEqual(history.record([(1, {'n': 1})]), [(1, {'n': 1})])
+        self.assertIsNone(cache.get(history.SEQUENCE_KEY.format(1)))
+
+
+class NotificationContextTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='o', email='o@example.com', password='pw')
+        self.assignee = User.objects.create_user(username='a', email='a@example.com', password='pw')
+        project = Project.objects.create(name='P', owner=self.owner)
+        self.tasks = [Task.objects.create(title=f't{i}', project=project, assignee=self.assignee) for i in range(3)]
+
+    def lookups(self, queries):
+        # Related-row reads only; the outbox's recipient preference query is its own.
+        return [
+            q['sql'] for q in queries
+            if q['sql'].startswith('SELECT') and re.search(r'FROM "core_(user|project)"', q['sql'])
+            and 'notification_mode' not in q['sql']
+        ]
+
+    def test_task_save_resolves_related_rows_in_two_queries(self):
+        task = Task.objects.get(pk=self.tasks[0].pk)
+        with CaptureQueriesContext(connection) as ctx:
+            task.save()
+        # project + owner in one, assignee in the other
+        self.assertEqual(len(self.lookups(ctx.captured_queries)), 2)
+
+    def test_scope_shares_lookups_between_saves(self):
+        tasks = list(Task.objects.all())
+        with related.scope(), CaptureQueriesContext(connection) as ctx:
+            for task in tasks:
+                task.save()
+            task.delete()
+        self.assertEqual(len(self.lookups(ctx.captured_queries)), 2)
+        context = related.for_tasks(tasks[:1])[tasks[0].pk]
+        self.assertEqual((context['owner']['email'], context['assignee']['username']), ('o@example.com', 'a'))
+
+    def test_user_change_is_not_served_stale(self):
+        with related.scope():
+            related.for_tasks(self.tasks)
+            self.owner.email = 'new@example.com'
+            self.owner.save()
+            self.assertEqual(related.projects([self.tasks[0].project_id])[self.tasks[0].project_id]['owner__email'], 'new@example.com')
+
+
+class ProjectDeletionTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='o', email='o@example.com', password='pw', role='Manager')
+        self.assignee = User.objects.create_user(username='a', email='a@example.com', password='pw')
+        self.project = Project.objects.create(name='Doomed', owner=self.owner)
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk.create_tasks([
+                {'title': f'task {i}', 'project': self.project.id, 'assignee': self.assignee.id if i % 2 else None}
+                for i in range(25)
+            ])
+        OutboundEmail.objects.all().delete()
+
+    def test_chunked_delete_notifies_once(self):
+        self.assertEqual(search.search('task', 'task').count(), 25)
+        before = counters.snapshot()
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(bulk.delete_project(self.project, chunk_size=10), 25)
+        self.assertFalse(Task.objects.exists() or Project.objects.exists())
+        # Three chunks, each a constant number of queries.
+        self.assertLess(len(ctx.captured_queries), 45)
+        after = counters.snapshot()
+        self.assertEqual((after['tasks'], after['projects']), (before['tasks'] - 25, before['projects'] - 1))
+        self.assertFalse(search.search('task', 'task').exists())
+        for email in ('o@example.com', 'a@example.com'):
+            self.assertEqual(OutboundEmail.objects.filter(recipient=email).count(), 1)
+        self.assertIn('Tasks deleted: 25', OutboundEmail.objects.get(recipient='o@example.com').body)
+
+    def test_nothing_references_tasks(self):
+        # bulk._delete_tasks() skips cascades; a new FK or M2M to Task needs it revisited.
+        self.assertEqual([rel.related_model for rel in Task._meta.related_objects], [])
+        self.assertEqual(Task._meta.many_to_many, ())
+
+    def test_tasks_are_deleted_without_the_collector(self):
+        deleted = []
+
+        def receiver(sender, instance, **kwargs):
+            deleted.append(instance.pk)
+
+        post_delete.connect(receiver, sender=Task)
+        self.addCleanup(post_delete.disconnect, receiver, sender=Task)
+        with CaptureQueriesContext(connection) as ctx:
+            bulk.delete_project(self.project, chunk_size=10)
+        self.assertEqual(deleted, [])
+        # Each chunk is one DELETE; the Collector would re-select the rows first.
+        task_deletes = [q for q in ctx.captured_queries if q['sql'].startswith('DELETE FROM "core_task"')]
+        self.assertEqual(len(task_deletes), 3)
+
+    def test_view_uses_pipeline(self):
+        self.client.force_login(self.owner)
+        self.client.post(reverse('project_delete', kwargs={'project_id': self.project.id}))
+        self.assertFalse(Project.objects.exists())
+        self.assertEqual(OutboundEmail.objects.filter(recipient='a@example.com').count(), 1)
+
+
+class JobTests(TestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user(username='m', email='m@example.com', password='pw', role='Manager')
+        self.project = Project.objects.create(name='Big', owner=self.manager)
+        bulk.create_tasks([{'title': f't{i}', 'project': self.project.id} for i in range(30)])
+        self.client.force_login(self.manager)
+
+    def test_large_project_delete_is_queued_and_run_by_worker(self):
+        with self.settings(PROJECT_DELETE_INLINE_MAX_TASKS=10):
+            response = self.client.post(reverse('project_delete', kwargs={'project_id': self.project.id}))
+        self.assertRedirects(response, reverse('job_list'))
+        job = Job.objects.get()
+        self.assertEqual((job.kind, job.status, job.user), ('delete_project', Job.STATUS_QUEUED, self.manager))
+        self.assertTrue(Project.objects.exists())
+
+        jobs.work(once=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.progress, job.total, job.result), (Job.STATUS_SUCCEEDED, 30, 30, {'deleted': 30}))
+        self.assertFalse(Project.objects.exists())
+        status = self.client.get(reverse('job_status', kwargs={'job_id': job.id})).json()
+        self.assertEqual((status['event'], status['progress']), ('succeeded', 30))
+
+    def test_deleting_an_owner_of_large_projects_is_queued(self):
+        admin = User.objects.create_user(username='ad', email='ad@example.com', password='pw', role='Admin')
+        self.client.force_login(admin)
+        with self.settings(PROJECT_DELETE_INLINE_MAX_TASKS=10):
+            response = self.client.post(reverse('delete_user', kwargs={'user_id': self.manager.id}))
+        self.assertRedirects(response, reverse('job_list'))
+        job = Job.objects.get()
+        self.assertEqual((job.kind, job.user), ('delete_user', admin))
+        self.manager.refresh_from_db()
+        self.assertFalse(self.manager.is_active)
+        self.assertEqual(Task.objects.count(), 30)
+
+        jobs.work(once=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.progress, job.result), (Job.STATUS_SUCCEEDED, 30, {'deleted': 30}))
+        self.assertFalse(User.objects.filter(id=self.manager.id).exists() or Project.objects.exists())
+
+    def test_cancel_queued_and_running(self):
+        queued = jobs.enqueue('delete_project', user=self.manager, project_id=self.project.id)
+        self.client.post(reverse('job_cancel', kwargs={'job_id': queued.id}))
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Job.STATUS_CANCELLED)
+
+        queued = jobs.enqueue('delete_project', user=self.manager, project_id=self.project.id)
+        running = jobs.claim()
+        self.assertEqual(running.id, queued.id)
+        self.assertTrue(jobs.cancel(running))
+        jobs.run(running)
+        self.assertEqual(running.status, Job.STATUS_CANCELLED)
+        self.assertEqual(Task.objects.count(), 30)
+
+    def test_pending_jobs_are_not_queued_twice(self):
+        first = jobs.enqueue('delete_project', user=self.manager, project_id=self.project.id)
+        self.assertEqual(jobs.enqueue('delete_project', user=self.manager, project_id=self.project.id), first)
+        self.assertEqual(jobs.claim().id, first.id)
+        self.assertEqual(jobs.enqueue('delete_project', user=self.manager, project_id=self.project.id), first)
+        other = jobs.enqueue('delete_project', user=self.manager, project_id=self.project.id + 1)
+        self.assertNotEqual(other, first)
+
+    def test_late_finish_does_not_overwrite_a_stale_failure(self):
+        job = jobs.enqueue('backfill_snapshots', user=self.manager)
+        job = jobs.claim()
+        Job.objects.filter(id=job.id).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(jobs.fail_stale(), 1)
+        jobs._finish(job, Job.STATUS_SUCCEEDED, result={'written': 0})
+        self.assertEqual((job.status, job.result), (Job.STATUS_FAILED, None))
+        # Nor one that was handed to another worker.
+        job = jobs.enqueue('backfill_snapshots', user=self.manager)
+        job = jobs.claim(worker='a')
+        Job.objects.filter(id=job.id).update(worker='b')
+        jobs._finish(job, Job.STATUS_SUCCEEDED)
+        self.assertEqual(Job.objects.get(id=job.id).status, Job.STATUS_RUNNING)
+
+    def test_failures_are_recorded_and_jobs_are_private(self):
+        job = jobs.enqueue('import', user=self.manager, dataset='tasks', path='imports/missing.csv', fmt='csv')
+        jobs.work(once=True)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_FAILED)
+        self.assertTrue(job.error)
+        self.client.force_login(User.objects.create_user(username='s', email='s@example.com', password='pw'))
+        self.assertEqual(self.client.get(reverse('job_status', kwargs={'job_id': job.id})).status_code, 404)
+
+
+class JobHeartbeatTests(TransactionTestCase):
+    def test_silent_handler_keeps_its_heartbeat(self):
+        jobs.HANDLERS['sleep'] = lambda context: time.sleep(0.3)
+        self.addCleanup(jobs.HANDLERS.pop, 'sleep')
+        jobs.enqueue('sleep')
+        job = jobs.claim()
+        with self.settings(JOB_HEARTBEAT_INTERVAL=0.05):
+            jobs.run(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_SUCCEEDED)
+        self.assertGreater(job.heartbeat_at, job.started_at)
+
+
+class CachedAuthTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.manager = User.objects.create_user(username='m', email='m@example.com', password='pw', role='Manager')
+        self.client.force_login(self.manager)
+
+    def user_reads(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        # The auth lookup, not the report's per-assignee totals.
+        reads = [q for q in ctx.captured_queries if 'FROM "core_user" WHERE "core_user"."id" =' in q['sql']]
+        return response, len(reads)
+
+    def test_second_request_resolves_user_from_cache(self):
+        hits = usercache.stats()['hits']
+        self.assertEqual(self.user_reads(reverse('manager_reports'))[1], 1)
+        response, reads = self.user_reads(reverse('manager_reports'))
+        self.assertEqual((response.status_code, reads), (200, 0))
+        self.assertEqual(usercache.stats()['hits'], hits + 1)
+
+    def test_role_change_and_password_change_invalidate(self):
+        self.client.get(reverse('manager_reports'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.manager.role = 'Staff'
+            self.manager.save()
+        self.assertEqual(self.client.get(reverse('manager_reports')).status_code, 302)
+
+        self.client.get(reverse('dashboard'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.manager.set_password('new')
+            self.manager.save()
+        # The session hash no longer matches: logged out.
+        self.assertEqual(self.client.get(reverse('manager_reports')).status_code, 302)
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+    def test_password_hash_is_not_cached(self):
+        self.client.get(reverse('dashboard'))
+        _, user, _ = cache.get(usercache.USER_KEY.format(self.manager.id))
+        self.assertNotIn('password', user.__dict__)
+        # Still there when something asks for it.
+        self.assertTrue(user.check_password('pw'))
+
+    @override_settings(CACHE_SHARED=False)
+    def test_not_cached_without_a_shared_cache(self):
+        self.user_reads(reverse('manager_reports'))
+        response, reads = self.user_reads(reverse('manager_reports'))
+        self.assertEqual((response.status_code, reads), (200, 1))
+        self.assertIsNone(cache.get(usercache.USER_KEY.format(self.manager.id)))
+
+
+def session_queries(ctx):
+    return sum('django_session' in q['sql'] for q in ctx.captured_queries)
+
+
+class SessionBackendTests(TestCase):
+    def setUp(self):
+        caches['sessions'].clear()
+        self.admin = User.objects.create_user(username='a', email='a@example.com', password='pw', role='Admin')
+        self.staff = User.objects.create_user(username='s', email='s@example.com', password='pw', role='Staff')
+
+    def visit(self, method, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(self.client, method)(url)
+        return response, session_queries(ctx)
+
+    def test_db_engine_reads_the_table_on_every_request(self):
+        self.client.force_login(self.admin)
+        self.assertEqual(self.visit('get', reverse('dashboard'))[1], 1)
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+    def test_cached_db_reads_from_the_cache(self):
+        self.client.force_login(self.admin)
+        response, reads = self.visit('get', reverse('dashboard'))
+        self.assertEqual((response.status_code, reads), (200, 0))
+        self.assertTrue(Session.objects.exists())
+
+    @override_settings(
+        SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies',
+        MESSAGE_STORAGE='django.contrib.messages.storage.cookie.CookieStorage',
+    )
+    def test_signed_cookies_and_cookie_messages_skip_the_table(self):
+        self.client.force_login(self.admin)
+        response, writes = self.visit('post', reverse('toggle_user_role', args=[self.staff.id]))
+        self.assertEqual((response.status_code, writes), (302, 0))
+        response, reads = self.visit('get', reverse('manage_users'))
+        self.assertEqual(reads, 0)
+        self.assertContains(response, "Updated s&#x27;s role to Manager.")
+        self.assertFalse(Session.objects.exists())
+
+    def test_cleanup_sessions(self):
+        self.client.force_login(self.admin)
+        live = self.client.session.session_key
+        expired = Session.objects.create(session_key='x' * 32, session_data='', expire_date=timezone.now() - timedelta(days=1))
+        call_command('cleanup_sessions', batch_size=1, stdout=io.StringIO())
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), [live])
+        self.assertFalse(Session.objects.filter(pk=expired.pk).exists())
+        with self.assertRaises(CommandError):
+            call_command('cleanup_sessions', all=True, stdout=io.StringIO())
+        with override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies'):
+            call_command('cleanup_sessions', all=True, stdout=io.StringIO())
+        self.assertFalse(Session.objects.exists())
+
+
+class FailingEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionError('mail server down')
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='u', email='u@example.com', password='pw')
+
+    def test_task_write_and_its_email_share_a_transaction(self):
+        manager = User.objects.create_user(username='m', email='m@example.com', password='pw', role='Manager')
+        project = Project.objects.create(name='P', owner=manager)
+        self.client.force_login(manager)
+        with mock.patch('core.outbox.enqueue', side_effect=RuntimeError('outbox down')):
+            with self.assertRaises(RuntimeError):
+                self.client.post(reverse('task_create', kwargs={'project_id': project.id}), {'title': 't', 'description': 'd'})
+            with self.assertRaises(RuntimeError):
+                self.client.post(reverse('task-list'), {'title': 't', 'description': 'd', 'project': project.id}, content_type='application/json')
+        self.assertFalse(Task.objects.exists())
+
+    def test_delivers_and_dedupes_identical_rows(self):
+        outbox.enqueue(['u@example.com'], 'Task assigned', 'You have a task')
+        outbox.enqueue(['u@example.com'], 'Task assigned', 'You have a task')
+        outbox.enqueue(['u@example.com'], 'Task done', 'Finished')
+        now = timezone.now()
+        self.assertEqual(outbox.drain(now=now), (2, 0))
+        self.assertEqual(sorted(m.subject for m in mail.outbox), ['Task assigned', 'Task done'])
+        self.assertEqual(mail.outbox[0].to, ['u@example.com'])
+        self.assertEqual(OutboundEmail.objects.filter(status=OutboundEmail.STATUS_SENT).count(), 3)
+        self.assertEqual(outbox.drain(now=now), (0, 0))
+
+    @override_settings(EMAIL_BACKEND='core.tests.FailingEmailBackend', OUTBOX_MAX_ATTEMPTS=3)
+    def test_failures_back_off_then_give_up(self):
+        row, = outbox.enqueue(['u@example.com'], 'Hi', 'Body')
+        now = timezone.now()
+        self.assertEqual(outbox.drain(now=now), (0, 1))
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), (OutboundEmail.STATUS_PENDING, 1))
+        self.assertEqual(row.next_attempt_at, now + timedelta(seconds=30))
+        self.assertIn('mail server down', row.last_error)
+        # Not due again until the backoff has passed.
+        self.assertEqual(outbox.drain(now=now + timedelta(seconds=29)), (0, 0))
+
+        self.assertEqual(outbox.drain(now=now + timedelta(seconds=30)), (0, 1))
+        row.refresh_from_db()
+        self.assertEqual(row.next_attempt_at, now + timedelta(seconds=90))
+
+        self.assertEqual(outbox.drain(now=now + timedelta(seconds=90)), (0, 1))
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), (OutboundEmail.STATUS_FAILED, 3))
+        self.assertEqual(outbox.drain(now=now + timedelta(days=1)), (0, 0))
+
+    def test_claimed_rows_wait_for_the_lease(self):
+        row, = outbox.enqueue(['u@example.com'], 'Hi', 'Body')
+        now = timezone.now()
+        # A worker that claimed the row and died before recording the result.
+        OutboundEmail.objects.filter(pk=row.pk).update(
+            status=OutboundEmail.STATUS_SENDING, next_attempt_at=now + timedelta(seconds=300)
+        )
+        self.assertEqual(outbox.drain(now=now), (0, 0))
+        self.assertEqual(outbox.drain(now=now + timedelta(seconds=300)), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_process_outbox_command(self):
+        outbox.enqueue(['u@example.com'], 'Hi', 'Body')
+        out = io.StringIO()
+        call_command('process_outbox', stdout=out)
+        self.assertIn('sent=1 failed=0', out.getvalue())
+        self.assertEqual(len(mail.outbox), 1)
+
+
+@override_settings(DIGEST_WINDOW_SECONDS=60, DIGEST_MAX_EVENTS=50)
+class DigestTests(TestCase):
+    def setUp(self):
+        self.digest = User.objects.create_user(
+            username='d', email='d@example.com', password='pw', notification_mode=User.NOTIFY_DIGEST
+        )
+        self.other = User.objects.create_user(
+            username='e', email='e@example.com', password='pw', notification_mode=User.NOTIFY_DIGEST
+        )
+
+    def test_rows_are_held_then_folded_per_recipient(self):
+        for subject in ['Task A created', 'Task B created', 'Task A created']:
+            outbox.enqueue(['d@example.com', 'e@example.com'], subject, subject)
+        now = timezone.now()
+        self.assertEqual(outbox.drain(now=now), (0, 0))
+        self.assertEqual(outbox.drain(now=now + timedelta(seconds=59)), (0, 0))
+        self.assertEqual(mail.outbox, [])
+
+        self.assertEqual(outbox.drain(now=now + timedelta(seconds=60)), (2, 0))
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ['d@example.com', 'e@example.com'])
+        summary = mail.outbox[0]
+        # Duplicate events appear once in the summary.
+        self.assertEqual(summary.subject, '[InsightHub] 2 updates')
+        self.assertEqual(summary.body.count('- Task A created'), 1)
+        self.assertIn('- Task B created', summary.body)
+        self.assertFalse(OutboundEmail.objects.exclude(status=OutboundEmail.STATUS_SENT).exists())
+
+    @override_settings(DIGEST_MAX_EVENTS=3)
+    def test_full_digest_goes_out_early(self):
+        for i in range(3):
+            outbox.enqueue(['d@example.com'], f'Event {i}', 'x')
+        self.assertEqual(outbox.drain(now=timezone.now()), (1, 0))
+        self.assertEqual(mail.outbox[0].subject, '[InsightHub] 3 updates')
+
+    def test_immediate_and_off_modes(self):
+        User.objects.filter(pk=self.other.pk).update(notification_mode=User.NOTIFY_IMMEDIATE)
+        User.objects.filter(pk=self.digest.pk).update(notification_mode=User.NOTIFY_OFF)
+        rows = outbox.enqueue(['d@example.com', 'e@example.com'], 'Task created', 'Body')
+        self.assertEqual([(r.recipient, r.is_digest) for r in rows], [('e@example.com', False)])
+        self.assertEqual(outbox.drain(now=timezone.now()), (1, 0))
+        self.assertEqual((mail.outbox[0].to, mail.outbox[0].subject), (['e@example.com'], 'Task created'))
+
+
+class RecordingLayer:
+    def __init__(self):
+        self.sent = []
+
+    async def group_send(self, group, message):
+        self.sent.append((group, message['payload']))
+
+
+class FanoutBatchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_equal_payloads_are_sent_once_per_user(self):
+        layer = RecordingLayer()
+        with mock.patch('core.fanout.get_channel_layer', return_value=layer):
+            with fanout.batch():
+                for user_id in (1, 1, 2):
+                    # Built separately each time, as two signal receivers would.
+                    fanout._committed(user_id, {'kind': 'task', 'task_id': 7, 'title': 'x'})
+                fanout._committed(1, {'kind': 'task', 'task_id': 8, 'title': 'x'})
+                self.assertEqual(layer.sent, [])
+        self.assertEqual(
+            layer.sent,
+            [
+                ('user_1', {'kind': 'task', 'task_id': 7, 'title': 'x', 'seq': 1}),
+                ('user_2', {'kind': 'task', 'task_id': 7, 'title': 'x', 'seq': 1}),
+                ('user_1', {'kind': 'task', 'task_id': 8, 'title': 'x', 'seq': 2}),
+            ],
+        )
+        self.assertEqual([e['task_id'] for e in history.since(1, 0)[1]], [7, 8])
+        self.assertEqual(len(history.since(2, 0)[1]), 1)
+
+
+class CounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username='o', email='o@example.com', password='pw')
+        make_fixture(self.owner, projects=2, tasks_per_project=3, posts=1)
+
+    def test_reconcile_command_fixes_drift(self):
+        self.assertEqual(counters.snapshot()['tasks'], 6)
+        Counter.objects.filter(name='tasks').update(value=42)
+        out = io.StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('reconcile_counters', stdout=out)
+        self.assertIn('tasks: 6 (corrected by -36)', out.getvalue())
+        self.assertIn('projects: 2\n', out.getvalue())
+        self.assertEqual(Counter.objects.get(name='tasks').value, 6)
+        self.assertEqual(counters.snapshot()['tasks'], 6)
+
+    def test_snapshot_read_racing_a_bump_is_not_cached(self):
+        counters.snapshot()
+        counters._invalidate()
+        read = counters._read
+
+        def read_then_concurrent_write():
+            values = read()
+            # Another request commits a new task before this one stores its copy.
+            with self.captureOnCommitCallbacks(execute=True):
+                Task.objects.create(title='late', description='', project=Project.objects.first())
+            return values
+
+        with mock.patch('core.counters._read', side_effect=read_then_concurrent_write):
+            self.assertEqual(counters.snapshot()['tasks'], 6)
+        self.assertEqual(counters.snapshot()['tasks'], 7)
+
+    @override_settings(CACHE_SHARED=False)
+    def test_rows_are_read_without_a_shared_cache(self):
+        counters.snapshot()
+        # A write committed by another worker, whose invalidation never reaches this one.
+        Counter.objects.filter(name='tasks').update(value=7)
+        self.assertEqual(counters.snapshot()['tasks'], 7)
+        self.assertIsNone(cache.get(counters.CACHE_KEY))
+
+
+class LikeToggleTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='o', email='o@example.com', password='pw')
+        self.fan = User.objects.create_user(username='f', email='f@example.com', password='pw')
+        self.post = Post.objects.create(title='t', content='c', owner=self.owner)
+
+    def likes_on(self, day):
+        row = ReportSnapshot.objects.filter(scope=ReportSnapshot.SCOPE_USER, object_id=self.owner.id, day=day).first()
+        return row.likes if row else 0
+
+    def test_like_unlike_and_double_toggle(self):
+        today = timezone.localdate()
+        self.assertEqual(likes.toggle_like(self.post.id, self.fan.id), (True, 1))
+        self.assertEqual(likes.toggle_like(self.post.id, self.owner.id), (True, 2))
+        self.assertEqual(likes.toggle_like(self.post.id, self.fan.id), (False, 1))
+        self.assertEqual(likes.toggle_like(self.post.id, self.fan.id), (True, 2))
+        self.assertEqual(
+            sorted(self.post.liked_by.values_list('username', flat=True)), ['f', 'o']
+        )
+        self.assertEqual(self.likes_on(today), 2)
+
+    def test_unlike_is_taken_from_the_day_of_the_like(self):
+        today = timezone.localdate()
+        yesterday = today - timedelta(days=1)
+        likes.toggle_like(self.post.id, self.fan.id)
+        # Move the like (and its rollup) back a day.
+        PostLike.objects.update(created_at=timezone.now() - timedelta(days=1))
+        ReportSnapshot.objects.filter(day=today).update(day=yesterday)
+
+        self.assertEqual(likes.toggle_like(self.post.id, self.fan.id), (False, 0))
+        self.assertEqual((self.likes_on(yesterday), self.likes_on(today)), (0, 0))
+
+        # Likes from before dates were kept are not taken from anyone.
+        likes.toggle_like(self.post.id, self.fan.id)
+        PostLike.objects.update(created_at=None)
+        self.assertEqual(likes.toggle_like(self.post.id, self.fan.id), (False, 0))
+        self.assertEqual(self.likes_on(today), 1)
+
+    def test_deleting_a_fan_takes_back_their_likes(self):
+        other = Post.objects.create(title='u', content='c', owner=self.owner)
+        likes.toggle_like(self.post.id, self.fan.id)
+        likes.toggle_like(other.id, self.fan.id)
+        likes.toggle_like(self.post.id, self.owner.id)
+        bulk.delete_user(self.fan)
+        self.assertEqual(
+            dict(Post.objects.values_list('id', 'like_count')), {self.post.id: 1, other.id: 0}
+        )
+        self.assertEqual(self.likes_on(timezone.localdate()), 1)
+        self.assertEqual(likes.reconcile_like_counts(), 0)
+
+    def test_concurrent_like_is_not_counted_twice(self):
+        PostLike.objects.create(post=self.post, user=self.fan)
+        Post.objects.filter(pk=self.post.pk).update(like_count=1)
+        # The other request inserted its like after this one looked.
+        with mock.patch('core.likes._find', return_value=None):
+            self.assertEqual(likes.toggle_like(self.post.id, self.fan.id), (True, 1))
+        self.assertEqual(PostLike.objects.count(), 1)
+        self.assertEqual(self.likes_on(timezone.localdate()), 0)
+
+    def test_reconcile_repairs_drift(self):
+        other = Post.objects.create(title='u', content='c', owner=self.owner)
+        likes.toggle_like(self.post.id, self.fan.id)
+        likes.toggle_like(other.id, self.fan.id)
+        Post.objects.filter(pk=self.post.pk).update(like_count=5)
+        out = io.StringIO()
+        call_command('reconcile_like_counts', stdout=out)
+        self.assertIn('Corrected like_count on 1 post(s).', out.getvalue())
+        self.assertEqual(list(Post.objects.order_by('id').values_list('like_count', flat=True)), [1, 1])
+        self.assertEqual(likes.reconcile_like_counts(), 0)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='o', email='o@example.com', password='pw')
+        self.client.force_login(self.owner)
+        posts = [Post.objects.create(title=f'p{i}', content='c', owner=self.owner) for i in range(7)]
+        # Five posts share one timestamp: only the id tiebreak orders them.
+        Post.objects.filter(pk__in=[p.pk for p in posts[1:6]]).update(created_at=posts[0].created_at)
+        self.expected = list(Post.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def walk(self, cursor=None, size=2):
+        seen = []
+        while True:
+            items, cursor = keyset_page(Post.objects.all(), cursor, size)
+            seen.extend(post.id for post in items)
+            if cursor is None:
+                return seen
+
+    def test_ties_are_broken_by_id_without_gaps(self):
+        for size in (1, 2, 3, 7, 10):
+            with self.subTest(size=size):
+                self.assertEqual(self.walk(size=size), self.expected)
+
+    def test_rows_inserted_between_fetches(self):
+        first, cursor = keyset_page(Post.objects.all(), None, 3)
+        newest = Post.objects.create(title='new', content='c', owner=self.owner)
+        rest = self.walk(cursor, size=3)
+        self.assertEqual([p.id for p in first] + rest, self.expected)
+        self.assertNotIn(newest.id, rest)
+
+    def test_feed_endpoint_and_bad_cursors(self):
+        with self.settings(POST_FEED_PAGE_SIZE=4):
+            page = self.client.get(reverse('post_feed')).json()
+            self.assertEqual([r['id'] for r in page['results']], self.expected[:4])
+            page = self.client.get(reverse('post_feed'), {'cursor': page['next']}).json()
+            self.assertEqual(([r['id'] for r in page['results']], page['next']), (self.expected[4:], None))
+            for cursor in ('garbage', 'bm90LWEtZGF0ZXwx', encode_cursor(timezone.now(), 1) + '!'):
+                with self.subTest(cursor=cursor):
+                    self.assertEqual(self.client.get(reverse('post_feed'), {'cursor': cursor}).status_code, 400)
+                    self.assertEqual(self.client.get(reverse('post_list'), {'cursor': cursor}).status_code, 400)
+
+    def test_api_cursor_forward_and_back(self):
+        url = reverse('post-list')
+        pages, response = [], self.client.get(url, {'page_size': 2}).json()
+        while True:
+            pages.append([r['id'] for r in response['results']])
+            if not response['next']:
+                break
+            response = self.client.get(response['next']).json()
+        self.assertEqual([pk for page in pages for pk in page], self.expected)
+
+        back = []
+        while response['previous']:
+            response = self.client.get(response['previous']).json()
+            back.append([r['id'] for r in response['results']])
+        self.assertEqual(back, pages[-2::-1])
+
+    def test_api_cursor_follows_requested_ordering(self):
+        response = self.client.get(reverse('post-list'), {'page_size': 3, 'ordering': 'created_at'}).json()
+        ids = [r['id'] for r in response['results']]
+        response = self.client.get(response['next']).json()
+        ids += [r['id'] for r in response['results']]
+        self.assertEqual(ids, self.expected[::-1][:6])
+
+    def test_api_rejects_tampered_cursors(self):
+        url = reverse('post-list')
+        bad_position = base64.b64encode(b'o=0&r=0&p=not-a-date').decode()
+        for cursor in ('garbage', bad_position):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(url, {'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {'cursor': 'Invalid cursor.'})
+
+
+class ManagerReportTests(TestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user(username='boss', email='b@example.com', password='pw', role='Manager')
+        self.ann = User.objects.create_user(username='ann', email='a@example.com', password='pw')
+        self.cy = User.objects.create_user(username='cy', email='c@example.com', password='pw')
+        alpha = Project.objects.create(name='Alpha', owner=self.manager)
+        beta = Project.objects.create(name='Beta', owner=self.manager)
+        Project.objects.create(name='Gamma', owner=self.manager)
+        # Alpha: 3 tasks, 2 done; Beta: 2 tasks, 0 done; Gamma: none.
+        for project, assignee, completed in [
+            (alpha, self.ann, True), (alpha, self.ann, False), (alpha, None, True),
+            (beta, self.cy, False), (beta, None, False),
+        ]:
+            Task.objects.create(title='t', description='', project=project, assignee=assignee, completed=completed)
+        self.client.force_login(self.manager)
+
+    def test_aggregates(self):
+        projects, cursor = reports.project_summary_page()
+        self.assertEqual(
+            [(p.name, p.total, p.done, p.pending) for p in projects],
+            [('Alpha', 3, 2, 1), ('Beta', 2, 0, 2), ('Gamma', 0, 0, 0)],
+        )
+        workload, cursor = reports.assignee_workload_page()
+        self.assertEqual([(u.username, u.total, u.done, u.pending) for u in workload], [('ann', 2, 1, 1), ('cy', 1, 0, 1)])
+        self.assertEqual(reports.unassigned_workload(), {'total': 2, 'done': 1, 'pending': 1})
+
+    def test_tables_are_paginated(self):
+        url = reverse('manager_reports')
+        with self.settings(REPORT_PAGE_SIZE=2):
+            response = self.client.get(url)
+            self.assertEqual([p.name for p in response.context['projects']], ['Alpha', 'Beta'])
+            response = self.client.get(url + '?' + response.context['projects_next'])
+            self.assertEqual([p.name for p in response.context['projects']], ['Gamma'])
+            self.assertIsNone(response.context['projects_next'])
+        with self.settings(REPORT_PAGE_SIZE=1):
+            response = self.client.get(url)
+            self.assertEqual([u.username for u in response.context['workload']], ['ann'])
+            self.assertEqual(response.context['unassigned']['total'], 2)
+            response = self.client.get(url + '?' + response.context['workload_next'])
+            self.assertEqual([u.username for u in response.context['workload']], ['cy'])
+            # Unassigned work is shown once, on the first page.
+            self.assertIsNone(response.context['unassigned'])
+        with self.settings(REPORT_PAGE_SIZE=2):
+            ids = list(Task.objects.order_by('-id').values_list('id', flat=True))
+            response = self.client.get(url)
+            self.assertEqual([t.id for t in response.context['tasks']], ids[:2])
+            self.assertIsNone(response.context['tasks_previous'])
+            middle = self.client.get(url + '?' + response.context['tasks_next'])
+            self.assertEqual([t.id for t in middle.context['tasks']], ids[2:4])
+            last = self.client.get(url + '?' + middle.context['tasks_next'])
+            self.assertEqual([t.id for t in last.context['tasks']], ids[4:])
+            self.assertIsNone(last.context['tasks_next'])
+            back = self.client.get(url + '?' + last.context['tasks_previous'])
+            self.assertEqual([t.id for t in back.context['tasks']], ids[2:4])
+            first = self.client.get(url + '?' + back.context['tasks_previous'])
+            self.assertEqual([t.id for t in first.context['tasks']], ids[:2])
+            self.assertIsNone(first.context['tasks_previous'])
+        self.assertEqual(self.client.get(url, {'projects': 'junk'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'tasks': 'junk'}).status_code, 400)
+
+    def csv(self, report):
+        response = self.client.get(reverse('manager_reports_export', kwargs={'report': report, 'fmt': 'csv'}))
+        return list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+
+    def test_csv_exports(self):
+        rows = self.csv('projects')
+        self.assertEqual(rows[0], ['id', 'name', 'owner', 'total', 'completed', 'pending', 'completion_ratio'])
+        self.assertEqual([r[1:] for r in rows[1:]], [
+            ['Alpha', 'boss', '3', '2', '1', '0.6667'],
+            ['Beta', 'boss', '2', '0', '2', '0.0'],
+            ['Gamma', 'boss', '0', '0', '0', '0.0'],
+        ])
+        rows = self.csv('workload')
+        self.assertEqual(sorted(r[1:] for r in rows[1:]), [
+            ['', '2', '1', '1', '0.5'],
+            ['ann', '2', '1', '1', '0.5'],
+            ['cy', '1', '0', '1', '0.0'],
+        ])
+        self.assertEqual(len(self.csv('tasks')), 6)
+
+
+class SnapshotTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='o', email='o@example.com', password='pw')
+        self.project = Project.objects.create(name='P', owner=self.owner)
+        self.today = timezone.localdate()
+        self.yesterday = self.today - timedelta(days=1)
+
+    def rollup(self, scope=ReportSnapshot.SCOPE_PROJECT, object_id=None):
+        object_id = object_id or self.project.id
+        return {
+            row['day']: (row['tasks_created'], row['tasks_completed'])
+            for row in ReportSnapshot.objects.filter(scope=scope, object_id=object_id)
+            .values('day', 'tasks_created', 'tasks_completed')
+        }
+
+    def age(self, *tasks):
+        """Pretend ``tasks`` and everything counted so far happened yesterday."""
+        Task.objects.filter(pk__in=[t.pk for t in tasks]).update(
+            created_at=timezone.now() - timedelta(days=1), completed_at=timezone.now() - timedelta(days=1)
+        )
+        ReportSnapshot.objects.filter(day=self.today).update(day=self.yesterday)
+
+    def test_signals_count_creation_and_completion(self):
+        task = Task.objects.create(title='t', description='', project=self.project, assignee=self.owner)
+        task.completed = True
+        task.save()
+        task.save()  # no transition, no change
+        self.assertEqual(self.rollup(), {self.today: (1, 1)})
+        self.assertEqual(self.rollup(ReportSnapshot.SCOPE_USER, self.owner.id), {self.today: (1, 1)})
+        task.completed = False
+        task.save()
+        self.assertEqual(self.rollup(), {self.today: (1, 0)})
+
+    def test_reopening_takes_the_completion_back_from_its_day(self):
+        first, second = [
+            Task.objects.create(title=f't{i}', description='', project=self.project, completed=True) for i in range(2)
+        ]
+        self.age(first, second)
+        self.assertEqual(self.rollup(), {self.yesterday: (2, 2)})
+        task = Task.objects.get(pk=first.pk)
+        task.completed = False
+        task.save()
+        self.assertEqual(self.rollup(), {self.yesterday: (2, 1)})
+        # Same through the bulk path.
+        bulk.update_tasks([{'id': second.id, 'completed': False}])
+        self.assertEqual(self.rollup(), {self.yesterday: (2, 0)})
+
+    def test_backfill_matches_signal_maintained_rollups(self):
+        old = [Task.objects.create(title=f'o{i}', description='', project=self.project, completed=i % 2 == 0) for i in range(3)]
+        self.age(*old)
+        Task.objects.create(title='new', description='', project=self.project, assignee=self.owner)
+        reopened = Task.objects.get(pk=old[0].pk)
+        reopened.completed = False
+        reopened.save()
+        Post.objects.create(title='p', content='c', owner=self.owner)
+        expected = {self.yesterday: (3, 1), self.today: (1, 0)}
+        self.assertEqual(self.rollup(), expected)
+
+        live = list(ReportSnapshot.objects.order_by('scope', 'object_id', 'day').values_list('scope', 'object_id', 'day', *snapshots.BACKFILLED))
+        ReportSnapshot.objects.update(tasks_created=99, tasks_completed=99, posts_created=99)
+        out = io.StringIO()
+        call_command('backfill_snapshots', stdout=out)
+        rebuilt = list(ReportSnapshot.objects.order_by('scope', 'object_id', 'day').values_list('scope', 'object_id', 'day', *snapshots.BACKFILLED))
+        self.assertEqual(rebuilt, live)
+        self.assertEqual(self.rollup(), expected)
+
+        ReportSnapshot.objects.filter(day=self.today).update(tasks_created=99)
+        call_command('backfill_snapshots', since=self.today.isoformat(), stdout=out)
+        self.assertEqual(self.rollup(), expected)
+
+
+@override_settings(ALL_TASKS_PREVIEW=2)
+class AllTasksTests(TestCase):
+    def setUp(self):
+        self.ann = User.objects.create_user(username='ann', email='a@example.com', password='pw')
+        self.bob = User.objects.create_user(username='bob', email='b@example.com', password='pw')
+        User.objects.create_user(username='carol', email='c@example.com', password='pw')
+        self.alpha = Project.objects.create(name='Alpha', owner=self.ann)
+        self.beta = Project.objects.create(name='Beta', owner=self.bob)
+        # Alpha: five tasks for ann, odd ones done; Beta: one open unassigned, one done for bob.
+        self.alpha_tasks = [
+            Task.objects.create(title=f'a{i}', description='', project=self.alpha, assignee=self.ann, completed=i % 2 == 1)
+            for i in range(5)
+        ]
+        Task.objects.create(title='b0', description='', project=self.beta)
+        Task.objects.create(title='b1', description='', project=self.beta, assignee=self.bob, completed=True)
+        self.client.force_login(self.ann)
+
+    def listing(self, **params):
+        response = self.client.get(reverse('all_tasks'), params)
+        projects = {p.name: [t.title for t in p.task_preview] for p in response.context['page']}
+        return projects, [u.username for u in response.context['assignees']]
+
+    def test_filters(self):
+        projects, assignees = self.listing()
+        self.assertEqual(projects, {'Alpha': ['a4', 'a3', 'a2'], 'Beta': ['b1', 'b0']})
+        self.assertEqual(assignees, ['ann', 'bob'])
+
+        self.assertEqual(self.listing(completed='1')[0], {'Alpha': ['a3', 'a1'], 'Beta': ['b1']})
+        projects, assignees = self.listing(completed='0', project=str(self.beta.id))
+        self.assertEqual((projects, assignees), ({'Beta': ['b0']}, []))
+        self.assertEqual(self.listing(assignee='none')[0], {'Beta': ['b0']})
+        projects, assignees = self.listing(assignee=str(self.bob.id), project=str(self.alpha.id))
+        # No match, but the chosen assignee stays selectable.
+        self.assertEqual((projects, assignees), ({}, ['ann', 'bob']))
+
+    def more(self, target, **params):
+        url = reverse('project_tasks_more', kwargs={'project_id': target.id})
+        return self.client.get(url, params).json()
+
+    def test_load_more(self):
+        ids = [t.id for t in reversed(self.alpha_tasks)]
+        page = self.more(self.alpha)
+        self.assertEqual(([r['id'] for r in page['results']], page['next_after']), (ids[:2], ids[1]))
+        page = self.more(self.alpha, after=page['next_after'])
+        self.assertEqual(([r['id'] for r in page['results']], page['next_after']), (ids[2:4], ids[3]))
+        page = self.more(self.alpha, after=page['next_after'])
+        self.assertEqual(([r['id'] for r in page['results']], page['next_after']), (ids[4:], None))
+        self.assertIn('a0', page['html'])
+
+    def test_load_more_keeps_filters(self):
+        page = self.more(self.alpha, completed='0', after=self.alpha_tasks[4].id)
+        self.assertEqual(([r['title'] for r in page['results']], page['next_after']), (['a2', 'a0'], None))
+        self.assertEqual(self.more(self.beta, assignee='none')['results'][0]['title'], 'b0')
+        # The path decides the project, not a ?project= filter.
+        self.assertEqual(len(self.more(self.beta, project=str(self.alpha.id))['results']), 2)
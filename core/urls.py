@@ -1,7 +1,15 @@
-from django.urls import path
-from . import views
+from django.urls import include, path
+from rest_framework.routers import DefaultRouter
+from . import api, views
 from django.contrib.auth import views as auth_views
 
+router = DefaultRouter()
+router.register('projects', api.ProjectViewSet)
+router.register('tasks', api.TaskViewSet)
+router.register('posts', api.PostViewSet)
+router.register('tags', api.TagViewSet)
+router.register('search', api.SearchViewSet, basename='search')
+
 
 urlpatterns = [
     # Dashboard
@@ -15,7 +23,11 @@ urlpatterns = [
 
     # Manager/Admin Reports
     path('manager/reports/', views.manager_reports, name='manager_reports'),
+    path('manager/reports/<str:report>.<str:fmt>', views.manager_reports_export, name='manager_reports_export'),
+    path('manager/metrics/', views.metrics, name='metrics'),
+    path('exports/<str:dataset>.<str:fmt>', views.export_data, name='export_data'),
     path('manage-users/', views.manage_users, name='manage_users'),
+    path('manage-users/import/', views.import_data, name='import_data'),
     path('manage-users/<int:user_id>/toggle-role/', views.toggle_user_role, name='toggle_user_role'),
     path('manage-users/<int:user_id>/delete/', views.delete_user, name='delete_user'),
 
@@ -23,11 +35,13 @@ urlpatterns = [
     path('projects/<int:project_id>/tasks/', views.task_list, name='task_list'),
     path('projects/<int:project_id>/tasks/create/', views.task_create, name='task_create'),
     path('tasks/', views.all_tasks, name='all_tasks'),
+    path('projects/<int:project_id>/tasks/more/', views.project_tasks_more, name='project_tasks_more'),
     path('projects/<int:project_id>/tasks/<int:task_id>/edit/', views.task_update, name='task_update'),
     path('projects/<int:project_id>/tasks/<int:task_id>/delete/', views.task_delete, name='task_delete'),
 
     # Posts
     path('posts/', views.post_list, name='post_list'),
+    path('posts/feed/', views.post_feed, name='post_feed'),
     path('posts/create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_update, name='post_update'),
     path('posts/<int:post_id>/delete/', views.post_delete, name='post_delete'),
@@ -44,6 +58,18 @@ urlpatterns = [
     path('reset/<uidb64>/<token>/', auth_views.PasswordResetConfirmView.as_view(template_name='core/password_reset_confirm.html'), name='password_reset_confirm'),
     path('reset/done/', auth_views.PasswordResetCompleteView.as_view(template_name='core/password_reset_complete.html'), name='password_reset_complete'),
 
+    # Background jobs
+    path('jobs/', views.job_list, name='job_list'),
+    path('jobs/<int:job_id>/', views.job_status, name='job_status'),
+    path('jobs/<int:job_id>/cancel/', views.job_cancel, name='job_cancel'),
+    path('jobs/start/<str:kind>/', views.job_start, name='job_start'),
+
+    # Search
+    path('search/', views.search_view, name='search'),
+
     # Profile
     path('profile/', views.profile_view, name='profile'),
+
+    # REST API
+    path('api/', include(router.urls)),
 ]
@@ -0,0 +1,96 @@
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.contrib import auth
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.crypto import constant_time_compare
+
+from .models import User
+
+# The user is cached next to a per-user version. A save or delete writes a
+# new version on commit, so an entry stored by a request that read the old
+# row is never served again, even if it was written after the change. That
+# only holds when every worker shares the cache, so nothing is cached
+# otherwise (settings.CACHE_SHARED).
+USER_KEY = "auth:u:{}"
+VERSION_KEY = "auth:v:{}"
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def _bump(**deltas):
+    with _stats_lock:
+        for key, value in deltas.items():
+            _stats[key] += value
+
+
+def stats():
+    with _stats_lock:
+        values = dict(_stats)
+    lookups = values["hits"] + values["misses"]
+    values["hit_rate"] = round(values["hits"] / lookups, 3) if lookups else None
+    return values
+
+
+def _timeout():
+    return getattr(settings, "AUTH_USER_CACHE_TIMEOUT", 300)
+
+
+def invalidate(user_id):
+    """Retire the cached user once the surrounding transaction commits."""
+    def replace():
+        cache.set(VERSION_KEY.format(user_id), time.time_ns(), None)
+        _bump(invalidations=1)
+    transaction.on_commit(replace)
+
+
+def enabled():
+    return getattr(settings, "CACHE_SHARED", True)
+
+
+def _entry(version, user):
+    """What is cached: the user without its password hash, plus the session hash it yields."""
+    cached = copy.copy(user)
+    # Deferred: read from the database if anything (e.g. a password change) needs it.
+    del cached.password
+    return version, cached, user.get_session_auth_hash()
+
+
+def get_user(request):
+    """request.user from the cache, falling back to django.contrib.auth.get_user().
+
+    A cached user is only returned for a session whose auth hash still
+    matches it, as get_user() would check against the database row.
+    """
+    if not enabled():
+        return auth.get_user(request)
+    session = request.session
+    try:
+        user_id = User._meta.pk.to_python(session[auth.SESSION_KEY])
+        backend = session[auth.BACKEND_SESSION_KEY]
+    except (KeyError, ValueError):
+        # Anonymous: get_user() needs no query either.
+        return auth.get_user(request)
+    user_key, version_key = USER_KEY.format(user_id), VERSION_KEY.format(user_id)
+    found = cache.get_many([user_key, version_key])
+    version, entry = found.get(version_key), found.get(user_key)
+    if entry is not None and version is not None and entry[0] == version and backend in settings.AUTHENTICATION_BACKENDS:
+        _, user, auth_hash = entry
+        session_hash = session.get(auth.HASH_SESSION_KEY)
+        if session_hash and constant_time_compare(session_hash, auth_hash):
+            user.backend = backend
+            _bump(hits=1)
+            return user
+    _bump(misses=1)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(version_key, version, None):
+            version = cache.get(version_key, version)
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        cache.set(user_key, _entry(version, user), _timeout())
+    return user
@@ -0,0 +1,77 @@
+import hashlib
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.middleware.csrf import get_token
+
+from .models import Counter
+
+RESOURCES = ("projects", "tasks", "posts", "users")
+
+# Stamps are Counter rows holding microseconds since the epoch, so every
+# worker reads the same value and a write is visible to all of them at once.
+COUNTER_NAME = "version:{}"
+
+
+def _now():
+    return time.time_ns() // 1000
+
+
+def _stamp(names):
+    # Strictly increasing even if two writes land in the same microsecond.
+    Counter.objects.filter(name__in=[COUNTER_NAME.format(name) for name in names]).update(
+        value=Greatest(F("value") + 1, Value(_now()))
+    )
+
+
+def bump(*names):
+    """Mark resources as changed once the current transaction commits."""
+    transaction.on_commit(lambda: _stamp(names))
+
+
+def _read(names):
+    keys = {COUNTER_NAME.format(name): name for name in names}
+    return {keys[key]: value for key, value in Counter.objects.filter(name__in=keys).values_list("name", "value")}
+
+
+def get(*names):
+    """{name: stamp in seconds} for ``names``; a missing stamp starts at "now"."""
+    stamps = _read(names)
+    missing = [name for name in names if name not in stamps]
+    if missing:
+        # Unknown means "may have changed": clients revalidate once, then 304.
+        now = _now()
+        Counter.objects.bulk_create(
+            [Counter(name=COUNTER_NAME.format(name), value=now) for name in missing], ignore_conflicts=True
+        )
+        stamps.update(_read(missing))
+    return {name: value / 1_000_000 for name, value in stamps.items()}
+
+
+def last_modified(stamps, user=None):
+    latest = max(stamps.values())
+    # A fresh login (possibly as someone else) must not revalidate a page
+    # rendered for the previous session.
+    last_login = getattr(user, "last_login", None)
+    if last_login:
+        latest = max(latest, last_login.timestamp())
+    return datetime.fromtimestamp(latest, tz=dt_timezone.utc)
+
+
+def etag(stamps, request):
+    user = request.user
+    # The page embeds a CSRF token; make sure the secret it will use exists
+    # now, and hand out a fresh copy whenever it rotates.
+    get_token(request)
+    parts = [
+        *(f"{name}={stamps[name]!r}" for name in sorted(stamps)),
+        # Every page renders the viewer's name in the navbar.
+        f"user={user.pk}:{getattr(user, 'role', '')}:{getattr(user, 'username', '')}",
+        f"login={getattr(user, 'last_login', None)}",
+        f"path={request.get_full_path()}",
+        f"csrf={request.META.get('CSRF_COOKIE', '')}",
+    ]
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
@@ -2,10 +2,30 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, logout
 from django.views.decorators.http import require_http_methods, require_POST
 from django.contrib.auth.decorators import login_required
-from .decorators import admin_required, manager_or_admin_required
-from .models import Project, Task, Post, Tag, User
-from .forms import ProjectForm, TaskForm, PostForm, SignUpForm, LoginForm, ProfileForm
+from .decorators import admin_required, manager_or_admin_required, versioned
+from . import bulk, counters, exports, fanout, fragments, imports, jobs, reports, search, snapshots, usercache
+from .likes import toggle_like
+from .pagination import keyset_page
+from .models import Job, Project, Task, Post, User
+from .forms import ProjectForm, TaskForm, PostForm, SignUpForm, LoginForm, ProfileForm, ImportForm
 from django.contrib import messages
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch, Q
+from django.http import Http404, JsonResponse
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+
+# --- helpers ---
+def wants_json(request):
+    return (
+        request.headers.get('x-requested-with') == 'XMLHttpRequest'
+        or 'application/json' in request.headers.get('accept', '')
+    )
 
 #--- Authentication imports ---
 def signup_view(request):
@@ -44,26 +64,106 @@ def logout_view(request):
 
 # --- dashboard view ---
 def dashboard(request):
+    # Maintained by the signal receivers; one cache read per page load.
+    counts = counters.snapshot()
     context = {
-        'project_count': Project.objects.count(),
-        'task_count': Task.objects.count(),
-        'post_count': Post.objects.count(),
-        'all_projects': Project.objects.count(),
-        'all_users': User.objects.count(),
+        'project_count': counts['projects'],
+        'task_count': counts['tasks'],
+        'post_count': counts['posts'],
+        'all_projects': counts['projects'],
+        'all_users': counts['users'],
     }
     return render(request, 'core/dashboard.html', context)
 
 # --- manager and admin views ---
+def _querystring(request, **changes):
+    query = request.GET.copy()
+    for name, value in changes.items():
+        query.pop(name, None)
+        if value is not None:
+            query[name] = value
+    return query.urlencode()
+
 @manager_or_admin_required
 def manager_reports(request):
-    projects = Project.objects.prefetch_related('tasks').all()
-    tasks = Task.objects.select_related('project').all()
-    return render(request, 'core/manager_reports.html', {'projects': projects, 'tasks': tasks})
+    # Every table is keyset-paginated, each with its own cursor.
+    tasks_after, tasks_before = request.GET.get('tasks'), request.GET.get('tasks_before')
+    tasks, tasks_next, tasks_previous = reports.report_tasks_page(tasks_after, tasks_before)
+    projects_cursor = request.GET.get('projects')
+    workload_cursor = request.GET.get('workload')
+    projects, projects_next = reports.project_summary_page(projects_cursor)
+    workload, workload_next = reports.assignee_workload_page(workload_cursor)
+    context = {
+        'projects': projects,
+        'projects_cursor': projects_cursor,
+        'projects_first': _querystring(request, projects=None),
+        'projects_next': projects_next and _querystring(request, projects=projects_next),
+        'workload': workload,
+        'unassigned': None if workload_cursor else reports.unassigned_workload(),
+        'workload_cursor': workload_cursor,
+        'workload_first': _querystring(request, workload=None),
+        'workload_next': workload_next and _querystring(request, workload=workload_next),
+        'tasks': tasks,
+        'tasks_next': tasks_next and _querystring(request, tasks=tasks_next, tasks_before=None),
+        'tasks_previous': tasks_previous and _querystring(request, tasks=None, tasks_before=tasks_previous),
+        'trend': snapshots.site_trend(days=14),
+    }
+    return render(request, 'core/manager_reports.html', context)
+
+@manager_or_admin_required
+def manager_reports_export(request, report, fmt):
+    if report not in reports.EXPORTS or fmt not in exports.FORMATS:
+        raise Http404("Unknown report or format.")
+    header, rows = reports.EXPORTS[report]
+    return exports.streaming_export(fmt, f"{report}-report", header, rows(exports.CHUNK_SIZE))
+
+@admin_required
+def export_data(request, dataset, fmt):
+    if dataset not in exports.DATASETS or fmt not in exports.FORMATS:
+        raise Http404("Unknown dataset or format.")
+    params = request.GET.copy()
+    compress = params.pop('gzip', ['0'])[-1] in ('1', 'true')
+    try:
+        header, rows = exports.dataset_rows(dataset, params)
+    except ValidationError as e:
+        return JsonResponse({'errors': e.message_dict}, status=400)
+    filename = f"{dataset}-{timezone.localdate():%Y%m%d}"
+    return exports.streaming_export(fmt, filename, header, rows, compress=compress)
+
+@admin_required
+def metrics(request):
+    # Per-process counters; each worker reports its own.
+    return JsonResponse({
+        'fragments': fragments.stats(),
+        'fanout': fanout.stats(),
+        'channel_layer': fanout.layer_stats(),
+        'auth': usercache.stats(),
+    })
 
 @admin_required
 def manage_users(request):
     users = User.objects.all()
-    return render(request, 'core/manage_users.html', {'users': users})
+    return render(request, 'core/manage_users.html', {'users': users, 'export_datasets': list(exports.DATASETS)})
+
+@admin_required
+def import_data(request):
+    result = None
+    form = ImportForm(request.POST or None, request.FILES or None)
+    if request.method == 'POST' and form.is_valid():
+        data = form.cleaned_data
+        if data['file'].size > getattr(settings, 'IMPORT_INLINE_MAX_BYTES', 2 * 1024 * 1024):
+            path = default_storage.save(f"imports/{data['file'].name}", data['file'])
+            jobs.enqueue(
+                'import', user=request.user,
+                dataset=data['dataset'], path=path, fmt=data['format'], dry_run=data['dry_run'],
+            )
+            messages.info(request, "Large file: the import runs in the background.")
+            return redirect('job_list')
+        try:
+            result = imports.run(data['dataset'], data['file'], data['format'], dry_run=data['dry_run'], user=request.user)
+        except ValueError as e:
+            form.add_error('file', f"Could not read the file: {e}")
+    return render(request, 'core/import.html', {'form': form, 'result': result})
 
 
 @admin_required
@@ -94,7 +194,15 @@ def delete_user(request, user_id):
     if target.id == request.user.id:
         messages.error(request, "You cannot delete your own account.")
         return redirect('manage_users')
-    target.delete()
+    if Task.objects.filter(project__owner=target).count() > getattr(settings, 'PROJECT_DELETE_INLINE_MAX_TASKS', 5000):
+        # Locked out now; the worker removes the account after its projects.
+        target.is_active = False
+        target.save(update_fields=['is_active'])
+        jobs.enqueue('delete_user', user=request.user, user_id=target.id)
+        messages.info(request, f"Deleting {target.username} and their projects in the background.")
+        return redirect('job_list')
+    # Their projects first, so the cascade below has no tasks left to signal for.
+    bulk.delete_user(target)
     messages.success(request, "User deleted.")
     return redirect('manage_users')
 
@@ -102,6 +210,7 @@ def delete_user(request, user_id):
 
 # --- Project Views ---
 @login_required
+@versioned('projects')
 def project_list(request):
     projects = Project.objects.all()
     return render(request, 'core/project_list.html', {'projects': projects})
@@ -139,22 +248,104 @@ def project_delete(request, project_id):
     project = get_object_or_404(Project, id=project_id)
 
     if request.method == "POST":
-        project.delete()
+        if project.tasks.count() > getattr(settings, 'PROJECT_DELETE_INLINE_MAX_TASKS', 5000):
+            jobs.enqueue('delete_project', user=request.user, project_id=project.id)
+            messages.info(request, f"Deleting {project.name} in the background.")
+            return redirect('job_list')
+        deleted = bulk.delete_project(project)
+        messages.success(request, f"Project deleted with {deleted} task(s).")
         return redirect('project_list')
 
     return render(request, 'core/project_confirm_delete.html', {'project': project})
 
 # --- Task Views ---
 @login_required
+@versioned('projects', 'tasks', 'users')
 def task_list(request, project_id):
     project = get_object_or_404(Project, id=project_id)
-    tasks = project.tasks.all()
+    tasks = project.tasks.select_related('assignee')
     return render(request, 'core/task_list.html', {'project': project, 'tasks': tasks})
 
+def task_filters(params):
+    """Translate ?completed=&assignee=&project= into Task lookups."""
+    filters = {}
+    completed = params.get('completed')
+    if completed in ('1', '0'):
+        filters['completed'] = completed == '1'
+    assignee = params.get('assignee')
+    if assignee == 'none':
+        filters['assignee__isnull'] = True
+    elif assignee and assignee.isdigit():
+        filters['assignee_id'] = int(assignee)
+    project = params.get('project')
+    if project and project.isdigit():
+        filters['project_id'] = int(project)
+    return filters
+
+def assignee_choices(filters):
+    """Users worth offering in the assignee filter: those with tasks in scope.
+
+    The other filters still apply, so every choice leads somewhere; the
+    current choice is always kept.
+    """
+    scope = {k: v for k, v in filters.items() if not k.startswith('assignee')}
+    users = Q(Exists(Task.objects.filter(assignee=OuterRef('pk'), **scope)))
+    if 'assignee_id' in filters:
+        users |= Q(pk=filters['assignee_id'])
+    return User.objects.filter(users).order_by('username').only('id', 'username')
+
 @login_required
+@versioned('projects', 'tasks', 'users')
 def all_tasks(request):
-    projects = Project.objects.all().prefetch_related('tasks')
-    return render(request, 'core/all_tasks.html', {'projects': projects})
+    filters = task_filters(request.GET)
+    preview = getattr(settings, 'ALL_TASKS_PREVIEW', 10)
+    tasks = Task.objects.select_related('assignee').filter(**filters).order_by('-id')
+    projects = Project.objects.order_by('name', 'id')
+    if 'project_id' in filters:
+        projects = projects.filter(id=filters['project_id'])
+    if filters:
+        projects = projects.filter(Exists(tasks.filter(project=OuterRef('pk'))))
+    # One extra row per project tells the template whether to offer "load more".
+    projects = projects.prefetch_related(Prefetch('tasks', queryset=tasks[:preview + 1], to_attr='task_preview'))
+    page = Paginator(projects, getattr(settings, 'ALL_TASKS_PROJECTS_PER_PAGE', 10)).get_page(request.GET.get('page'))
+
+    query = request.GET.copy()
+    query.pop('page', None)
+    context = {
+        'page': page,
+        'preview': preview,
+        'preview_slice': f':{preview}',
+        'filters': request.GET,
+        'querystring': query.urlencode(),
+        'assignees': assignee_choices(filters),
+    }
+    return render(request, 'core/all_tasks.html', context)
+
+@login_required
+def project_tasks_more(request, project_id):
+    filters = task_filters(request.GET)
+    filters['project_id'] = project_id
+    tasks = Task.objects.select_related('assignee').filter(**filters).order_by('-id')
+    after = request.GET.get('after')
+    if after and after.isdigit():
+        tasks = tasks.filter(id__lt=int(after))
+    size = getattr(settings, 'ALL_TASKS_PREVIEW', 10)
+    tasks = list(tasks[:size + 1])
+    has_more = len(tasks) > size
+    tasks = tasks[:size]
+    html = render_to_string('core/task_items.html', {'tasks': tasks}, request=request)
+    results = [
+        {
+            'id': task.id,
+            'title': task.title,
+            'description': task.description,
+            'completed': task.completed,
+            'assignee': task.assignee.username if task.assignee else None,
+        }
+        for task in tasks
+    ]
+    next_after = tasks[-1].id if has_more else None
+    return JsonResponse({'results': results, 'next_after': next_after, 'html': html})
 
 @manager_or_admin_required
 def task_create(request, project_id):
@@ -164,7 +355,9 @@ def task_create(request, project_id):
         if form.is_valid():
             task = form.save(commit=False)
             task.project = project
-            task.save()
+            # The notification email is queued by post_save; keep it in one transaction with the row.
+            with transaction.atomic():
+                task.save()
             return redirect('task_list', project_id=project_id)
     else:
         form = TaskForm()
@@ -177,7 +370,8 @@ def task_update(request, project_id, task_id):
     if request.method == 'POST':
         form = TaskForm(request.POST, request.FILES, instance=task)
         if form.is_valid():
-            form.save()
+            with transaction.atomic():
+                form.save()
             return redirect('task_list', project_id=project_id)
     else:
         form = TaskForm(instance=task)
@@ -187,14 +381,39 @@ def task_update(request, project_id, task_id):
 def task_delete(request, project_id, task_id):
     project = get_object_or_404(Project, id=project_id)
     task = get_object_or_404(Task, id=task_id, project=project)
-    task.delete()
+    with transaction.atomic():
+        task.delete()
     return redirect('task_list', project_id=project_id)
 
 # --- Post Views ---
+def post_feed_page(request):
+    queryset = Post.objects.select_related('owner').prefetch_related('tags')
+    size = getattr(settings, 'POST_FEED_PAGE_SIZE', 20)
+    return keyset_page(queryset, request.GET.get('cursor'), size)
+
 @login_required
+@versioned('posts', 'users')
 def post_list(request):
-    posts = Post.objects.all().order_by('-created_at')
-    return render(request, 'core/post_list.html', {'posts': posts})
+    posts, next_cursor = post_feed_page(request)
+    return render(request, 'core/post_list.html', {'posts': posts, 'next_cursor': next_cursor})
+
+@login_required
+def post_feed(request):
+    posts, next_cursor = post_feed_page(request)
+    html = render_to_string('core/post_cards.html', {'posts': posts}, request=request)
+    results = [
+        {
+            'id': post.id,
+            'title': post.title,
+            'content': post.content,
+            'owner': post.owner.username,
+            'tags': [tag.name for tag in post.tags.all()],
+            'like_count': post.like_count,
+            'created_at': post.created_at.isoformat(),
+        }
+        for post in posts
+    ]
+    return JsonResponse({'results': results, 'next': next_cursor, 'html': html})
 
 @login_required
 def post_create(request):
@@ -206,12 +425,7 @@ def post_create(request):
             default_owner = request.user
             post.owner = default_owner
             post.save()
-
-            tags_text = form.cleaned_data.get('tags', '')
-            tag_names = [t.strip() for t in tags_text.split(',') if t.strip()]
-            for name in tag_names:
-                tag_obj, _ = Tag.objects.get_or_create(name=name)
-                post.tags.add(tag_obj)
+            form.save_m2m()
 
             return redirect('post_list')
     else:
@@ -250,15 +464,65 @@ def post_delete(request, post_id):
     return render(request, "core/post_confirm_delete.html", {"post": post})
 
 @login_required
+@require_POST
 def like_post(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    u = request.user
-    if u in post.liked_by.all():
-        post.liked_by.remove(u)
-    else:
-        post.liked_by.add(u)
+    post = get_object_or_404(Post.objects.only('id'), id=post_id)
+    liked, like_count = toggle_like(post.id, request.user.id)
+    if wants_json(request):
+        return JsonResponse({'post_id': post.id, 'liked': liked, 'like_count': like_count})
     return redirect('post_list')
 
+# --- Background jobs ---
+def _visible_jobs(user):
+    return Job.objects.all() if user.role == 'Admin' else Job.objects.filter(user=user)
+
+@login_required
+def job_list(request):
+    recent = _visible_jobs(request.user).select_related('user').order_by('-id')[:50]
+    return render(request, 'core/jobs.html', {'jobs': recent, 'admin_jobs': ADMIN_JOBS})
+
+@login_required
+def job_status(request, job_id):
+    job = get_object_or_404(_visible_jobs(request.user), id=job_id)
+    data = jobs.event(job)
+    data.update(result=job.result, created_at=job.created_at, finished_at=job.finished_at)
+    return JsonResponse(data)
+
+@login_required
+@require_POST
+def job_cancel(request, job_id):
+    job = get_object_or_404(_visible_jobs(request.user), id=job_id)
+    cancelled = jobs.cancel(job)
+    if wants_json(request):
+        return JsonResponse({'cancelled': cancelled})
+    if cancelled:
+        messages.info(request, "Cancellation requested.")
+    return redirect('job_list')
+
+# Maintenance jobs an admin may start from the jobs page.
+ADMIN_JOBS = {'rebuild_search_index': 'Rebuild search index', 'backfill_snapshots': 'Rebuild report rollups'}
+
+@admin_required
+@require_POST
+def job_start(request, kind):
+    if kind not in ADMIN_JOBS:
+        raise Http404("Unknown job.")
+    jobs.enqueue(kind, user=request.user)
+    messages.info(request, f"{ADMIN_JOBS[kind]} queued.")
+    return redirect('job_list')
+
+# --- Search ---
+@login_required
+def search_view(request):
+    query = request.GET.get('q', '').strip()
+    kind = request.GET.get('kind', '')
+    results = search.search(query, kind)
+    page = Paginator(results, getattr(settings, 'SEARCH_PAGE_SIZE', 20)).get_page(request.GET.get('page'))
+    params = request.GET.copy()
+    params.pop('page', None)
+    context = {'query': query, 'kind': kind, 'page': page, 'querystring': params.urlencode()}
+    return render(request, 'core/search.html', context)
+
 @login_required
 def profile_view(request):
     user = request.user